@@ -0,0 +1,84 @@
+"""
+配置读写基准
+测量 config.load / add_shortcut / remove_shortcut 随配置规模的变化
+
+用法: python -m benchmarks.bench_config
+"""
+import json
+import os
+import shutil
+import tempfile
+
+from core import config
+
+from benchmarks.timing import per_call_ns
+
+
+SIZES = (10, 100, 1000)
+
+
+def _write_config(path, count):
+    """生成包含 count 个快捷键的配置文件"""
+    shortcuts = [
+        {
+            'id': i + 1,
+            'key': f"f{i % 12 + 1}",
+            'modifiers': 'Ctrl+Alt',
+            'window_title': f"Window {i}",
+            'window_class': f"Class{i % 20}",
+            'hwnd': 0x10000 + i,
+        }
+        for i in range(count)
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'shortcuts': shortcuts}, f, indent=2)
+
+
+def collect(quick=False):
+    """
+    基准套件入口
+    Returns:
+        dict: 指标名 -> 纳秒（越小越好）
+    """
+    sizes = (10, 100) if quick else SIZES
+    metrics = {}
+    tmp_dir = tempfile.mkdtemp(prefix='wt-bench-')
+
+    try:
+        for count in sizes:
+            path = os.path.join(tmp_dir, f"config-{count}.json")
+            _write_config(path, count)
+            store = config.ConfigStore(path)
+            previous = config.set_store(store)
+            try:
+                number = 20 if count >= 1000 else 100
+
+                def cold_load():
+                    store.invalidate()
+                    config.load()
+
+                metrics[f"config.load.cold[{count}]"] = per_call_ns(cold_load, number)
+                metrics[f"config.load[{count}]"] = per_call_ns(config.load, number)
+
+                # 添加后立即删除，保持配置规模不变
+                def add_remove():
+                    saved = config.add_shortcut({'key': 'f12', 'modifiers': 'Win'})
+                    config.remove_shortcut(saved['id'])
+
+                metrics[f"config.add_remove[{count}]"] = per_call_ns(add_remove, number // 4 or 1)
+            finally:
+                config.set_store(previous)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return metrics
+
+
+def main():
+    """打印基准结果"""
+    for name, value in collect().items():
+        print(f"{name:<45} {value:>12.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
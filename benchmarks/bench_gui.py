@@ -0,0 +1,76 @@
+"""
+添加对话框基准
+测量 AddDialog.show_window_list 首次显示和填充完整个窗口列表的耗时
+需要 customtkinter 和可用的显示环境，不满足时跳过
+
+用法: python -m benchmarks.bench_gui
+"""
+import time
+
+from core.backend import set_backend
+from core.backend.simulated import SimulatedDesktop
+
+from benchmarks.timing import quiet
+
+
+SIZES = (100, 1000)
+
+
+def collect(quick=False):
+    """
+    基准套件入口
+    Returns:
+        dict: 指标名 -> 纳秒（越小越好），环境不支持时为空
+    """
+    try:
+        import customtkinter as ctk
+        from gui.add_dialog import AddDialog
+    except ImportError as e:
+        print(f"[bench_gui] 跳过: {e}")
+        return {}
+
+    try:
+        root = ctk.CTk()
+    except Exception as e:
+        print(f"[bench_gui] 跳过: 无法创建窗口 ({e})")
+        return {}
+    root.withdraw()
+
+    sizes = SIZES[:1] if quick else SIZES
+    metrics = {}
+    try:
+        for count in sizes:
+            desktop = SimulatedDesktop()
+            previous = set_backend(desktop)
+            try:
+                desktop.populate(count)
+                with quiet():
+                    dialog = AddDialog(root, None)
+                start = time.perf_counter_ns()
+                dialog.show_window_list()
+                # 首屏：等第一次 _drain_windows 把窗口追加到列表并绘制之后
+                while dialog.enumerating and not dialog.window_model.window_count:
+                    root.update()
+                root.update_idletasks()
+                metrics[f"gui.show_window_list.first_paint[{count}]"] = time.perf_counter_ns() - start
+                # 窗口在后台枚举，等全部显示完
+                while dialog.enumerating:
+                    root.update()
+                metrics[f"gui.show_window_list[{count}]"] = time.perf_counter_ns() - start
+                dialog.on_cancel()
+            finally:
+                set_backend(previous)
+    finally:
+        root.destroy()
+
+    return metrics
+
+
+def main():
+    """打印基准结果"""
+    for name, value in collect().items():
+        print(f"{name:<45} {value:>12.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+热键匹配微基准
+测量 _on_press 每次按键的耗时随已注册快捷键数量的变化
+
+用法: python -m benchmarks.bench_hotkey
+"""
+import contextlib
+import io
+import time
+
+from core import hotkey
+from core.backend import set_backend
+from core.backend.simulated import SimulatedDesktop
+
+
+SIZES = (10, 100, 1000, 10000)
+_MODIFIER_NAMES = ('Ctrl', 'Alt', 'Shift', 'Win')
+
+
+def _modifiers_for(i):
+    """为第 i 个快捷键生成一组非空修饰键"""
+    mask = i % 15 + 1
+    return '+'.join(name for bit, name in enumerate(_MODIFIER_NAMES) if mask & (1 << bit))
+
+
+def _register_shortcuts(count):
+    """注册 count 个互不冲突的快捷键"""
+    hotkey.unregister_all()
+    for i in range(count):
+        # 键名只参与查表，不要求是真实存在的按键
+        hotkey.register(None, i + 1, _modifiers_for(i), f"k{i}")
+
+
+def _measure(events, repeat):
+    """
+    回放按键序列并返回每个事件的平均耗时（纳秒）
+    Args:
+        events: [(is_press, key_name), ...]
+        repeat: 回放次数
+    """
+    on_press = hotkey._on_press
+    on_release = hotkey._on_release
+    start = time.perf_counter_ns()
+    for _ in range(repeat):
+        for is_press, key in events:
+            if is_press:
+                on_press(key)
+            else:
+                on_release(key)
+    elapsed = time.perf_counter_ns() - start
+    return elapsed / (repeat * len(events))
+
+
+def run(sizes=SIZES, repeat=2000):
+    """
+    运行基准
+    Returns:
+        list: 每个规模一条结果 {'shortcuts', 'typing_ns', 'chord_miss_ns', 'hit_ns'}
+    """
+    # 使用模拟桌面，注册热键时不会安装真实的键盘钩子
+    previous = set_backend(SimulatedDesktop())
+    typing = [(True, c) for c in "the quick brown fox"]
+    results = []
+
+    for count in sizes:
+        # 注册过程会打印日志，基准只关心按键路径
+        with contextlib.redirect_stdout(io.StringIO()):
+            _register_shortcuts(count)
+
+        bound = f"k{count - 1}"
+        # 按下已绑定的键但修饰键不对：需要一次查表
+        chord_miss = [(True, bound)]
+        # 完整匹配：Ctrl 按下 → 键按下/释放 → Ctrl 释放
+        # （键不释放的话，下一轮按下会被当作自动重复过滤掉）
+        hit = [
+            (True, 'ctrl_l'),
+            (True, 'k0'),
+            (False, 'k0'),
+            (False, 'ctrl_l'),
+        ]
+
+        row = {
+            'shortcuts': count,
+            'typing_ns': _measure(typing, repeat),
+            'chord_miss_ns': _measure(chord_miss, repeat),
+        }
+        with contextlib.redirect_stdout(io.StringIO()):
+            row['hit_ns'] = _measure(hit, repeat // 10 or 1)
+        results.append(row)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        hotkey.unregister_all()
+    set_backend(previous)
+    return results
+
+
+def collect(quick=False):
+    """
+    基准套件入口
+    Returns:
+        dict: 指标名 -> 纳秒（越小越好）
+    """
+    sizes = (10, 1000) if quick else SIZES
+    metrics = {}
+    for row in run(sizes, repeat=200 if quick else 2000):
+        n = row['shortcuts']
+        metrics[f"hotkey.on_press.typing[{n}]"] = row['typing_ns']
+        metrics[f"hotkey.on_press.chord_miss[{n}]"] = row['chord_miss_ns']
+        metrics[f"hotkey.on_press.hit[{n}]"] = row['hit_ns']
+    return metrics
+
+
+def main():
+    """打印基准结果"""
+    print(f"{'shortcuts':>10} {'typing ns/key':>15} {'chord miss ns':>15} {'hit ns/event':>15}")
+    for row in run():
+        print(f"{row['shortcuts']:>10} {row['typing_ns']:>15.0f} "
+              f"{row['chord_miss_ns']:>15.0f} {row['hit_ns']:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+窗口查找基准
+测量 find_window_by_class / find_window_by_title 随打开窗口数量的变化，
+分别对比每次枚举和常驻注册表两种方式
+
+用法: python -m benchmarks.bench_window
+"""
+from core import window as window_mgr
+from core.backend import set_backend
+from core.backend.simulated import SimulatedDesktop
+
+from benchmarks.timing import per_call_ns
+
+
+SIZES = (100, 1000, 5000)
+
+
+def collect(quick=False):
+    """
+    基准套件入口
+    Returns:
+        dict: 指标名 -> 纳秒（越小越好）
+    """
+    sizes = (100, 1000) if quick else SIZES
+    metrics = {}
+
+    for count in sizes:
+        desktop = SimulatedDesktop()
+        previous = set_backend(desktop)
+        try:
+            # 先创建目标窗口，之后的窗口都叠在它上面，枚举方式需要走完整个列表
+            desktop.create_window("target document - Editor", "TargetClass")
+            desktop.populate(count)
+
+            number = 20 if count >= 1000 else 200
+            metrics[f"window.find_by_class.enum[{count}]"] = per_call_ns(
+                lambda: window_mgr.find_window_by_class("TargetClass"), number)
+            metrics[f"window.find_by_title.enum[{count}]"] = per_call_ns(
+                lambda: window_mgr.find_window_by_title("target document"), number)
+
+            window_mgr.start_registry(resync_interval=0)
+            try:
+                metrics[f"window.find_by_class.registry[{count}]"] = per_call_ns(
+                    lambda: window_mgr.find_window_by_class("TargetClass"), 2000)
+                metrics[f"window.find_by_title.registry[{count}]"] = per_call_ns(
+                    lambda: window_mgr.find_window_by_title("target document"), number)
+            finally:
+                window_mgr.stop_registry()
+        finally:
+            set_backend(previous)
+
+    return metrics
+
+
+def main():
+    """打印基准结果"""
+    for name, value in collect().items():
+        print(f"{name:<45} {value:>12.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,521 @@
+"""
+按键录制与回放
+把真实键盘事件流（带时间，包括左右修饰键、自动重复、穿插的普通打字）保存为文件，
+之后在模拟后端上按原速或 N 倍速回放给热键引擎，报告匹配、漏触发、误触发和每个事件的处理耗时。
+也可以生成指定速率的合成打字流，在没有桌面的机器上对匹配和按键规范化逻辑做压力测试
+
+回放时热键引擎使用按录制时间推进的虚拟时钟，序列超时和自动重复判断与回放速度无关，
+同一个文件在任何倍速下的匹配结果都相同。匹配到的快捷键只做记录，不进入执行队列
+
+文件格式（JSON lines）:
+    第一行   {"version": 1, "profile": ..., "shortcuts": [...]}   录制时生效的快捷键
+    之后每行 [t, "d", key]    t 秒时按下 key
+             [t, "u", key]    t 秒时释放 key
+             [t, "x", id]     前一个按键事件应当触发快捷键 id
+
+用法:
+    python -m benchmarks.replay record keys.jsonl [--duration 60]     用当前配置录制（需要真实键盘后端）
+    python -m benchmarks.replay synth keys.jsonl [--rate 5000] [--seconds 10]
+    python -m benchmarks.replay replay keys.jsonl [--speed 4]         --speed 0 表示不等待、尽快回放
+"""
+import argparse
+import contextlib
+import json
+import random
+import sys
+import threading
+import time
+
+from core import config, hotkey
+from core.backend import get_backend, set_backend
+from core.backend.simulated import SimulatedDesktop
+from benchmarks.timing import quiet
+
+
+FORMAT_VERSION = 1
+
+PRESS = 'd'
+RELEASE = 'u'
+EXPECT = 'x'
+
+
+class Recording:
+    """一段按键事件流及录制时生效的快捷键"""
+
+    def __init__(self, shortcuts=(), profile=None, events=None):
+        """
+        Args:
+            shortcuts: 快捷键配置列表
+            profile: 生效的配置方案
+            events: [(t, kind, value), ...]，kind 为 PRESS/RELEASE/EXPECT
+        """
+        self.shortcuts = list(shortcuts)
+        self.profile = profile
+        self.events = events if events is not None else []
+
+    @property
+    def duration(self):
+        return self.events[-1][0] if self.events else 0.0
+
+    def key_event_count(self):
+        return sum(1 for _, kind, _ in self.events if kind != EXPECT)
+
+    def steps(self):
+        """
+        按按键事件分组
+        Returns:
+            list: [(t, kind, key, [期望触发的快捷键 ID, ...]), ...]
+        """
+        steps = []
+        for t, kind, value in self.events:
+            if kind == EXPECT:
+                if steps:
+                    steps[-1][3].append(value)
+            else:
+                steps.append((t, kind, value, []))
+        return steps
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            header = {'version': FORMAT_VERSION, 'profile': self.profile, 'shortcuts': self.shortcuts}
+            f.write(json.dumps(header, ensure_ascii=False) + '\n')
+            for t, kind, value in self.events:
+                f.write(json.dumps([round(t, 6), kind, value], ensure_ascii=False) + '\n')
+
+    @classmethod
+    def load(cls, path):
+        """
+        读取录制文件
+        Raises:
+            ValueError: 文件格式不正确
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline() or 'null')
+            if not isinstance(header, dict) or header.get('version') != FORMAT_VERSION:
+                raise ValueError(f"{path}: not a version {FORMAT_VERSION} key recording")
+            events = []
+            for number, line in enumerate(f, 2):
+                line = line.strip()
+                if not line:
+                    continue
+                t, kind, value = json.loads(line)
+                if kind not in (PRESS, RELEASE, EXPECT):
+                    raise ValueError(f"{path}:{number}: unknown event kind {kind!r}")
+                events.append((float(t), kind, value))
+        return cls(header.get('shortcuts', []), header.get('profile'), events)
+
+
+@contextlib.contextmanager
+def _observe_triggers(on_trigger):
+    """匹配到的快捷键交给 on_trigger(shortcut_id)，不送进执行队列"""
+    original = hotkey._trigger_callback
+    hotkey._trigger_callback = lambda shortcut_id, received=None: on_trigger(shortcut_id)
+    try:
+        yield
+    finally:
+        hotkey._trigger_callback = original
+
+
+# ---- 录制 ----
+
+class _RecordingBackend:
+    """包装真实后端：键盘事件先写入录制，再交给热键引擎"""
+
+    def __init__(self, backend, recorder):
+        self._backend = backend
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+    def keyboard_source(self, on_press, on_release):
+        recorder = self._recorder
+
+        def press(key_name):
+            recorder.add(PRESS, key_name)
+            on_press(key_name)
+
+        def release(key_name):
+            recorder.add(RELEASE, key_name)
+            on_release(key_name)
+
+        return self._backend.keyboard_source(press, release)
+
+
+class Recorder:
+    """把事件追加到录制中（钩子线程调用）"""
+
+    def __init__(self, recording):
+        self.recording = recording
+        self._start = None
+
+    def add(self, kind, value):
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now
+        self.recording.events.append((now - self._start, kind, value))
+
+
+# 录制时等待结束的单次时长（秒）
+_WAIT_SLICE = 0.2
+
+
+def record(duration=None, stop_event=None):
+    """
+    用当前配置录制键盘事件，热键引擎匹配到的快捷键记为期望触发（不执行切换）
+    Args:
+        duration: 录制时长（秒），None 表示直到 stop_event 置位或 Ctrl+C
+        stop_event: threading.Event，置位时结束录制
+    Returns:
+        Recording: 录制结果
+    """
+    config.load()
+    shortcuts = config.get_store().shortcuts()
+    recording = Recording(shortcuts, config.get_active_profile())
+    recorder = Recorder(recording)
+    stop_event = stop_event or threading.Event()
+
+    previous = set_backend(_RecordingBackend(get_backend(), recorder))
+    try:
+        with _observe_triggers(lambda shortcut_id: recorder.add(EXPECT, shortcut_id)):
+            hotkey.unregister_all()
+            hotkey.reconcile(None, shortcuts)
+            hotkey.activate_profile(recording.profile)
+            # 分段等待：Windows 上不带超时（或超时很长）的 wait 不响应 Ctrl+C
+            deadline = None if duration is None else time.monotonic() + duration
+            try:
+                while not stop_event.is_set():
+                    timeout = _WAIT_SLICE if deadline is None else min(_WAIT_SLICE, deadline - time.monotonic())
+                    if timeout <= 0 or stop_event.wait(timeout):
+                        break
+            except KeyboardInterrupt:
+                pass
+    finally:
+        hotkey.unregister_all()
+        set_backend(previous)
+    return recording
+
+
+# ---- 合成 ----
+
+_SYNTH_KEYS = [f"F{i}" for i in range(1, 13)] + [str(i) for i in range(10)]
+_SYNTH_MODIFIERS = ('Ctrl', 'Alt', 'Ctrl+Alt', 'Ctrl+Shift', 'Alt+Shift', 'Win', 'Win+Shift', 'Ctrl+Alt+Shift')
+_MODIFIER_VARIANTS = {
+    'Ctrl': ('ctrl_l', 'ctrl_r'),
+    'Alt': ('alt_l', 'alt_r'),
+    'Shift': ('shift', 'shift_r'),
+    'Win': ('cmd', 'cmd_r'),
+}
+_LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def synthetic_shortcuts(count=50):
+    """
+    生成互不冲突的快捷键：主键为 F1-F12 和数字键，每 7 个中有一个是两步序列，
+    其余每 5 个中有一个松开时触发
+    """
+    if count > len(_SYNTH_KEYS) * len(_SYNTH_MODIFIERS):
+        raise ValueError(f"at most {len(_SYNTH_KEYS) * len(_SYNTH_MODIFIERS)} synthetic shortcuts")
+    shortcuts = []
+    for i in range(count):
+        shortcut = {
+            'id': i + 1,
+            'modifiers': _SYNTH_MODIFIERS[i // len(_SYNTH_KEYS)],
+            'key': _SYNTH_KEYS[i % len(_SYNTH_KEYS)],
+        }
+        if i % 7 == 6:
+            shortcut['then'] = [{'modifiers': '', 'key': _LETTERS[i % len(_LETTERS)]}]
+        elif i % 5 == 4:
+            shortcut['trigger'] = hotkey.TRIGGER_RELEASE
+        shortcuts.append(shortcut)
+    return shortcuts
+
+
+class _Synthesizer:
+    def __init__(self, rate, seed):
+        self.rng = random.Random(seed)
+        self.gap = 1.0 / rate
+        # 组合键内部的事件间隔（低速率时也不能超过序列超时和自动重复窗口）
+        self.chord_gap = min(self.gap, 0.05)
+        self.t = 0.0
+        self.events = []
+
+    def emit(self, kind, value, gap=None):
+        self.t += (gap or self.gap) * self.rng.uniform(0.5, 1.5)
+        self.events.append((self.t, kind, value))
+
+    def expect(self, shortcut_id):
+        self.events.append((self.t, EXPECT, shortcut_id))
+
+    def chord(self, modifiers, key, expect=None, on_release=False):
+        """按下修饰键（随机左右）→ 主键（可能带自动重复）→ 逆序释放"""
+        rng = self.rng
+        mods = [rng.choice(_MODIFIER_VARIANTS[name]) for name in modifiers.split('+') if name]
+        key = hotkey.canonical_key(key)
+        for mod in mods:
+            self.emit(PRESS, mod, self.chord_gap)
+        self.emit(PRESS, key, self.chord_gap)
+        if expect is not None and not on_release:
+            self.expect(expect)
+        # 按住不放：自动重复只应触发一次
+        if rng.random() < 0.2:
+            for _ in range(rng.randint(1, 8)):
+                self.emit(PRESS, key, self.chord_gap)
+        self.emit(RELEASE, key, self.chord_gap)
+        if expect is not None and on_release:
+            self.expect(expect)
+        for mod in reversed(mods):
+            self.emit(RELEASE, mod, self.chord_gap)
+
+    def word(self):
+        """一个单词：偶尔大写（Shift）、偶尔数字，相邻按键有时重叠（前一个键还没松开就按下一个）"""
+        rng = self.rng
+        previous = None
+        for _ in range(rng.randint(2, 8)):
+            key = rng.choice(_LETTERS) if rng.random() < 0.95 else rng.choice('0123456789')
+            shift = rng.choice(_MODIFIER_VARIANTS['Shift']) if key.isalpha() and rng.random() < 0.1 else None
+            if previous is not None and (shift or rng.random() < 0.7):
+                self.emit(RELEASE, previous)
+                previous = None
+            if shift:
+                self.emit(PRESS, shift)
+                self.emit(PRESS, key)
+                self.emit(RELEASE, key)
+                self.emit(RELEASE, shift)
+                continue
+            self.emit(PRESS, key)
+            if previous is not None:
+                self.emit(RELEASE, previous)
+            previous = key
+        if previous is not None:
+            self.emit(RELEASE, previous)
+        self.emit(PRESS, 'space')
+        self.emit(RELEASE, 'space')
+
+    def shortcut(self, shortcut):
+        then = shortcut.get('then')
+        on_release = shortcut.get('trigger') == hotkey.TRIGGER_RELEASE
+        if not then:
+            self.chord(shortcut['modifiers'], shortcut['key'], shortcut['id'], on_release)
+            return
+        self.chord(shortcut['modifiers'], shortcut['key'])
+        # 有时只按了序列的第一步就按 Esc 放弃：不应触发
+        if self.rng.random() < 0.1:
+            self.emit(PRESS, 'esc')
+            self.emit(RELEASE, 'esc')
+            return
+        for i, step in enumerate(then):
+            last = i == len(then) - 1
+            self.chord(step.get('modifiers', ''), step['key'], shortcut['id'] if last else None)
+
+
+def synthesize(seconds=10.0, rate=2000, shortcut_count=50, hotkey_ratio=0.1, seed=0):
+    """
+    生成合成按键流：普通打字中穿插快捷键、自动重复、按键序列和松开触发的快捷键
+    Args:
+        seconds: 事件流时长（秒）
+        rate: 平均每秒事件数（按下和释放各算一个）
+        shortcut_count: 快捷键数量
+        hotkey_ratio: 每个输入单元是快捷键（而不是一个单词）的概率
+        seed: 随机种子，相同参数生成相同的事件流
+    Returns:
+        Recording: 包含期望触发的事件流
+    """
+    shortcuts = synthetic_shortcuts(shortcut_count)
+    synth = _Synthesizer(rate, seed)
+    while synth.t < seconds:
+        if synth.rng.random() < hotkey_ratio:
+            synth.shortcut(synth.rng.choice(shortcuts))
+        else:
+            synth.word()
+    return Recording(shortcuts, None, synth.events)
+
+
+# ---- 回放 ----
+
+def _wait_until(deadline):
+    """等到 perf_counter 到达 deadline：较长的等待用 sleep，最后 2 毫秒忙等"""
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return
+        if remaining > 0.002:
+            time.sleep(remaining - 0.002)
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def replay(recording, speed=1.0):
+    """
+    在模拟后端上回放事件流
+    Args:
+        recording: Recording
+        speed: 回放倍速，0 表示不等待、尽快回放
+    Returns:
+        dict: {
+            'events', 'expected', 'matched',
+            'missed': [(t, shortcut_id), ...], 'unexpected': [(t, shortcut_id), ...],
+            'duration', 'wall', 'rate', 'max_lag_ms',
+            'event_ns': {'mean', 'p50', 'p99', 'max'},
+            'input': 按键规范化计数（本次回放的增量）
+        }
+    """
+    desktop = SimulatedDesktop()
+    previous_backend = set_backend(desktop)
+    now = [0.0]
+    previous_clock = hotkey.set_clock(lambda: now[0])
+    fired = []
+    missed = []
+    unexpected = []
+    matched = 0
+    expected_total = 0
+    durations = []
+    max_lag = 0.0
+    perf_ns = time.perf_counter_ns
+    press = desktop.press
+    release = desktop.release
+
+    try:
+        with quiet(), _observe_triggers(fired.append):
+            hotkey.unregister_all()
+            hotkey.reconcile(None, recording.shortcuts)
+            hotkey.activate_profile(recording.profile)
+            input_before = dict(hotkey.get_input_stats())
+
+            wall_start = time.perf_counter()
+            for t, kind, key, expected in recording.steps():
+                if speed:
+                    deadline = wall_start + t / speed
+                    _wait_until(deadline)
+                    max_lag = max(max_lag, time.perf_counter() - deadline)
+                now[0] = t
+                start = perf_ns()
+                if kind == PRESS:
+                    press(key)
+                else:
+                    release(key)
+                durations.append(perf_ns() - start)
+
+                if expected or fired:
+                    expected_total += len(expected)
+                    for shortcut_id in expected:
+                        if shortcut_id in fired:
+                            fired.remove(shortcut_id)
+                            matched += 1
+                        else:
+                            missed.append((t, shortcut_id))
+                    unexpected.extend((t, shortcut_id) for shortcut_id in fired)
+                    fired.clear()
+            wall = time.perf_counter() - wall_start
+
+            input_after = hotkey.get_input_stats()
+            hotkey.unregister_all()
+    finally:
+        hotkey.set_clock(previous_clock)
+        set_backend(previous_backend)
+
+    durations.sort()
+    count = len(durations)
+    return {
+        'events': count,
+        'expected': expected_total,
+        'matched': matched,
+        'missed': missed,
+        'unexpected': unexpected,
+        'duration': recording.duration,
+        'wall': wall,
+        'rate': count / wall if wall else 0.0,
+        'max_lag_ms': max_lag * 1000,
+        'event_ns': {
+            'mean': sum(durations) / count if count else 0,
+            'p50': _percentile(durations, 0.5),
+            'p99': _percentile(durations, 0.99),
+            'max': durations[-1] if durations else 0,
+        },
+        'input': {name: input_after[name] - input_before.get(name, 0) for name in input_after},
+    }
+
+
+def format_report(report, limit=10):
+    """格式化回放报告"""
+    ns = report['event_ns']
+    lines = [
+        f"events      {report['events']} in {report['wall']:.3f}s wall "
+        f"({report['rate']:.0f}/s, recording {report['duration']:.3f}s, max lag {report['max_lag_ms']:.2f} ms)",
+        f"per event   mean {ns['mean']:.0f} ns, p50 {ns['p50']} ns, p99 {ns['p99']} ns, max {ns['max']} ns",
+        f"triggers    {report['matched']}/{report['expected']} matched, "
+        f"{len(report['missed'])} missed, {len(report['unexpected'])} unexpected",
+        "input       " + ", ".join(f"{name} {value}" for name, value in report['input'].items()),
+    ]
+    for label in ('missed', 'unexpected'):
+        for t, shortcut_id in report[label][:limit]:
+            lines.append(f"  {label:<10} id={shortcut_id} at {t:.6f}s")
+        if len(report[label]) > limit:
+            lines.append(f"  ... {len(report[label]) - limit} more {label}")
+    return '\n'.join(lines)
+
+
+def collect(quick=False):
+    """
+    基准套件入口：尽快回放合成打字流
+    Returns:
+        dict: 指标名 -> 纳秒（越小越好）
+    Raises:
+        RuntimeError: 回放结果与期望触发不一致
+    """
+    recording = synthesize(seconds=2.0 if quick else 10.0, rate=5000)
+    report = replay(recording, speed=0)
+    if report['missed'] or report['unexpected']:
+        raise RuntimeError("synthetic replay mismatch:\n" + format_report(report))
+    return {
+        'replay.synthetic.event[mean]': report['event_ns']['mean'],
+        'replay.synthetic.event[p99]': report['event_ns']['p99'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按键录制与回放")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('record', help="用当前配置录制键盘事件")
+    p.add_argument('path')
+    p.add_argument('--duration', type=float, help="录制时长（秒），默认直到 Ctrl+C")
+
+    p = commands.add_parser('synth', help="生成合成按键流")
+    p.add_argument('path')
+    p.add_argument('--seconds', type=float, default=10.0, help="时长（秒）")
+    p.add_argument('--rate', type=float, default=2000, help="每秒事件数")
+    p.add_argument('--shortcuts', type=int, default=50, help="快捷键数量")
+    p.add_argument('--hotkey-ratio', type=float, default=0.1, help="快捷键占输入单元的比例")
+    p.add_argument('--seed', type=int, default=0)
+
+    p = commands.add_parser('replay', help="回放并报告匹配结果")
+    p.add_argument('path')
+    p.add_argument('--speed', type=float, default=1.0, help="回放倍速，0 表示尽快回放")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        print("recording, press Ctrl+C to stop ...", file=sys.stderr)
+        recording = record(args.duration)
+        recording.save(args.path)
+        print(f"{recording.key_event_count()} events written to {args.path}")
+        return 0
+
+    if args.command == 'synth':
+        recording = synthesize(args.seconds, args.rate, args.shortcuts, args.hotkey_ratio, args.seed)
+        recording.save(args.path)
+        print(f"{recording.key_event_count()} events written to {args.path}")
+        return 0
+
+    report = replay(Recording.load(args.path), args.speed)
+    print(format_report(report))
+    return 1 if report['missed'] or report['unexpected'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
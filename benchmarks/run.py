@@ -0,0 +1,153 @@
+"""
+基准套件
+在模拟后端上运行热键、按键回放、窗口、配置和添加对话框的基准，结果写入 JSON 文件并与基线对比
+
+用法:
+    python -m benchmarks.run                      # 运行并与基线对比，有退化时返回 1
+    python -m benchmarks.run --quick              # 缩小规模，用于快速检查
+    python -m benchmarks.run --update-baseline    # 用本次结果覆盖基线
+
+每个基准运行 --repeat 次取中位数，并记录各轮之间的波动（最大值 - 最小值）作为该指标的噪声；
+比基线慢超过 --tolerance 且差值超过噪声（基线和本次中较大的一个）才算退化，
+噪声按指标自身的量级计算，亚微秒级的热路径变慢几倍同样会被发现。
+基线与机器相关，发布前应在同一台机器上重新生成
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from benchmarks import bench_config, bench_gui, bench_hotkey, bench_window, replay
+from benchmarks.timing import quiet
+
+
+SUITES = {
+    'hotkey': bench_hotkey,
+    'replay': replay,
+    'window': bench_window,
+    'config': bench_config,
+    'gui': bench_gui,
+}
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_OUTPUT = 'bench_results.json'
+
+
+def run_suites(names, quick=False, repeat=5):
+    """
+    运行指定的基准
+    Args:
+        names: 基准名列表
+        quick: 是否缩小规模
+        repeat: 每个基准运行的次数，结果取中位数
+    Returns:
+        tuple: (指标名 -> 纳秒, 指标名 -> 各轮之间的波动（纳秒）)
+    """
+    # 各轮交替运行所有基准，一段时间的机器抖动只影响每个指标的一个样本
+    samples = {}
+    for i in range(repeat):
+        for name in names:
+            print(f"running {name} ({i + 1}/{repeat}) ...", file=sys.stderr)
+            with quiet():
+                for metric, value in SUITES[name].collect(quick=quick).items():
+                    samples.setdefault(metric, []).append(value)
+    metrics = {metric: statistics.median(values) for metric, values in samples.items()}
+    noise = {metric: max(values) - min(values) for metric, values in samples.items()}
+    return metrics, noise
+
+
+def compare(metrics, baseline, tolerance, noise=None, baseline_noise=None):
+    """
+    与基线对比
+    Args:
+        metrics: 本次结果
+        baseline: 基线结果
+        tolerance: 允许的相对退化（0.25 表示慢 25% 以内不算退化）
+        noise: 本次各指标的波动（纳秒）
+        baseline_noise: 基线各指标的波动（纳秒）
+    Returns:
+        list: [(指标名, 基线值, 本次值, 比例)]，只包含退化的指标
+    """
+    noise = noise or {}
+    baseline_noise = baseline_noise or {}
+    regressions = []
+    for name, value in metrics.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = value / base
+        # 差值在两次测量的波动范围内时不能确定是退化
+        floor = max(noise.get(name, 0), baseline_noise.get(name, 0))
+        if ratio > 1 + tolerance and value - base > floor:
+            regressions.append((name, base, value, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="window-toggle 基准套件")
+    parser.add_argument('--suite', action='append', choices=sorted(SUITES),
+                        help="只运行指定的基准，可重复")
+    parser.add_argument('--quick', action='store_true', help="缩小规模")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="结果文件")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="基线文件")
+    parser.add_argument('--tolerance', type=float, default=0.35, help="允许的相对退化")
+    parser.add_argument('--repeat', type=int, default=5, help="每个基准运行的次数，取中位数")
+    parser.add_argument('--update-baseline', action='store_true', help="用本次结果覆盖基线")
+    args = parser.parse_args(argv)
+
+    names = args.suite or list(SUITES)
+    metrics, noise = run_suites(names, quick=args.quick, repeat=max(1, args.repeat))
+
+    result = {
+        'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'repeat': max(1, args.repeat),
+        'metrics': metrics,
+        'noise': noise,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+
+    for name, value in metrics.items():
+        print(f"{name:<45} {value:>14.0f} ns")
+    print(f"results written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline, skipping comparison")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('quick') != args.quick:
+        print("baseline was recorded with a different --quick setting, skipping comparison")
+        return 0
+
+    missing = [name for name in metrics if name not in baseline.get('metrics', {})]
+    if missing:
+        print(f"not in baseline (regenerate with --update-baseline): {', '.join(missing)}")
+
+    regressions = compare(metrics, baseline.get('metrics', {}), args.tolerance, noise, baseline.get('noise'))
+    if not regressions:
+        print(f"no regressions (tolerance {args.tolerance:.0%}, beyond per-metric noise)")
+        return 0
+
+    print("REGRESSIONS:")
+    for name, base, value, ratio in regressions:
+        print(f"  {name:<45} {base:>12.0f} -> {value:>12.0f} ns  (x{ratio:.2f})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
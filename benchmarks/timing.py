@@ -0,0 +1,34 @@
+"""
+基准计时工具
+"""
+import contextlib
+import io
+import time
+
+
+def per_call_ns(func, number, repeat=5):
+    """
+    多轮调用 func，取最快一轮的平均单次耗时
+    Args:
+        func: 无参函数
+        number: 每轮调用次数
+        repeat: 轮数
+    Returns:
+        float: 单次耗时（纳秒）
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter_ns() - start) / number
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+@contextlib.contextmanager
+def quiet():
+    """屏蔽被测代码的 print 输出"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
@@ -0,0 +1,45 @@
+"""
+平台后端
+Windows 下默认使用 Win32 + pynput，其他平台默认使用内存模拟桌面
+"""
+import sys
+
+from core.backend.base import (
+    KeyboardSource, WindowBackend,
+    SW_HIDE, SW_SHOWNORMAL, SW_SHOWMINIMIZED, SW_SHOWMAXIMIZED,
+    SW_SHOW, SW_MINIMIZE, SW_RESTORE,
+)
+
+
+_backend = None
+
+
+def get_backend():
+    """
+    获取当前平台后端（首次调用时按平台创建）
+    Returns:
+        WindowBackend: 后端实例
+    """
+    global _backend
+    if _backend is None:
+        if sys.platform == 'win32':
+            from core.backend.win32 import Win32Backend
+            _backend = Win32Backend()
+        else:
+            from core.backend.simulated import SimulatedDesktop
+            _backend = SimulatedDesktop()
+    return _backend
+
+
+def set_backend(backend):
+    """
+    替换平台后端（测试和基准使用模拟桌面）
+    Args:
+        backend: WindowBackend 实例
+    Returns:
+        WindowBackend: 之前的后端
+    """
+    global _backend
+    previous = _backend
+    _backend = backend
+    return previous
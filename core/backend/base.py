@@ -0,0 +1,129 @@
+"""
+平台后端接口
+窗口查询/操作和键盘事件源都通过后端完成，core/ 下的模块不直接依赖 Win32 或 pynput
+"""
+
+# ShowWindow / GetWindowPlacement 使用的显示命令（与 win32con 取值一致）
+SW_HIDE = 0
+SW_SHOWNORMAL = 1
+SW_SHOWMINIMIZED = 2
+SW_SHOWMAXIMIZED = 3
+SW_SHOW = 5
+SW_MINIMIZE = 6
+SW_RESTORE = 9
+
+
+class KeyboardSource:
+    """
+    键盘事件源接口
+    start() 之后每次按键调用 on_press(key_name)，释放调用 on_release(key_name)。
+    key_name 为规范化键名：字符键为小写字符，其他键为 pynput 的 Key 名称
+    （如 "f1"、"ctrl_l"、"shift_r"、"cmd"），无法识别的键为 None
+    """
+
+    def __init__(self, on_press, on_release):
+        self.on_press = on_press
+        self.on_release = on_release
+
+    def start(self):
+        """开始投递按键事件"""
+        raise NotImplementedError
+
+    def stop(self):
+        """停止投递按键事件"""
+        raise NotImplementedError
+
+
+class WindowBackend:
+    """窗口查询和操作接口"""
+
+    def enumerate_windows(self):
+        """
+        按 z-order 枚举所有顶层窗口
+        Returns:
+            list: 窗口句柄列表
+        """
+        raise NotImplementedError
+
+    def is_window(self, hwnd):
+        """窗口是否存在"""
+        raise NotImplementedError
+
+    def is_window_visible(self, hwnd):
+        """窗口是否可见（WS_VISIBLE）"""
+        raise NotImplementedError
+
+    def is_iconic(self, hwnd):
+        """窗口是否最小化"""
+        raise NotImplementedError
+
+    def get_window_text(self, hwnd):
+        """窗口标题"""
+        raise NotImplementedError
+
+    def get_class_name(self, hwnd):
+        """窗口类名"""
+        raise NotImplementedError
+
+    def get_window_pid(self, hwnd):
+        """窗口所属进程 ID"""
+        raise NotImplementedError
+
+    def get_process_path(self, pid):
+        """
+        进程的可执行文件路径
+        Returns:
+            str or None: 无法获取时返回 None
+        """
+        return None
+
+    def get_show_cmd(self, hwnd):
+        """窗口当前的显示状态（GetWindowPlacement 的 showCmd）"""
+        raise NotImplementedError
+
+    def show_window(self, hwnd, cmd):
+        """按显示命令改变窗口状态（ShowWindow）"""
+        raise NotImplementedError
+
+    def set_foreground_window(self, hwnd):
+        """把窗口切换到前台"""
+        raise NotImplementedError
+
+    def show_windows(self, hwnds, cmd):
+        """
+        对一组窗口执行同一个显示命令
+        默认逐个调用 show_window，平台后端可以改为异步批量执行
+        """
+        for hwnd in hwnds:
+            self.show_window(hwnd, cmd)
+
+    def bring_to_front(self, hwnds):
+        """
+        把一组窗口作为整体放到最前，hwnds[0] 在最上层并成为前台窗口
+        """
+        for hwnd in reversed(hwnds):
+            self.set_foreground_window(hwnd)
+
+    def window_event_source(self):
+        """
+        创建窗口事件源
+        Returns:
+            WindowEventSource or None: 不支持时返回 None（注册表只做定期同步）
+        """
+        return None
+
+    def keyboard_source(self, on_press, on_release):
+        """
+        创建键盘事件源
+        Returns:
+            KeyboardSource: 键盘事件源
+        """
+        raise NotImplementedError
+
+    def get_modifier_state(self):
+        """
+        查询键盘上当前真正按下的修饰键（用于纠正漏掉释放事件的修饰键状态）
+        Returns:
+            set or None: 修饰键名集合（'Ctrl'、'Alt'、'Shift'、'Win'），不支持时返回 None
+        """
+        return None
@@ -0,0 +1,43 @@
+"""
+基于 pynput 的键盘事件源
+"""
+from pynput import keyboard
+
+from core.backend.base import KeyboardSource
+
+
+def key_name(key):
+    """
+    获取 pynput 按键对象的规范化键名
+    Args:
+        key: pynput 的 Key 或 KeyCode
+    Returns:
+        str or None: 键名
+    """
+    try:
+        name = key.char
+    except AttributeError:
+        name = key.name
+    return name.lower() if name else None
+
+
+class PynputKeyboardSource(KeyboardSource):
+    """全局键盘钩子（pynput.keyboard.Listener）"""
+
+    def __init__(self, on_press, on_release):
+        super().__init__(on_press, on_release)
+        self._listener = None
+
+    def start(self):
+        if self._listener is not None:
+            return
+        self._listener = keyboard.Listener(
+            on_press=lambda key: self.on_press(key_name(key)),
+            on_release=lambda key: self.on_release(key_name(key))
+        )
+        self._listener.start()
+
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
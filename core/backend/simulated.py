@@ -0,0 +1,278 @@
+"""
+内存模拟桌面
+纯 Python 实现的窗口和键盘后端，用于在非 Windows 环境测试和测量热路径
+"""
+import collections
+import random
+
+from core.backend.base import (
+    KeyboardSource, WindowBackend,
+    SW_HIDE, SW_SHOWNORMAL, SW_SHOWMINIMIZED, SW_SHOWMAXIMIZED,
+    SW_MINIMIZE, SW_RESTORE,
+)
+from core.registry import (
+    ScriptedEventSource,
+    EVENT_CREATE, EVENT_DESTROY, EVENT_RENAME, EVENT_SHOW, EVENT_HIDE,
+)
+
+
+# populate() 默认使用的窗口类名
+DEFAULT_CLASSES = (
+    'Chrome_WidgetWin_1', 'CASCADIA_HOSTING_WINDOW_CLASS', 'Notepad',
+    'CabinetWClass', 'MozillaWindowClass', 'SunAwtFrame', 'ConsoleWindowClass',
+    'XLMAIN', 'OpusApp', 'PPTFrameClass',
+)
+
+
+class SimWindow:
+    """模拟窗口"""
+    __slots__ = ('hwnd', 'title', 'class_name', 'pid', 'visible', 'show_cmd', 'restore_cmd')
+
+    def __init__(self, hwnd, title, class_name, pid, visible, show_cmd):
+        self.hwnd = hwnd
+        self.title = title
+        self.class_name = class_name
+        self.pid = pid
+        self.visible = visible
+        self.show_cmd = show_cmd
+        # 最小化前的状态，恢复时回到该状态
+        self.restore_cmd = SW_SHOWNORMAL if show_cmd == SW_SHOWMINIMIZED else show_cmd
+
+
+class SimulatedKeyboard(KeyboardSource):
+    """模拟键盘事件源，事件由 SimulatedDesktop.press()/release() 注入"""
+
+    def __init__(self, desktop, on_press, on_release):
+        super().__init__(on_press, on_release)
+        self.desktop = desktop
+
+    def start(self):
+        if self not in self.desktop.keyboards:
+            self.desktop.keyboards.append(self)
+
+    def stop(self):
+        if self in self.desktop.keyboards:
+            self.desktop.keyboards.remove(self)
+
+
+class SimulatedDesktop(WindowBackend):
+    """
+    模拟桌面
+    维护窗口的类名、标题、显示状态和 z-order，所有修改都会产生对应的窗口事件
+    """
+
+    def __init__(self):
+        self._windows = {}
+        # z-order，下标 0 为最上层
+        self._z_order = []
+        self._next_hwnd = 0x10000
+        # 进程 ID -> 可执行文件路径
+        self.processes = {}
+        self.foreground = None
+        self.events = ScriptedEventSource()
+        self.keyboards = []
+        # 键盘上当前按下的键（包括漏掉释放事件的键）
+        self.held_keys = set()
+        # 每个后端方法的调用次数，用于对比不同实现的 API 调用量
+        self.calls = collections.Counter()
+
+    # ---- 构造桌面 ----
+
+    def create_window(self, title, class_name, pid=1000, visible=True, show_cmd=SW_SHOWNORMAL, exe=None):
+        """
+        创建一个窗口（放在 z-order 最上层）
+        Args:
+            exe: 进程的可执行文件路径，默认按 pid 生成
+        Returns:
+            int: 窗口句柄
+        """
+        if exe is not None or pid not in self.processes:
+            self.processes[pid] = exe or f"C:\\Program Files\\App{pid}\\app{pid}.exe"
+        hwnd = self._next_hwnd
+        self._next_hwnd += 4
+        self._windows[hwnd] = SimWindow(hwnd, title, class_name, pid, visible, show_cmd)
+        self._z_order.insert(0, hwnd)
+        self.events.emit(EVENT_CREATE, hwnd)
+        return hwnd
+
+    def destroy_window(self, hwnd):
+        """销毁窗口"""
+        if self._windows.pop(hwnd, None) is None:
+            return
+        self._z_order.remove(hwnd)
+        if self.foreground == hwnd:
+            self.foreground = None
+        self.events.emit(EVENT_DESTROY, hwnd)
+
+    def set_title(self, hwnd, title):
+        """修改窗口标题"""
+        self._windows[hwnd].title = title
+        self.events.emit(EVENT_RENAME, hwnd)
+
+    def populate(self, count, classes=DEFAULT_CLASSES, processes=50, seed=0):
+        """
+        批量创建合成窗口
+        Args:
+            count: 窗口数量
+            classes: 可选的窗口类名
+            processes: 进程数量
+            seed: 随机种子，保证结果可复现
+        Returns:
+            list: 新建窗口的句柄
+        """
+        rng = random.Random(seed)
+        states = (SW_SHOWNORMAL, SW_SHOWNORMAL, SW_SHOWMAXIMIZED, SW_SHOWMINIMIZED)
+        handles = []
+        for i in range(count):
+            class_name = rng.choice(classes)
+            handles.append(self.create_window(
+                title=f"{class_name} window {i}",
+                class_name=class_name,
+                pid=1000 + rng.randrange(processes),
+                # 少量隐藏窗口，模拟真实桌面上的工具窗口
+                visible=rng.random() > 0.05,
+                show_cmd=rng.choice(states),
+            ))
+        return handles
+
+    def window(self, hwnd):
+        """
+        获取模拟窗口对象
+        Returns:
+            SimWindow or None
+        """
+        return self._windows.get(hwnd)
+
+    # ---- WindowBackend ----
+
+    def enumerate_windows(self):
+        self.calls['enumerate_windows'] += 1
+        return list(self._z_order)
+
+    def is_window(self, hwnd):
+        self.calls['is_window'] += 1
+        return hwnd in self._windows
+
+    def is_window_visible(self, hwnd):
+        self.calls['is_window_visible'] += 1
+        w = self._windows.get(hwnd)
+        return bool(w and w.visible)
+
+    def is_iconic(self, hwnd):
+        self.calls['is_iconic'] += 1
+        w = self._windows.get(hwnd)
+        return bool(w and w.show_cmd == SW_SHOWMINIMIZED)
+
+    def get_window_text(self, hwnd):
+        self.calls['get_window_text'] += 1
+        w = self._windows.get(hwnd)
+        return w.title if w else ''
+
+    def get_class_name(self, hwnd):
+        self.calls['get_class_name'] += 1
+        w = self._windows.get(hwnd)
+        return w.class_name if w else ''
+
+    def get_window_pid(self, hwnd):
+        self.calls['get_window_pid'] += 1
+        w = self._windows.get(hwnd)
+        return w.pid if w else 0
+
+    def get_process_path(self, pid):
+        self.calls['get_process_path'] += 1
+        return self.processes.get(pid)
+
+    def get_show_cmd(self, hwnd):
+        self.calls['get_show_cmd'] += 1
+        return self._windows[hwnd].show_cmd
+
+    def show_window(self, hwnd, cmd):
+        self.calls['show_window'] += 1
+        w = self._windows.get(hwnd)
+        if w is None:
+            return
+        if cmd == SW_HIDE:
+            if w.visible:
+                w.visible = False
+                self.events.emit(EVENT_HIDE, hwnd)
+            return
+        if cmd == SW_MINIMIZE or cmd == SW_SHOWMINIMIZED:
+            if w.show_cmd != SW_SHOWMINIMIZED:
+                w.restore_cmd = w.show_cmd
+            w.show_cmd = SW_SHOWMINIMIZED
+        elif cmd == SW_RESTORE:
+            if w.show_cmd == SW_SHOWMINIMIZED:
+                w.show_cmd = w.restore_cmd
+            else:
+                w.show_cmd = SW_SHOWNORMAL
+        elif cmd == SW_SHOWMAXIMIZED or cmd == SW_SHOWNORMAL:
+            w.show_cmd = cmd
+        if not w.visible:
+            w.visible = True
+            self.events.emit(EVENT_SHOW, hwnd)
+
+    def set_foreground_window(self, hwnd):
+        self.calls['set_foreground_window'] += 1
+        if hwnd not in self._windows:
+            return
+        self._z_order.remove(hwnd)
+        self._z_order.insert(0, hwnd)
+        self.foreground = hwnd
+
+    def bring_to_front(self, hwnds):
+        self.calls['bring_to_front'] += 1
+        present = [h for h in hwnds if h in self._windows]
+        if not present:
+            return
+        moved = set(present)
+        self._z_order = present + [h for h in self._z_order if h not in moved]
+        self.foreground = present[0]
+
+    def window_event_source(self):
+        return self.events
+
+    def keyboard_source(self, on_press, on_release):
+        return SimulatedKeyboard(self, on_press, on_release)
+
+    # ---- 键盘注入 ----
+
+    def press(self, key_name):
+        """注入按键按下事件（按住时重复调用即为自动重复）"""
+        key_name = key_name.lower() if key_name else key_name
+        self.held_keys.add(key_name)
+        for source in list(self.keyboards):
+            source.on_press(key_name)
+
+    def release(self, key_name, deliver=True):
+        """
+        注入按键释放事件
+        Args:
+            key_name: 键名
+            deliver: False 时只改变键盘状态、不投递事件（模拟锁屏或 UAC 提示时丢失的释放事件）
+        """
+        key_name = key_name.lower() if key_name else key_name
+        self.held_keys.discard(key_name)
+        if not deliver:
+            return
+        for source in list(self.keyboards):
+            source.on_release(key_name)
+
+    # 键名前缀 -> 修饰键名
+    _MODIFIER_PREFIXES = (('ctrl', 'Ctrl'), ('alt', 'Alt'), ('shift', 'Shift'), ('cmd', 'Win'))
+
+    def get_modifier_state(self):
+        return {
+            name for prefix, name in self._MODIFIER_PREFIXES
+            if any(key and key.startswith(prefix) for key in self.held_keys)
+        }
+
+    def tap(self, chord):
+        """
+        注入一次完整的组合键，如 "ctrl_l+alt_l+f1"
+        修饰键按顺序按下，主键按下并释放后修饰键逆序释放
+        """
+        keys = chord.split('+')
+        for key in keys:
+            self.press(key)
+        for key in reversed(keys):
+            self.release(key)
@@ -0,0 +1,128 @@
+"""
+Win32 平台后端
+"""
+import ctypes
+import ctypes.wintypes
+
+import pywintypes
+import win32gui
+import win32process
+
+from core.backend.base import WindowBackend
+
+
+class Win32Backend(WindowBackend):
+    """使用 pywin32 操作真实窗口，pynput 监听键盘"""
+
+    def enumerate_windows(self):
+        handles = []
+        win32gui.EnumWindows(lambda hwnd, _: handles.append(hwnd) or True, None)
+        return handles
+
+    def is_window(self, hwnd):
+        return bool(win32gui.IsWindow(hwnd))
+
+    def is_window_visible(self, hwnd):
+        return bool(win32gui.IsWindowVisible(hwnd))
+
+    def is_iconic(self, hwnd):
+        return bool(win32gui.IsIconic(hwnd))
+
+    def get_window_text(self, hwnd):
+        return win32gui.GetWindowText(hwnd)
+
+    def get_class_name(self, hwnd):
+        return win32gui.GetClassName(hwnd)
+
+    def get_window_pid(self, hwnd):
+        return win32process.GetWindowThreadProcessId(hwnd)[1]
+
+    def get_process_path(self, pid):
+        # PROCESS_QUERY_LIMITED_INFORMATION 对提升权限的进程也能打开，
+        # 但只够 QueryFullProcessImageNameW 使用（GetModuleFileNameEx 还需要 PROCESS_VM_READ）
+        kernel32 = ctypes.windll.kernel32
+        kernel32.OpenProcess.restype = ctypes.wintypes.HANDLE
+        kernel32.OpenProcess.argtypes = [ctypes.wintypes.DWORD, ctypes.wintypes.BOOL, ctypes.wintypes.DWORD]
+        kernel32.QueryFullProcessImageNameW.argtypes = [
+            ctypes.wintypes.HANDLE, ctypes.wintypes.DWORD,
+            ctypes.wintypes.LPWSTR, ctypes.POINTER(ctypes.wintypes.DWORD)
+        ]
+        kernel32.CloseHandle.argtypes = [ctypes.wintypes.HANDLE]
+
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return None
+        try:
+            size = ctypes.wintypes.DWORD(32768)
+            buffer = ctypes.create_unicode_buffer(size.value)
+            if not kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)):
+                return None
+            return buffer.value
+        finally:
+            kernel32.CloseHandle(handle)
+
+    def get_show_cmd(self, hwnd):
+        # placement[0] = flags, placement[1] = showCmd
+        return win32gui.GetWindowPlacement(hwnd)[1]
+
+    def show_window(self, hwnd, cmd):
+        win32gui.ShowWindow(hwnd, cmd)
+
+    def set_foreground_window(self, hwnd):
+        win32gui.SetForegroundWindow(hwnd)
+
+    def show_windows(self, hwnds, cmd):
+        # ShowWindowAsync 只投递消息不等待目标窗口处理，多个窗口的动画同时进行
+        user32 = ctypes.windll.user32
+        for hwnd in hwnds:
+            user32.ShowWindowAsync(hwnd, cmd)
+
+    def bring_to_front(self, hwnds):
+        if not hwnds:
+            return
+        user32 = ctypes.windll.user32
+        user32.BeginDeferWindowPos.restype = ctypes.c_void_p
+        user32.DeferWindowPos.restype = ctypes.c_void_p
+        user32.DeferWindowPos.argtypes = [
+            ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p,
+            ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_uint
+        ]
+        user32.EndDeferWindowPos.argtypes = [ctypes.c_void_p]
+
+        # 一次 DeferWindowPos 调整整组的 z-order：hwnds[0] 置顶，其余依次排在它下面
+        flags = 0x0001 | 0x0002 | 0x0010  # SWP_NOSIZE | SWP_NOMOVE | SWP_NOACTIVATE
+        hdwp = user32.BeginDeferWindowPos(len(hwnds))
+        insert_after = 0  # HWND_TOP
+        for hwnd in hwnds:
+            if hdwp:
+                hdwp = user32.DeferWindowPos(hdwp, hwnd, insert_after, 0, 0, 0, 0, flags)
+            insert_after = hwnd
+        if hdwp:
+            user32.EndDeferWindowPos(hdwp)
+        try:
+            win32gui.SetForegroundWindow(hwnds[0])
+        except pywintypes.error:
+            pass
+
+    def window_event_source(self):
+        from core.registry import WinEventHookSource
+        return WinEventHookSource()
+
+    def keyboard_source(self, on_press, on_release):
+        from core.backend.pynput_source import PynputKeyboardSource
+        return PynputKeyboardSource(on_press, on_release)
+
+    # 修饰键名 -> 虚拟键码（VK_CONTROL, VK_MENU, VK_SHIFT, VK_LWIN/VK_RWIN）
+    _MODIFIER_VKS = (
+        ('Ctrl', (0x11,)),
+        ('Alt', (0x12,)),
+        ('Shift', (0x10,)),
+        ('Win', (0x5B, 0x5C)),
+    )
+
+    def get_modifier_state(self):
+        user32 = ctypes.windll.user32
+        return {
+            name for name, vks in self._MODIFIER_VKS
+            if any(user32.GetAsyncKeyState(vk) & 0x8000 for vk in vks)
+        }
@@ -1,14 +1,36 @@
 """
 配置管理模块
 负责配置文件的读取、保存、添加和删除快捷键
+
+配置结构:
+    shortcuts       快捷键列表，带 profile 字段的快捷键只在该配置方案启用时生效
+    profiles        配置方案名列表
+    active_profile  当前配置方案，没有或为 null 时只启用公共快捷键
+    next_id         下一个快捷键 ID
+    journal_generation  快照的代数，与变更日志头中的代数相同时日志属于这份快照
+
+config.json 是快照，之后的每次修改以一行 JSON 追加到旁边的 config.json.journal，
+启动时读取快照再重放日志；日志超过 JOURNAL_COMPACT_BYTES 后在后台合并为新快照。
+每次写快照代数加一，日志头记录它所属的代数：写完快照、替换日志之前崩溃时，
+旧日志的代数小于快照，说明其中的修改已经在快照里，不再重放
 """
 import json
 import os
+import tempfile
+import threading
+
+from utils.logger import get_logger
+
+log = get_logger("config")
 
-# 配置文件路径
-CONFIG_DIR = os.path.join(os.getenv('APPDATA'), 'window-toggle-win')
+# 配置文件路径（非 Windows 环境下没有 APPDATA，退回到 ~/.config）
+CONFIG_DIR = os.path.join(os.getenv('APPDATA') or os.path.expanduser('~/.config'), 'window-toggle-win')
 CONFIG_FILE = os.path.join(CONFIG_DIR, 'config.json')
 
+# 变更日志文件后缀及触发合并的大小
+JOURNAL_SUFFIX = '.journal'
+JOURNAL_COMPACT_BYTES = 64 * 1024
+
 
 def ensure_config_dir():
     """确保配置目录存在"""
@@ -16,18 +38,727 @@ def ensure_config_dir():
         os.makedirs(CONFIG_DIR)
 
 
+# 快捷键变化事件
+EVENT_ADD = 'add'
+EVENT_REMOVE = 'remove'
+EVENT_UPDATE = 'update'
+# 当前配置方案变化，事件数据为 {'active_profile': 方案名}
+EVENT_PROFILE = 'profile'
+
+
+def diff_shortcuts(old_by_id, new_by_id):
+    """
+    比较两组快捷键
+    Args:
+        old_by_id: {id: shortcut}
+        new_by_id: {id: shortcut}
+    Returns:
+        list: [(event, shortcut), ...]，删除事件带旧配置，新增/修改事件带新配置
+    """
+    events = [(EVENT_REMOVE, s) for i, s in old_by_id.items() if i not in new_by_id]
+    for i, s in new_by_id.items():
+        old = old_by_id.get(i)
+        if old is None:
+            events.append((EVENT_ADD, s))
+        elif old != s:
+            events.append((EVENT_UPDATE, s))
+    return events
+
+
+def _apply_op(data, by_id, op):
+    """
+    把一条变更日志应用到配置数据上（原地修改）
+    Args:
+        data: 配置数据
+        by_id: data 中快捷键的 ID 索引，同步更新
+        op: 日志记录，op 字段为 add / remove / update / batch / profile
+    Returns:
+        list: 产生的变化事件 [(event, shortcut), ...]
+    Raises:
+        ValueError: 未知的日志记录
+    """
+    kind = op.get('op')
+    events = []
+    if kind in ('remove', 'batch'):
+        ids = [op['id']] if kind == 'remove' else op.get('remove', [])
+        removed = [i for i in dict.fromkeys(ids) if i in by_id]
+        if removed:
+            removed_set = set(removed)
+            data['shortcuts'] = [s for s in data['shortcuts'] if s.get('id') not in removed_set]
+            events.extend((EVENT_REMOVE, by_id.pop(i)) for i in removed)
+    if kind in ('add', 'batch'):
+        adds = [op['shortcut']] if kind == 'add' else op.get('add', [])
+        for shortcut in adds:
+            shortcut = dict(shortcut)
+            data['shortcuts'].append(shortcut)
+            by_id[shortcut['id']] = shortcut
+            data['next_id'] = max(data.get('next_id', 1), shortcut['id'] + 1)
+            events.append((EVENT_ADD, shortcut))
+    elif kind == 'update':
+        shortcut = dict(op['shortcut'])
+        shortcut_id = shortcut.get('id')
+        if shortcut_id in by_id:
+            data['shortcuts'] = [shortcut if s.get('id') == shortcut_id else s for s in data['shortcuts']]
+            by_id[shortcut_id] = shortcut
+            events.append((EVENT_UPDATE, shortcut))
+    elif kind == 'profile':
+        profile = op.get('value')
+        data['active_profile'] = profile
+        if profile and profile not in data.setdefault('profiles', []):
+            data['profiles'].append(profile)
+        events.append((EVENT_PROFILE, {'active_profile': profile}))
+    elif kind not in ('remove', 'batch'):
+        raise ValueError(f"Unknown journal op: {kind}")
+    return events
+
+
+def _rebase_op(data, by_id, op):
+    """
+    把基于旧快照的日志记录改写为能应用到新快照上的记录
+    新快照中已有完全相同的快捷键时跳过添加；ID 已被外部修改占用时分配新 ID
+    Args:
+        data: 新快照的配置数据
+        by_id: data 中快捷键的 ID 索引
+        op: 日志记录
+    Returns:
+        dict: 改写后的日志记录
+    """
+    kind = op.get('op')
+    if kind not in ('add', 'batch'):
+        return op
+    adds = [op['shortcut']] if kind == 'add' else op.get('add', [])
+    next_id = max([data.get('next_id', 1)] + [s['id'] + 1 for s in adds])
+    rebased = []
+    for shortcut in adds:
+        existing = by_id.get(shortcut['id'])
+        if existing == shortcut:
+            continue
+        if existing is not None:
+            log.warning("快捷键 ID %s 已被外部修改占用，改为 %s", shortcut['id'], next_id)
+            shortcut = dict(shortcut, id=next_id)
+            next_id += 1
+        rebased.append(shortcut)
+    if kind == 'add':
+        return {'op': 'batch', 'add': rebased}
+    return dict(op, add=rebased)
+
+
+def validate_shortcut(s):
+    """
+    检查单个快捷键中目标配置的结构（不检查 ID）
+    Args:
+        s: 快捷键字典
+    Raises:
+        ValueError: 结构不正确
+    """
+    if not isinstance(s, dict):
+        raise ValueError(f"shortcut must be an object: {s!r}")
+    shortcut_id = s.get('id')
+    if not isinstance(s.get('then', []), list):
+        raise ValueError(f"then must be a list of steps: {shortcut_id}")
+    for field in ('window_title', 'window_class', 'process_name'):
+        if s.get(field) is not None and not isinstance(s[field], str):
+            raise ValueError(f"{field} must be a string: {shortcut_id}")
+    if s.get('title_rule') is not None and not isinstance(s['title_rule'], (str, dict)):
+        raise ValueError(f"title_rule must be a string or an object: {shortcut_id}")
+    group = s.get('group')
+    if group is not None and not isinstance(group, dict):
+        raise ValueError(f"group must be an object: {shortcut_id}")
+
+
+def validate_config(data):
+    """
+    检查配置数据的结构
+    Args:
+        data: 解析后的配置
+    Raises:
+        ValueError: 结构不正确
+    """
+    if not isinstance(data, dict):
+        raise ValueError("config must be a JSON object")
+    shortcuts = data.get('shortcuts', [])
+    if not isinstance(shortcuts, list):
+        raise ValueError("shortcuts must be a list")
+    seen = set()
+    for s in shortcuts:
+        validate_shortcut(s)
+        shortcut_id = s.get('id')
+        if not isinstance(shortcut_id, int) or isinstance(shortcut_id, bool):
+            raise ValueError(f"shortcut id must be an integer: {shortcut_id!r}")
+        if shortcut_id in seen:
+            raise ValueError(f"duplicate shortcut id: {shortcut_id}")
+        seen.add(shortcut_id)
+    if not isinstance(data.get('profiles', []), list):
+        raise ValueError("profiles must be a list")
+
+
+def _ensure_next_id(data):
+    """
+    读取或保存时校正 ID 计数器（只在这时扫描一次）
+    旧版本配置没有计数器；手动编辑的文件可能加入了比计数器更大的 ID
+    """
+    existing_ids = [s.get('id') for s in data['shortcuts'] if isinstance(s.get('id'), int)]
+    floor = max(existing_ids) + 1 if existing_ids else 1
+    data['next_id'] = max(data.get('next_id', 1), floor)
+
+
+def _copy_data(data):
+    """复制配置数据，调用方修改返回值不会影响内存中的状态"""
+    copied = dict(data)
+    copied['shortcuts'] = [dict(s) for s in data['shortcuts']]
+    return copied
+
+
+class ConfigStore:
+    """
+    内存配置存储
+    解析后的配置常驻内存并按 ID 建立索引，只有文件的 mtime/size 变化时才重新读取。
+    每次修改只向变更日志追加一行，写入量与配置大小无关；快照先写临时文件再替换，
+    日志最后一行写到一半崩溃时重放会跳过它，都不会损坏已有配置。
+    日志第一行记录它所基于的快照的 (mtime_ns, size)，快照在外部被修改过时旧日志不再重放。
+    快捷键的增删改（包括外部修改文件后重新读取）会通知订阅者
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: 配置文件路径，默认为 CONFIG_FILE
+        """
+        self.path = path or CONFIG_FILE
+        self.journal_path = self.path + JOURNAL_SUFFIX
+        self.compact_bytes = JOURNAL_COMPACT_BYTES
+        self._lock = threading.RLock()
+        self._data = None
+        self._by_id = {}
+        # 上次读取/写入时 (快照, 日志) 的 (mtime_ns, size)
+        self._stamp = None
+        # 日志不能继续追加（快照在外部被修改过或最后一行不完整），下次修改前先写新快照
+        self._journal_stale = False
+        self._compacting = False
+        self.read_count = 0
+        self.reject_count = 0
+        self.write_count = 0
+        self.append_count = 0
+        self.compact_count = 0
+        # 订阅者和尚未通知的事件
+        self._listeners = []
+        self._pending_events = []
+
+    def subscribe(self, listener, batch=False):
+        """
+        订阅快捷键变化
+        Args:
+            listener: 回调 listener(event, shortcut)，event 为 EVENT_ADD / EVENT_REMOVE / EVENT_UPDATE，
+                      在修改配置的线程中调用
+            batch: 为 True 时一次修改（包括重新读取文件）产生的所有事件合并为一次调用
+                   listener([(event, shortcut), ...])
+        """
+        with self._lock:
+            self._listeners.append((listener, batch))
+
+    def unsubscribe(self, listener):
+        """取消订阅"""
+        with self._lock:
+            self._listeners = [entry for entry in self._listeners if entry[0] != listener]
+
+    def _flush_events(self):
+        """在锁外通知订阅者"""
+        with self._lock:
+            if not self._pending_events:
+                return
+            events, self._pending_events = self._pending_events, []
+            listeners = list(self._listeners)
+        for listener, batch in listeners:
+            if batch:
+                calls = [([(event, dict(shortcut)) for event, shortcut in events],)]
+            else:
+                calls = [(event, dict(shortcut)) for event, shortcut in events]
+            for args in calls:
+                try:
+                    listener(*args)
+                except Exception as e:
+                    log.error("通知配置变化失败: %s", e)
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _file_stamp(self):
+        return (self._stat(self.path), self._stat(self.journal_path))
+
+    def _set_data(self, data, stamp):
+        data.setdefault('shortcuts', [])
+        by_id = {s.get('id'): s for s in data['shortcuts']}
+        _ensure_next_id(data)
+        if self._data is not None and self._listeners:
+            self._pending_events.extend(diff_shortcuts(self._by_id, by_id))
+            active = data.get('active_profile')
+            if active != self._data.get('active_profile'):
+                self._pending_events.append((EVENT_PROFILE, {'active_profile': active}))
+        self._data = data
+        self._by_id = by_id
+        self._stamp = stamp
+
+    def _read_journal(self, snapshot_stamp, snapshot_generation):
+        """
+        读取变更日志
+        Args:
+            snapshot_stamp: 快照的 (mtime_ns, size)
+            snapshot_generation: 快照的代数，没有时为 None
+        Returns:
+            tuple: (日志记录, 日志能否继续追加, 日志是否基于旧快照)，日志头损坏时记录为 None
+        """
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                lines = f.read().split('\n')
+        except FileNotFoundError:
+            return [], True, False
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return None, False, False
+        generation = header.get('generation')
+        if generation is not None and snapshot_generation is not None and generation < snapshot_generation:
+            # 上次写快照后没来得及替换日志：日志中的修改已经包含在快照里
+            log.warning("变更日志属于更早的快照（代数 %s < %s），已忽略", generation, snapshot_generation)
+            return [], False, False
+        # 快照在外部被修改过：日志中的修改还没有进入新快照，需要合并过去
+        orphaned = header.get('snapshot') != (list(snapshot_stamp) if snapshot_stamp else None)
+
+        ops = []
+        for number, line in enumerate(lines[1:], 2):
+            if not line.strip():
+                continue
+            try:
+                ops.append(json.loads(line))
+            except ValueError:
+                # 只可能是最后一行写到一半，之后的记录不可信；不能再往后追加
+                log.warning("变更日志第 %d 行不完整，已忽略", number)
+                return ops, False, orphaned
+        return ops, not orphaned, orphaned
+
+    def _parse(self, stamp):
+        """
+        读取快照并重放日志（不修改内存状态，可以在锁外调用）
+        Args:
+            stamp: 读取前的 _file_stamp()
+        Returns:
+            tuple: (配置数据, 日志能否继续追加, 是否合并了基于旧快照的日志)
+        Raises:
+            ValueError: 配置文件格式错误
+        """
+        snapshot_stamp = stamp[0]
+        if snapshot_stamp is None:
+            data = {"shortcuts": []}
+        else:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                data = {"shortcuts": []}
+        validate_config(data)
+
+        generation = data.get('journal_generation')
+        if not isinstance(generation, int) or isinstance(generation, bool):
+            generation = None
+        ops, appendable, orphaned = self._read_journal(snapshot_stamp, generation)
+        if ops is None:
+            log.warning("变更日志头损坏，已忽略")
+            ops = []
+        rebase = orphaned and bool(ops)
+        if rebase:
+            log.warning("配置文件已在外部修改，把 %d 条未合并的变更合并到新配置中", len(ops))
+        data.setdefault('shortcuts', [])
+        _ensure_next_id(data)
+        by_id = {s.get('id'): s for s in data['shortcuts']}
+        for op in ops:
+            try:
+                _apply_op(data, by_id, _rebase_op(data, by_id, op) if rebase else op)
+            except (KeyError, TypeError, ValueError) as e:
+                log.warning("跳过无效的变更日志记录 %r: %s", op, e)
+        return data, appendable, rebase
+
+    def _apply_parsed(self, parsed, stamp):
+        data, appendable, rebased = parsed
+        self.read_count += 1
+        if rebased:
+            # 合并了旧日志：立即写成新快照，config.json 重新包含全部配置
+            self._write(data)
+            return
+        self._journal_stale = not appendable
+        self._set_data(data, stamp)
+
+    def _reject(self, stamp, error):
+        """
+        拒绝格式错误的配置文件，保留当前配置
+        同一份错误文件不会被反复读取；之后在程序内修改配置会先写出新的快照覆盖它
+        """
+        log.warning("配置文件格式错误，保留当前配置: %s", error)
+        self.reject_count += 1
+        self._stamp = stamp
+        self._journal_stale = True
+
+    def _ensure_fresh(self):
+        """快照或日志在外部被修改过时重新读取"""
+        stamp = self._file_stamp()
+        if self._data is not None and stamp == self._stamp:
+            return
+        try:
+            parsed = self._parse(stamp)
+        except ValueError as e:
+            # 第一次读取就失败时没有可以保留的配置
+            if self._data is None:
+                raise
+            self._reject(stamp, e)
+            return
+        self._apply_parsed(parsed, stamp)
+
+    def file_stamp(self):
+        """
+        快照和日志文件当前的 (mtime_ns, size)
+        Returns:
+            tuple: (快照, 日志)，文件不存在时为 None
+        """
+        return self._file_stamp()
+
+    @property
+    def stamp(self):
+        """上次读取/写入时的 file_stamp()"""
+        return self._stamp
+
+    def reload(self):
+        """
+        文件在外部被修改过时重新读取（在调用线程中解析，不持有锁）
+        格式错误的文件会被拒绝，当前配置保持不变
+        Returns:
+            bool: 是否应用了新的配置
+        """
+        stamp = self._file_stamp()
+        with self._lock:
+            if self._data is not None and stamp == self._stamp:
+                return False
+        try:
+            parsed = self._parse(stamp)
+        except ValueError as e:
+            with self._lock:
+                if self._data is not None:
+                    self._reject(stamp, e)
+            return False
+        with self._lock:
+            # 解析期间文件又变了：交给下一次检查
+            if self._file_stamp() != stamp:
+                return False
+            self._apply_parsed(parsed, stamp)
+        self._flush_events()
+        return True
+
+    def _write(self, data):
+        """
+        写入新快照并清空日志（都是临时文件 + 替换）
+        快照带上新的代数，两次替换之间崩溃时旧日志因代数较小而不会被重放
+        """
+        data.setdefault('shortcuts', [])
+        _ensure_next_id(data)
+        # 新代数要大于现有日志的代数（save() 传入的数据可能不带代数）
+        generations = [data.get('journal_generation'), self._journal_generation()]
+        if self._data is not None:
+            generations.append(self._data.get('journal_generation'))
+        data['journal_generation'] = max(
+            [g for g in generations if isinstance(g, int) and not isinstance(g, bool)], default=0) + 1
+        self._replace_file(self.path, json.dumps(data, indent=2, ensure_ascii=False))
+        header = json.dumps({'snapshot': list(self._stat(self.path)), 'generation': data['journal_generation']})
+        self._replace_file(self.journal_path, header + '\n')
+        self._journal_stale = False
+        self.write_count += 1
+        self._set_data(data, self._file_stamp())
+
+    def _journal_generation(self):
+        """
+        现有日志头中的代数
+        Returns:
+            int or None: 没有日志或日志头损坏时为 None
+        """
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                return json.loads(f.readline()).get('generation')
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _replace_file(self, path, text):
+        """原子写入：临时文件 + 替换"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _commit(self, op):
+        """
+        追加一条变更日志并应用到内存状态（调用方持有锁且已调用 _ensure_fresh）
+        Args:
+            op: 日志记录
+        """
+        if self._journal_stale or self._stamp[1] is None:
+            # 还没有属于当前快照的日志：先写一次快照
+            self._write(self._data)
+
+        line = json.dumps(op, ensure_ascii=False) + '\n'
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.append_count += 1
+
+        events = _apply_op(self._data, self._by_id, op)
+        if self._listeners:
+            self._pending_events.extend(events)
+        self._stamp = self._file_stamp()
+
+        if self._stamp[1][1] >= self.compact_bytes and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self._compact_in_background, name="config-compact", daemon=True).start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except OSError as e:
+            log.error("合并变更日志失败: %s", e)
+        finally:
+            self._compacting = False
+
+    def compact(self):
+        """把当前状态写成新快照并清空变更日志"""
+        with self._lock:
+            self._ensure_fresh()
+            self._write(self._data)
+            self.compact_count += 1
+        self._flush_events()
+
+    def invalidate(self):
+        """下次访问时强制重新读取文件"""
+        with self._lock:
+            self._stamp = None
+
+    def load(self):
+        """
+        获取配置数据（副本）
+        Returns:
+            dict: 配置数据，包含 shortcuts 列表
+        """
+        with self._lock:
+            self._ensure_fresh()
+            data = _copy_data(self._data)
+        self._flush_events()
+        return data
+
+    def save(self, data):
+        """
+        保存配置数据
+        Args:
+            data: 配置字典
+        """
+        with self._lock:
+            data = _copy_data(data)
+            if self._data is not None:
+                # ID 只增不减，已删除快捷键的 ID 不会被重新分配
+                data['next_id'] = max(data.get('next_id', 1), self._data['next_id'])
+            self._write(data)
+        self._flush_events()
+
+    def shortcuts(self):
+        """
+        获取所有快捷键配置（副本）
+        Returns:
+            list: 快捷键列表
+        """
+        with self._lock:
+            self._ensure_fresh()
+            shortcuts = [dict(s) for s in self._data['shortcuts']]
+        self._flush_events()
+        return shortcuts
+
+    def get(self, shortcut_id):
+        """
+        根据 ID 获取快捷键配置（副本）
+        Returns:
+            dict or None: 快捷键配置
+        """
+        with self._lock:
+            self._ensure_fresh()
+            s = self._by_id.get(shortcut_id)
+            s = dict(s) if s is not None else None
+        self._flush_events()
+        return s
+
+    def add(self, shortcut):
+        """
+        添加快捷键，分配新 ID
+        Args:
+            shortcut: 快捷键字典（会被写入 id 字段）
+        Returns:
+            dict: 添加后的快捷键数据
+        Raises:
+            ValueError: 快捷键结构不正确
+        """
+        validate_shortcut(shortcut)
+        with self._lock:
+            self._ensure_fresh()
+            shortcut['id'] = self._data['next_id']
+            self._commit({'op': 'add', 'shortcut': shortcut})
+        self._flush_events()
+        return shortcut
+
+    def remove(self, shortcut_id):
+        """
+        删除快捷键
+        Returns:
+            bool: 是否删除成功
+        """
+        with self._lock:
+            self._ensure_fresh()
+            if shortcut_id not in self._by_id:
+                return False
+            self._commit({'op': 'remove', 'id': shortcut_id})
+        self._flush_events()
+        return True
+
+    def update(self, shortcut):
+        """
+        按 ID 替换快捷键配置
+        Args:
+            shortcut: 包含 id 的快捷键字典
+        Returns:
+            bool: 是否找到并更新
+        Raises:
+            ValueError: 快捷键结构不正确
+        """
+        validate_shortcut(shortcut)
+        with self._lock:
+            self._ensure_fresh()
+            if shortcut.get('id') not in self._by_id:
+                return False
+            self._commit({'op': 'update', 'shortcut': shortcut})
+        self._flush_events()
+        return True
+
+    def profiles(self):
+        """
+        获取所有配置方案名（配置中声明的和快捷键用到的）
+        Returns:
+            list: 方案名列表
+        """
+        with self._lock:
+            self._ensure_fresh()
+            names = list(self._data.get('profiles', []))
+            for s in self._data['shortcuts']:
+                profile = s.get('profile')
+                if profile and profile not in names:
+                    names.append(profile)
+        self._flush_events()
+        return names
+
+    def active_profile(self):
+        """
+        获取当前配置方案
+        Returns:
+            str or None: 方案名，None 表示只启用公共快捷键
+        """
+        with self._lock:
+            self._ensure_fresh()
+            active = self._data.get('active_profile')
+        self._flush_events()
+        return active
+
+    def set_active_profile(self, profile):
+        """
+        保存当前配置方案
+        Args:
+            profile: 方案名，None 表示只启用公共快捷键
+        Returns:
+            bool: 是否发生了变化
+        """
+        with self._lock:
+            self._ensure_fresh()
+            if self._data.get('active_profile') == profile:
+                return False
+            self._commit({'op': 'profile', 'value': profile})
+        self._flush_events()
+        return True
+
+    def apply_batch(self, adds=(), removes=()):
+        """
+        一次写入完成多个删除和添加（先删除后添加）
+        Args:
+            adds: 要添加的快捷键字典列表（会被写入 id 字段）
+            removes: 要删除的快捷键 ID 列表
+        Returns:
+            tuple: (添加后的快捷键列表, 实际删除的 ID 列表)
+        Raises:
+            ValueError: 有快捷键结构不正确（整批不写入）
+        """
+        adds = list(adds)
+        for shortcut in adds:
+            validate_shortcut(shortcut)
+        with self._lock:
+            self._ensure_fresh()
+            removed = [i for i in dict.fromkeys(removes) if i in self._by_id]
+            next_id = self._data['next_id']
+            for shortcut in adds:
+                shortcut['id'] = next_id
+                next_id += 1
+            if adds or removed:
+                self._commit({'op': 'batch', 'add': list(adds), 'remove': removed})
+        self._flush_events()
+        return list(adds), removed
+
+
+_store = ConfigStore()
+
+
+def get_store():
+    """
+    获取全局配置存储
+    Returns:
+        ConfigStore: 配置存储
+    """
+    return _store
+
+
+def set_store(store):
+    """
+    替换全局配置存储（测试和基准使用临时文件）
+    Args:
+        store: ConfigStore 实例
+    Returns:
+        ConfigStore: 之前的配置存储
+    """
+    global _store
+    previous = _store
+    _store = store
+    return previous
+
+
 def load():
     """
     加载配置文件
     Returns:
         dict: 配置数据，包含 shortcuts 列表
     """
-    ensure_config_dir()
-    if not os.path.exists(CONFIG_FILE):
-        return {"shortcuts": []}
-
-    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return _store.load()
 
 
 def save(data):
@@ -36,9 +767,7 @@ def save(data):
     Args:
         data: 配置字典
     """
-    ensure_config_dir()
-    with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    _store.save(data)
 
 
 def add_shortcut(shortcut):
@@ -49,17 +778,31 @@ def add_shortcut(shortcut):
     Returns:
         dict: 添加后的完整快捷键数据（包含 ID）
     """
-    data = load()
+    return _store.add(shortcut)
+
+
+def get_profiles():
+    """获取所有配置方案名"""
+    return _store.profiles()
+
 
-    # 生成新 ID（取最大 ID + 1，或者从 1 开始）
-    existing_ids = [s.get('id', 0) for s in data['shortcuts']]
-    new_id = max(existing_ids) + 1 if existing_ids else 1
+def get_active_profile():
+    """获取当前配置方案"""
+    return _store.active_profile()
 
-    shortcut['id'] = new_id
-    data['shortcuts'].append(shortcut)
-    save(data)
 
-    return shortcut
+def set_active_profile(profile):
+    """保存当前配置方案"""
+    return _store.set_active_profile(profile)
+
+
+def apply_batch(adds=(), removes=()):
+    """
+    批量添加/删除快捷键（只写一次文件）
+    Returns:
+        tuple: (添加后的快捷键列表, 实际删除的 ID 列表)
+    """
+    return _store.apply_batch(adds, removes)
 
 
 def remove_shortcut(shortcut_id):
@@ -70,14 +813,32 @@ def remove_shortcut(shortcut_id):
     Returns:
         bool: 是否删除成功
     """
-    data = load()
-    original_count = len(data['shortcuts'])
-    data['shortcuts'] = [s for s in data['shortcuts'] if s.get('id') != shortcut_id]
+    return _store.remove(shortcut_id)
 
-    if len(data['shortcuts']) < original_count:
-        save(data)
-        return True
-    return False
+
+def update_shortcut(shortcut):
+    """
+    按 ID 替换快捷键配置
+    Args:
+        shortcut: 包含 id 的快捷键字典
+    Returns:
+        bool: 是否更新成功
+    """
+    return _store.update(shortcut)
+
+
+def subscribe(listener, batch=False):
+    """
+    订阅快捷键变化
+    Args:
+        listener: 回调 listener(event, shortcut)；batch 为 True 时为 listener([(event, shortcut), ...])
+    """
+    _store.subscribe(listener, batch)
+
+
+def unsubscribe(listener):
+    """取消订阅快捷键变化"""
+    _store.unsubscribe(listener)
 
 
 def get_shortcut_by_id(shortcut_id):
@@ -88,8 +849,4 @@ def get_shortcut_by_id(shortcut_id):
     Returns:
         dict or None: 快捷键配置
     """
-    data = load()
-    for s in data['shortcuts']:
-        if s.get('id') == shortcut_id:
-            return s
-    return None
+    return _store.get(shortcut_id)
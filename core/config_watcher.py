@@ -0,0 +1,113 @@
+"""
+配置文件监视模块
+后台线程定期检查配置文件，外部修改（手动编辑、同步工具）稳定下来后重新读取，
+变化通过配置事件增量应用：只重新注册变化的热键，只刷新受影响的列表行
+"""
+import threading
+import time
+
+from core import config
+from utils.logger import get_logger
+
+log = get_logger("config")
+
+
+class ConfigWatcher:
+    """
+    配置文件监视器
+    文件连续 debounce 秒没有再变化才重新读取，避免读到写了一半的文件或一次保存触发多次重载
+    """
+
+    def __init__(self, store=None, interval=0.5, debounce=0.3):
+        """
+        Args:
+            store: 配置存储，默认为全局配置存储
+            interval: 检查间隔（秒）
+            debounce: 文件稳定多久后才重新读取（秒）
+        """
+        self.store = store or config.get_store()
+        self.interval = interval
+        self.debounce = debounce
+        self.reload_count = 0
+        self._pending = None
+        self._pending_since = 0.0
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """启动监视线程"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止监视线程"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(2.0)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                log.error("检查配置文件失败: %s", e)
+
+    def check(self, now=None):
+        """
+        检查一次文件变化（监视线程调用，也可以手动调用）
+        Args:
+            now: 当前时间（time.monotonic()），默认取当前值
+        Returns:
+            bool: 是否重新读取并应用了配置
+        """
+        now = time.monotonic() if now is None else now
+        stamp = self.store.file_stamp()
+
+        # 与上次读取/写入时一致（包括本进程自己的写入）
+        if stamp == self.store.stamp:
+            self._pending = None
+            return False
+
+        # 文件还在变化：重新计时
+        if stamp != self._pending:
+            self._pending = stamp
+            self._pending_since = now
+            return False
+        if now - self._pending_since < self.debounce:
+            return False
+
+        self._pending = None
+        if self.store.reload():
+            self.reload_count += 1
+            log.info("配置文件已重新加载")
+            return True
+        return False
+
+
+_watcher = None
+
+
+def start(store=None, interval=0.5, debounce=0.3):
+    """
+    启动全局配置文件监视器
+    Returns:
+        ConfigWatcher: 监视器
+    """
+    global _watcher
+    if _watcher is None:
+        _watcher = ConfigWatcher(store, interval, debounce)
+        _watcher.start()
+    return _watcher
+
+
+def stop():
+    """停止全局配置文件监视器"""
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
@@ -0,0 +1,227 @@
+"""
+热键控制模块
+把配置中的快捷键注册为全局热键，并在热键触发时定位、切换目标窗口
+不依赖任何界面，托盘模式下主窗口可以完全不创建
+"""
+import threading
+
+from core import config, hotkey, stats, window as window_mgr
+from core.resolver import METHOD_MISS, GroupResolver, TargetResolver, create_resolver
+from utils.logger import get_logger
+
+log = get_logger("hotkey")
+
+# 快捷键动作：默认切换目标窗口，ACTION_PROFILE 切换到 target_profile 指定的配置方案
+ACTION_TOGGLE = 'toggle'
+ACTION_PROFILE = 'profile'
+
+_UNCHANGED = object()
+
+
+class HotkeyController:
+    """已注册热键及其目标解析器"""
+
+    def __init__(self, hwnd=None):
+        """
+        Args:
+            hwnd: 注册热键使用的窗口句柄（可以为 None）
+        """
+        self.hwnd = hwnd
+        self.registered_hotkeys = {}
+        self._lock = threading.Lock()
+        self._subscribed = False
+
+    def start(self):
+        """注册所有热键，之后配置变化时自动重新同步"""
+        self.register_all_hotkeys()
+        if not self._subscribed:
+            config.subscribe(self.on_config_changed, batch=True)
+            self._subscribed = True
+
+    def stop(self):
+        """取消配置订阅并注销所有热键"""
+        if self._subscribed:
+            config.unsubscribe(self.on_config_changed)
+            self._subscribed = False
+        hotkey.unregister_all()
+        self.registered_hotkeys = {}
+
+    def on_config_changed(self, events):
+        """
+        配置变化事件：一次修改（包括重新读取文件）的所有事件合并后只处理变化的快捷键
+        Args:
+            events: [(event, shortcut), ...]
+        """
+        changed = {}
+        removed = set()
+        active = _UNCHANGED
+        for event, shortcut in events:
+            if event == config.EVENT_PROFILE:
+                active = shortcut.get('active_profile')
+                continue
+            shortcut_id = shortcut.get('id')
+            if event == config.EVENT_REMOVE:
+                changed.pop(shortcut_id, None)
+                removed.add(shortcut_id)
+            else:
+                removed.discard(shortcut_id)
+                changed[shortcut_id] = shortcut
+
+        with self._lock:
+            if changed or removed:
+                registered = dict(self.registered_hotkeys)
+                for shortcut_id in removed:
+                    registered.pop(shortcut_id, None)
+                for shortcut_id, s in changed.items():
+                    entry = self._make_entry(s, registered.get(shortcut_id))
+                    if entry is None:
+                        registered.pop(shortcut_id, None)
+                    else:
+                        registered[shortcut_id] = entry
+                self.registered_hotkeys = registered
+                hotkey.apply_changes(self.hwnd, changed.values(), removed, self._make_callback)
+            if active is not _UNCHANGED:
+                hotkey.activate_profile(active)
+
+    def switch_profile(self, profile):
+        """
+        切换配置方案：立即替换热键表，再保存到配置
+        Args:
+            profile: 方案名，None 表示只启用公共快捷键
+        """
+        hotkey.activate_profile(profile)
+        config.set_active_profile(profile)
+
+    def register_all_hotkeys(self):
+        """注册所有已配置的热键（只应用与当前注册状态的差异）"""
+        # 在锁外读取配置：文件在外部修改过时读取会同步发出变化事件，事件处理也要获取这把锁
+        store = config.get_store()
+        shortcuts = store.shortcuts()
+        profiles = store.profiles()
+        active = store.active_profile()
+
+        with self._lock:
+            registered = {}
+            for s in shortcuts:
+                entry = self._make_entry(s, self.registered_hotkeys.get(s.get('id')))
+                if entry is not None:
+                    registered[s['id']] = entry
+            self.registered_hotkeys = registered
+
+            # 注册热键并设置回调
+            result = hotkey.reconcile(self.hwnd, shortcuts, self._make_callback)
+
+            # 所有方案的热键表提前建好，切换时只替换引用
+            hotkey.prepare_profiles(profiles)
+            hotkey.activate_profile(active)
+            return result
+
+    def _make_callback(self, shortcut_id):
+        return lambda: self.on_hotkey_triggered(shortcut_id)
+
+    def _make_entry(self, s, old):
+        """
+        为快捷键建立注册信息
+        Args:
+            s: 快捷键配置
+            old: 之前的注册信息（目标配置没变时沿用原解析器，保留已缓存的目标窗口）
+        Returns:
+            dict or None: 注册信息，快捷键没有 ID 或键名时为 None
+        """
+        shortcut_id = s.get('id')
+        if not (shortcut_id and s.get('key')):
+            return None
+        if old and old['resolver'].shortcut == s:
+            return old
+
+        # 一个快捷键的配置有问题不能影响其他快捷键
+        try:
+            resolver = create_resolver(s)
+        except (ValueError, TypeError, AttributeError) as e:
+            log.warning("快捷键 %s 的目标配置无效: %s", shortcut_id, e)
+            try:
+                resolver = TargetResolver(dict(s, title_rule=None, group=None))
+            except (ValueError, TypeError, AttributeError):
+                resolver = TargetResolver({})
+
+        # 保存窗口信息和解析器
+        return {
+            'modifiers': s.get('modifiers', ''),
+            'key': s.get('key', ''),
+            'window_title': s.get('window_title', ''),
+            'window_class': s.get('window_class', ''),
+            'action': s.get('action', ACTION_TOGGLE),
+            'target_profile': s.get('target_profile'),
+            'resolver': resolver
+        }
+
+    def resolve(self, shortcut_id):
+        """
+        解析快捷键当前的目标窗口（不切换）
+        Returns:
+            tuple: (窗口句柄列表, 解析方式)
+        """
+        shortcut_info = self.registered_hotkeys.get(shortcut_id)
+        if shortcut_info is None:
+            return [], METHOD_MISS
+        resolver = shortcut_info['resolver']
+        if isinstance(resolver, GroupResolver):
+            return resolver.resolve()
+        hwnd, method = resolver.resolve()
+        return ([hwnd] if hwnd else []), method
+
+    def on_hotkey_triggered(self, shortcut_id):
+        """
+        热键触发事件（执行线程）
+        Args:
+            shortcut_id: 热键 ID
+        Returns:
+            bool: 是否有窗口被切换
+        """
+        shortcut_info = self.registered_hotkeys.get(shortcut_id)
+        if shortcut_info is None:
+            return False
+
+        if shortcut_info['action'] == ACTION_PROFILE:
+            self.switch_profile(shortcut_info['target_profile'])
+            return True
+
+        resolver = shortcut_info['resolver']
+
+        # 窗口组：整组一次切换
+        if isinstance(resolver, GroupResolver):
+            hwnds, method = resolver.resolve()
+            stats.mark('resolve')
+            stats.count(shortcut_id, f"resolve:{method}")
+            if not window_mgr.toggle_group(hwnds):
+                log.warning("快捷键 %s: 窗口组中没有找到窗口", shortcut_id)
+                return False
+            return True
+
+        # 缓存的窗口 → 保存的 hwnd → 进程+类名 → 类名+标题 → 类名
+        hwnd, method = resolver.resolve()
+
+        stats.mark('resolve')
+        stats.count(shortcut_id, f"resolve:{method}")
+
+        if not hwnd:
+            log.warning("快捷键 %s: 未找到窗口，可能需要重新配置", shortcut_id)
+            return False
+
+        # 切换窗口显示/隐藏
+        if not window_mgr.toggle_window(hwnd):
+            resolver.invalidate()
+            log.warning("快捷键 %s: 窗口操作失败，可能需要重新配置", shortcut_id)
+            return False
+        return True
+
+
+_controller = None
+
+
+def get_controller():
+    """获取全局热键控制器"""
+    global _controller
+    if _controller is None:
+        _controller = HotkeyController()
+    return _controller
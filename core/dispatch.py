@@ -0,0 +1,155 @@
+"""
+热键动作执行模块
+键盘钩子线程只负责入队，实际的窗口操作在独立的执行线程中完成
+"""
+import collections
+import threading
+import time
+
+from utils.logger import get_logger
+
+log = get_logger("executor")
+
+
+class ActionExecutor:
+    """
+    单线程动作执行器
+    同一个快捷键在队列中尚未执行时重复触发，只保留一次
+    """
+
+    def __init__(self, handler, name="hotkey-executor"):
+        """
+        Args:
+            handler: 执行动作的函数 handler(shortcut_id, received, timestamp)，
+                     received 为钩子收到按键的时间，timestamp 为入队时间
+            name: 执行线程名
+        """
+        self.handler = handler
+        self.name = name
+        self._queue = collections.deque()
+        self._pending = set()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        # 计数器
+        self.submitted = 0
+        self.coalesced = 0
+        self.executed = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_last = 0.0
+
+    def start(self):
+        """
+        启动执行线程
+        上次停止时仍在执行动作的线程不会被等待，也不会再另起一个：
+        它执行完当前动作后看到执行器已重新启动，继续处理新的队列
+        """
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+        停止执行线程，丢弃尚未执行的动作
+        Args:
+            timeout: 最多等待正在执行的动作这么久（秒）；等不到时线程执行完这个动作后自行退出
+        """
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._queue.clear()
+            self._pending.clear()
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def submit(self, shortcut_id, timestamp=None, received=None):
+        """
+        提交一个动作（在钩子线程调用，立即返回）
+        Args:
+            shortcut_id: 快捷键 ID
+            timestamp: 触发时间（time.perf_counter），默认取当前时间
+            received: 钩子收到按键的时间，默认与 timestamp 相同
+        Returns:
+            bool: 是否入队（False 表示被合并）
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if received is None:
+            received = timestamp
+        with self._cond:
+            self.submitted += 1
+            if shortcut_id in self._pending:
+                self.coalesced += 1
+                return False
+            self._pending.add(shortcut_id)
+            self._queue.append((shortcut_id, timestamp, received))
+            depth = len(self._queue)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self._cond.notify()
+        return True
+
+    @property
+    def depth(self):
+        """当前队列深度"""
+        return len(self._queue)
+
+    def stats(self):
+        """
+        获取计数器快照
+        Returns:
+            dict: 队列深度、合并次数和入队到执行的延迟（秒）
+        """
+        with self._cond:
+            executed = self.executed
+            return {
+                'depth': len(self._queue),
+                'max_depth': self.max_depth,
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'executed': executed,
+                'failed': self.failed,
+                'latency_avg': self.latency_total / executed if executed else 0.0,
+                'latency_max': self.latency_max,
+                'latency_last': self.latency_last,
+            }
+
+    def _run(self):
+        """执行线程主循环：停止后退出；退出前又被重新启动则继续执行"""
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    self._thread = None
+                    return
+                shortcut_id, timestamp, received = self._queue.popleft()
+                # 出队后再次触发会重新入队，保证执行期间的按键不会丢失
+                self._pending.discard(shortcut_id)
+
+            latency = time.perf_counter() - timestamp
+            try:
+                self.handler(shortcut_id, received, timestamp)
+            except Exception as e:
+                log.error("执行快捷键 %s 失败: %s", shortcut_id, e)
+                with self._cond:
+                    self.failed += 1
+
+            with self._cond:
+                self.executed += 1
+                self.latency_total += latency
+                self.latency_last = latency
+                if latency > self.latency_max:
+                    self.latency_max = latency
@@ -1,136 +1,950 @@
 """
 热键管理模块
-使用 pynput 库实现全局热键
+通过平台后端的键盘事件源实现全局热键（Windows 下为 pynput）
 """
-from pynput import keyboard
+import contextlib
+import itertools
+import threading
 import time
 
+from core import stats
+from core.backend import get_backend
+from core.dispatch import ActionExecutor
+from utils.logger import get_logger
 
-# 存储已注册的热键回调
+log = get_logger("hotkey")
+
+
+# 快捷键配置 trigger 字段：松开主键时触发（默认按下时触发）
+TRIGGER_RELEASE = 'release'
+
+# 修饰键位掩码
+MOD_CTRL = 0x1
+MOD_ALT = 0x2
+MOD_SHIFT = 0x4
+MOD_WIN = 0x8
+
+_MODIFIER_BITS = {
+    'Ctrl': MOD_CTRL,
+    'Alt': MOD_ALT,
+    'Shift': MOD_SHIFT,
+    'Win': MOD_WIN,
+}
+
+# 修饰键键名 → 位掩码
+MODIFIER_KEYS = {
+    'ctrl': MOD_CTRL,
+    'ctrl_l': MOD_CTRL,
+    'ctrl_r': MOD_CTRL,
+    'alt': MOD_ALT,
+    'alt_l': MOD_ALT,
+    'alt_r': MOD_ALT,
+    'shift': MOD_SHIFT,
+    'shift_l': MOD_SHIFT,
+    'shift_r': MOD_SHIFT,
+    'cmd': MOD_WIN,
+    'cmd_l': MOD_WIN,
+    'cmd_r': MOD_WIN,
+}
+
+
+class SequenceNode(dict):
+    """按键序列前缀树的中间节点: 组合键 -> shortcut_id 或下一个节点"""
+    __slots__ = ()
+
+
+def _insert(root, shortcut_id, steps):
+    """
+    把按键序列插入前缀树
+    与已有绑定冲突时（完全相同、或一方是另一方的前缀）先注册的优先。
+    root 必须是草稿；路径上的中间节点先复制再修改，已发布快照中的节点保持不变
+    Returns:
+        bool: 是否插入（被已有绑定遮住时为 False）
+    """
+    node = root
+    for step in steps[:-1]:
+        child = node.get(step)
+        if child is None:
+            child = SequenceNode()
+        elif child.__class__ is not SequenceNode:
+            return False
+        else:
+            child = SequenceNode(child)
+        node[step] = child
+        node = child
+    return node.setdefault(steps[-1], shortcut_id) == shortcut_id
+
+
+def _remove(root, shortcut_id, steps):
+    """
+    把按键序列从前缀树中移除，变空的中间节点一并删除
+    root 必须是草稿；和 _insert 一样只复制路径上的节点
+    Returns:
+        bool: 序列是否在树中
+    """
+    node = root
+    for step in steps[:-1]:
+        node = node.get(step)
+        if node is None or node.__class__ is not SequenceNode:
+            return False
+    leaf = node.get(steps[-1])
+    if leaf is None or leaf.__class__ is SequenceNode or leaf != shortcut_id:
+        return False
+
+    path = []
+    node = root
+    for step in steps[:-1]:
+        child = SequenceNode(node[step])
+        node[step] = child
+        path.append((node, step))
+        node = child
+    del node[steps[-1]]
+    while not node and path:
+        node, step = path.pop()
+        del node[step]
+    return True
+
+
+def _leaves(node, prefix=()):
+    """遍历前缀树中的绑定，生成 (shortcut_id, 按键序列)"""
+    for step, target in node.items():
+        if target.__class__ is SequenceNode:
+            yield from _leaves(target, prefix + (step,))
+        else:
+            yield target, prefix + (step,)
+
+
+class HotkeyTable:
+    """
+    一个配置方案的编译后热键表
+    发布后只读：修改时先 copy() 出草稿，改完后整体替换 _tables 中的表和 _active_table 引用。
+    钩子线程读一次 _active_table 就得到一致的快照，不加锁，也不会看到改了一半的表
+    """
+    __slots__ = ('profile', 'dispatch', 'bound_keys', 'release_ids', 'shadowed')
+
+    def __init__(self, profile, dispatch=None, bound_keys=None, release_ids=None, shadowed=None):
+        self.profile = profile
+        # 前缀树的根: (修饰键掩码, 规范化键名) -> shortcut_id 或 SequenceNode
+        self.dispatch = {} if dispatch is None else dispatch
+        # 序列第一步的键名 -> 使用次数，用于在查表前快速拒绝
+        self.bound_keys = {} if bound_keys is None else bound_keys
+        # 松开主键时才触发的热键 ID
+        self.release_ids = set() if release_ids is None else release_ids
+        # 被先注册的冲突绑定遮住、没有进入前缀树的热键: shortcut_id -> 按键序列
+        self.shadowed = {} if shadowed is None else shadowed
+
+    def copy(self):
+        """复制出可修改的草稿（前缀树节点共享，插入时沿路径复制）"""
+        return HotkeyTable(self.profile, dict(self.dispatch), dict(self.bound_keys), set(self.release_ids),
+                           dict(self.shadowed))
+
+    def includes(self, profile):
+        """属于 profile 的快捷键是否在本表中（不属于任何方案的快捷键在所有表中）"""
+        return profile is None or profile == self.profile
+
+    def bind(self, shortcut_id, steps, on_release=False):
+        """把按键序列加入分发表（只用于草稿）"""
+        key_name = steps[0][1]
+        self.bound_keys[key_name] = self.bound_keys.get(key_name, 0) + 1
+        if not _insert(self.dispatch, shortcut_id, steps):
+            self.shadowed[shortcut_id] = steps
+        if on_release:
+            self.release_ids.add(shortcut_id)
+
+    def unbind(self, shortcut_id, steps):
+        """把按键序列从分发表中移除（只用于草稿）"""
+        key_name = steps[0][1]
+        count = self.bound_keys.get(key_name, 0) - 1
+        if count > 0:
+            self.bound_keys[key_name] = count
+        else:
+            self.bound_keys.pop(key_name, None)
+        self.release_ids.discard(shortcut_id)
+
+        if self.shadowed.pop(shortcut_id, None) is not None:
+            return
+        if not _remove(self.dispatch, shortcut_id, steps):
+            return
+
+        # 被移除的绑定可能遮住了以同一步开头的其他热键：按注册顺序重建这棵子树
+        first = steps[0]
+        waiting = [other_id for other_id, other in self.shadowed.items() if other[0] == first]
+        if not waiting:
+            return
+        subtree = self.dispatch.pop(first, None)
+        entries = dict(_leaves({first: subtree})) if subtree is not None else {}
+        for other_id in waiting:
+            entries[other_id] = self.shadowed.pop(other_id)
+        for other_id in sorted(entries, key=lambda i: _hotkey_callbacks[i]['order']):
+            if not _insert(self.dispatch, other_id, entries[other_id]):
+                self.shadowed[other_id] = entries[other_id]
+
+
+# 已注册热键的配置；只有写入方（界面、控制器、控制通道）访问，修改都在 _write_lock 下进行
 _hotkey_callbacks = {}
+# 注册序号：冲突的绑定按它决定谁优先
+_registration_order = itertools.count()
+# shortcut_id -> 回调；写时复制，执行线程和控制通道只读引用
 _callbacks = {}
-# 防止快速连续触发的标志
-_last_trigger_time = {}
-_TRIGGER_COOLDOWN = 0  # 移除 cooldown，依赖窗口状态判断来防止闪烁
+# 配置方案名 -> 已发布的热键表；None 表示未启用任何方案（只有公共热键）
+_tables = {None: HotkeyTable(None)}
+# 当前生效的热键表（钩子线程只读这一个引用）
+_active_table = _tables[None]
+_active_profile = None
+# 写入方之间互斥；钩子线程和执行线程从不获取
+_write_lock = threading.RLock()
+# 修改过程中的草稿，最外层修改结束时一起发布
+_draft_tables = {}
+_draft_callbacks = None
+_edit_depth = 0
+# 按键序列进行中时已匹配到的前缀树节点，以及上一步的时间
+_sequence_node = None
+_sequence_time = 0.0
+# 序列两步之间允许的最长间隔（秒）
+_sequence_timeout = 1.0
+# 钩子线程给按键事件计时的时钟（回放录制的按键时换成虚拟时钟）
+_clock = time.perf_counter
 _listener = None
-# 记录当前按下的修饰键
-_pressed_modifiers = set()
+# 当前的按键捕获会话（添加对话框录制快捷键时使用）
+_capture = None
+# 当前按下的修饰键（位掩码），只在钩子线程中修改
+_pressed_mask = 0
+# 钩子线程处理过的修饰键事件数
+_modifier_events = 0
+# 待钩子线程校正的真实修饰键状态 (读取前的修饰键事件数, 真实掩码)
+_modifier_check = None
+
+# 已被热键/序列/捕获处理、尚未松开的非修饰键 -> 最近一次按下事件的时间
+_held_keys = {}
+# 与上一次按下事件间隔超过这个时间的"重复"视为新的按键，漏掉释放事件时自动恢复
+# （Windows 自动重复的首次延迟最长 1 秒）
+_REPEAT_WINDOW = 1.2
+# 等待松开的热键 (键名, shortcut_id)
+_release_pending = None
+# 按真实键盘状态校正修饰键的间隔（秒）
+MODIFIER_CHECK_INTERVAL = 2.0
+_watchdog_thread = None
+_watchdog_stop = threading.Event()
+# 按键规范化计数
+_input_stats = {'suppressed_repeats': 0, 'stuck_modifier_resets': 0}
+
+
+def parse_modifiers(modifiers_str):
+    """
+    将修饰键字符串转换为位掩码
+    Args:
+        modifiers_str: 如 "Ctrl+Alt"，可以为空
+    Returns:
+        int: 位掩码
+    Raises:
+        ValueError: 包含未知的修饰键
+    """
+    mask = 0
+    if not modifiers_str:
+        return mask
+    for name in modifiers_str.split('+'):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in _MODIFIER_BITS:
+            raise ValueError(f"Unknown modifier: {name}")
+        mask |= _MODIFIER_BITS[name]
+    return mask
+
+
+def format_modifiers(mask):
+    """
+    将修饰键位掩码转换为字符串（按名称排序，与添加对话框的格式一致）
+    Args:
+        mask: 位掩码
+    Returns:
+        str: 如 "Alt+Ctrl"，无修饰键时为空字符串
+    """
+    return '+'.join(sorted(name for name, bit in _MODIFIER_BITS.items() if mask & bit))
+
+
+def canonical_key(key_str):
+    """
+    规范化键名（统一小写，"F1" 与 "f1" 视为同一个键）
+    Args:
+        key_str: 键名
+    Returns:
+        str: 规范化后的键名
+    """
+    return key_str.lower() if key_str else key_str
+
+
+def _compile_combo(modifiers_str, key_str):
+    """将热键编译为分发表的键 (修饰键掩码, 规范化键名)"""
+    return (parse_modifiers(modifiers_str), canonical_key(key_str))
+
+
+def shortcut_steps(shortcut):
+    """
+    获取快捷键的按键序列
+    Args:
+        shortcut: 快捷键配置，modifiers/key 为第一步，then 为后续步骤列表
+    Returns:
+        list: [(modifiers, key), ...]
+    """
+    steps = [(shortcut.get('modifiers', ''), shortcut.get('key'))]
+    for step in shortcut.get('then') or ():
+        steps.append((step.get('modifiers', ''), step.get('key')))
+    return steps
 
 
-def register(hwnd, shortcut_id, modifiers_str, key_str):
+def compile_steps(steps):
+    """
+    将按键序列编译为分发表的键序列
+    Args:
+        steps: [(modifiers, key), ...]
+    Returns:
+        tuple: ((修饰键掩码, 规范化键名), ...)
+    Raises:
+        ValueError: 包含未知的修饰键或空键名
+    """
+    compiled = []
+    for modifiers_str, key_str in steps:
+        if not key_str:
+            raise ValueError("Empty key in sequence")
+        compiled.append(_compile_combo(modifiers_str, key_str))
+    return tuple(compiled)
+
+
+def format_steps(steps):
+    """
+    格式化按键序列
+    Args:
+        steps: [(modifiers, key), ...]
+    Returns:
+        str: 如 "Ctrl+Alt+w, t"
+    """
+    return ', '.join(f"{m}+{k}" if m else k for m, k in steps)
+
+
+def find_conflicts(shortcut, shortcuts):
+    """
+    检查快捷键与已有快捷键的冲突
+    两个按键序列相同、或一个是另一个的前缀时，后注册的那个永远不会触发
+    Args:
+        shortcut: 要保存的快捷键配置
+        shortcuts: 已有的快捷键配置列表（与 shortcut 同 ID 的条目被忽略）
+    Returns:
+        list: [(shortcut_id, kind), ...]，kind 为 'same'（序列相同）、
+              'prefix'（新序列是已有序列的前缀）或 'extends'（已有序列是新序列的前缀）
+    Raises:
+        ValueError: shortcut 的按键序列无效
+    """
+    new = compile_steps(shortcut_steps(shortcut))
+    profile = shortcut.get('profile')
+    conflicts = []
+    for s in shortcuts:
+        if s.get('id') == shortcut.get('id') or not s.get('key'):
+            continue
+        # 属于不同配置方案的快捷键不会同时生效
+        other_profile = s.get('profile')
+        if profile and other_profile and profile != other_profile:
+            continue
+        try:
+            other = compile_steps(shortcut_steps(s))
+        except ValueError:
+            continue
+        n = min(len(new), len(other))
+        if new[:n] != other[:n]:
+            continue
+        if len(new) == len(other):
+            kind = 'same'
+        elif len(new) < len(other):
+            kind = 'prefix'
+        else:
+            kind = 'extends'
+        conflicts.append((s.get('id'), kind))
+    return conflicts
+
+
+def set_sequence_timeout(seconds):
+    """设置按键序列两步之间允许的最长间隔（秒）"""
+    global _sequence_timeout
+    _sequence_timeout = seconds
+
+
+def reset_sequence():
+    """放弃进行中的按键序列"""
+    global _sequence_node
+    _sequence_node = None
+
+
+def set_clock(clock=None):
+    """
+    替换钩子线程使用的时钟
+    回放录制的按键时使用按录制时间推进的虚拟时钟，序列超时和自动重复判断不受回放速度影响
+    Args:
+        clock: 无参函数，返回以秒为单位的时间；None 恢复 time.perf_counter
+    Returns:
+        之前的时钟
+    """
+    global _clock
+    previous = _clock
+    _clock = clock or time.perf_counter
+    return previous
+
+
+@contextlib.contextmanager
+def _editing():
+    """
+    修改热键表和回调表
+    修改都落在草稿上，最外层结束时一次发布，批量注册只复制一次。可以嵌套
+    """
+    global _edit_depth
+    with _write_lock:
+        _edit_depth += 1
+        try:
+            yield
+        finally:
+            _edit_depth -= 1
+            if not _edit_depth:
+                _publish()
+
+
+def _publish():
+    """发布草稿：整体替换回调表、热键表和 _active_table 的引用"""
+    global _callbacks, _draft_callbacks, _active_table
+    # 先发布回调，新热键在分发表中可见时回调已经就绪
+    if _draft_callbacks is not None:
+        _callbacks = _draft_callbacks
+        _draft_callbacks = None
+    if _draft_tables:
+        _tables.update(_draft_tables)
+        _draft_tables.clear()
+    table = _tables[_active_profile]
+    if table is not _active_table:
+        _active_table = table
+
+
+def _draft(profile):
+    """
+    获取配置方案热键表的草稿（需在 _editing() 中调用）
+    第一次修改时复制已发布的表；方案还没有表时用当前的公共热键建一张
+    """
+    table = _draft_tables.get(profile)
+    if table is None:
+        published = _tables.get(profile)
+        if published is not None:
+            table = published.copy()
+        else:
+            table = HotkeyTable(profile)
+            for shortcut_id, info in _hotkey_callbacks.items():
+                if info['profile'] is None:
+                    table.bind(shortcut_id, info['steps'], info['on_release'])
+        _draft_tables[profile] = table
+    return table
+
+
+def _draft_callback_map():
+    """获取回调表的草稿（需在 _editing() 中调用）"""
+    global _draft_callbacks
+    if _draft_callbacks is None:
+        _draft_callbacks = dict(_callbacks)
+    return _draft_callbacks
+
+
+def _tables_for(profile):
+    """需要包含某个快捷键的热键表草稿"""
+    if profile is None:
+        return [_draft(p) for p in set(_tables) | set(_draft_tables)]
+    return [_draft(profile)]
+
+
+def _bind(shortcut_id, steps, profile=None, on_release=False):
+    """把热键加入相关的分发表"""
+    for table in _tables_for(profile):
+        table.bind(shortcut_id, steps, on_release)
+
+
+def _unbind(shortcut_id, steps, profile=None):
+    """把热键从相关的分发表中移除"""
+    for table in _tables_for(profile):
+        table.unbind(shortcut_id, steps)
+
+
+def activate_profile(profile):
+    """
+    切换配置方案：只替换当前热键表的引用，监听器不重启，切换过程中没有热键失效的窗口期
+    Args:
+        profile: 配置方案名，None 表示只保留公共热键
+    Returns:
+        bool: 是否发生了切换
+    """
+    global _active_profile
+    with _editing():
+        if profile == _active_profile:
+            return False
+        _active_profile = profile
+        if profile not in _tables:
+            _draft(profile)
+    reset_sequence()
+    log.info("Activated profile: %s", profile)
+    return True
+
+
+def get_active_profile():
+    """当前配置方案名"""
+    return _active_table.profile
+
+
+def prepare_profiles(profiles):
+    """
+    提前为配置方案建好热键表（切换时不需要再编译）
+    Args:
+        profiles: 配置方案名列表
+    """
+    with _editing():
+        for profile in profiles:
+            if profile not in _tables:
+                _draft(profile)
+
+
+def register(hwnd, shortcut_id, modifiers_str, key_str, profile=None, then=None, on_release=False):
     """
     注册全局热键
+    Args:
+        hwnd: 窗口句柄
+        shortcut_id: 热键 ID
+        modifiers_str: 修饰键，如 "Ctrl+Alt"
+        key_str: 键名
+        profile: 所属配置方案，None 表示在所有方案中生效
+        then: 按键序列的后续步骤 [{'modifiers': ..., 'key': ...}, ...]
+        on_release: 松开主键时才触发（期间按了其他键则取消）
     """
     try:
-        hotkey_str = f"{modifiers_str}+{key_str}" if modifiers_str else key_str
-        print(f"Registering hotkey: {hotkey_str}")
+        steps = shortcut_steps({'modifiers': modifiers_str, 'key': key_str, 'then': then})
+        hotkey_str = format_steps(steps)
+        log.debug("Registering hotkey: %s", hotkey_str)
+
+        compiled = compile_steps(steps)
 
-        _hotkey_callbacks[shortcut_id] = {
-            'modifiers': modifiers_str,
-            'key': key_str
-        }
+        with _editing():
+            if shortcut_id in _hotkey_callbacks:
+                old = _hotkey_callbacks.pop(shortcut_id)
+                _unbind(shortcut_id, old['steps'], old['profile'])
 
-        global _listener
-        if _listener is None:
-            _listener = keyboard.Listener(on_press=_on_press, on_release=_on_release)
-            _listener.start()
+            _hotkey_callbacks[shortcut_id] = {
+                'modifiers': modifiers_str,
+                'key': key_str,
+                'then': tuple(steps[1:]),
+                'steps': compiled,
+                'profile': profile,
+                'on_release': bool(on_release),
+                'order': next(_registration_order)
+            }
+            _bind(shortcut_id, compiled, profile, on_release)
 
-        print(f"Registered hotkey: {hotkey_str}, id={shortcut_id}")
+        _ensure_listener()
+
+        log.info("Registered hotkey: %s, id=%s, profile=%s", hotkey_str, shortcut_id, profile)
         return True
     except Exception as e:
-        print(f"Failed to register hotkey: {e}")
+        log.error("Failed to register hotkey: %s", e)
         return False
 
 
-def _on_press(key):
-    """全局按键按下回调"""
-    global _pressed_modifiers
+def _ensure_listener():
+    """启动键盘监听器和动作执行器（整个进程只有一个键盘钩子）"""
+    global _listener
+    if _listener is None:
+        _executor.start()
+        _listener = get_backend().keyboard_source(_on_press, _on_release)
+        _listener.start()
+        _start_watchdog()
 
-    try:
-        key_name = key.char
-    except AttributeError:
-        key_name = str(key).replace('Key.', '')
+
+def reconcile_modifiers():
+    """
+    按键盘的真实状态清除卡住的修饰键
+    锁屏、UAC 提示等情况下钩子收不到释放事件，修饰键位会一直留在掩码里导致热键失效。
+    只清除不补充：按下事件总会送达，真实状态里多出的键以钩子为准。
+    掩码只由钩子线程修改：这里只读取真实状态，由钩子线程在下一个按键事件开始时清除
+    Returns:
+        int: 看起来卡住、等待钩子线程清除的修饰键位
+    """
+    global _modifier_check
+    # 先记下事件数再读状态：读取期间钩子又处理了修饰键事件时，这次结果作废
+    events = _modifier_events
+    state = get_backend().get_modifier_state()
+    if state is None:
+        return 0
+    real = 0
+    for name in state:
+        real |= _MODIFIER_BITS.get(name, 0)
+    stuck = _pressed_mask & ~real
+    if stuck:
+        _modifier_check = (events, real)
+    return stuck
+
+
+def _apply_modifier_check():
+    """钩子线程：按看门狗读到的真实状态清除卡住的修饰键"""
+    global _pressed_mask, _modifier_check
+    check = _modifier_check
+    _modifier_check = None
+    if check is None or check[0] != _modifier_events:
+        return
+    stuck = _pressed_mask & ~check[1]
+    if stuck:
+        _pressed_mask &= ~stuck
+        _input_stats['stuck_modifier_resets'] += 1
+        log.warning("Cleared stuck modifiers: %s", format_modifiers(stuck))
+
+
+def _watchdog_loop():
+    while not _watchdog_stop.wait(MODIFIER_CHECK_INTERVAL):
+        try:
+            reconcile_modifiers()
+        except Exception as e:
+            log.error("Modifier check failed: %s", e)
+
+
+def _start_watchdog():
+    global _watchdog_thread
+    if _watchdog_thread is None:
+        _watchdog_stop.clear()
+        _watchdog_thread = threading.Thread(target=_watchdog_loop, name="modifier-watchdog", daemon=True)
+        _watchdog_thread.start()
+
+
+def _stop_watchdog():
+    global _watchdog_thread
+    if _watchdog_thread is not None:
+        _watchdog_stop.set()
+        _watchdog_thread.join(1.0)
+        _watchdog_thread = None
+
+
+def get_input_stats():
+    """
+    获取按键规范化的计数器
+    Returns:
+        dict: 过滤的自动重复次数、清除卡住修饰键的次数
+    """
+    return dict(_input_stats)
+
+
+class CaptureSession:
+    """
+    按键捕获会话
+    会话期间暂停热键分发，下一个组合键交给 on_chord 后会话自动结束
+    """
+
+    def __init__(self, on_chord, on_cancel=None):
+        """
+        Args:
+            on_chord: 捕获到组合键时的回调 on_chord({'modifiers': ..., 'key': ...})
+            on_cancel: 按下 ESC 取消时的回调
+        """
+        self.on_chord = on_chord
+        self.on_cancel = on_cancel
+        self.active = True
+
+    def end(self):
+        """结束会话，恢复热键分发"""
+        global _capture
+        self.active = False
+        if _capture is self:
+            _capture = None
+
+    def _feed(self, key_name):
+        """处理一个非修饰键（钩子线程）"""
+        self.end()
+        try:
+            if key_name == 'esc':
+                if self.on_cancel:
+                    self.on_cancel()
+                return
+            self.on_chord({
+                'modifiers': format_modifiers(_pressed_mask),
+                'key': key_name
+            })
+        except Exception as e:
+            # 不能让回调异常终止键盘监听器
+            log.error("Capture callback failed: %s", e)
+
+
+def begin_capture(on_chord, on_cancel=None):
+    """
+    开始捕获下一个组合键
+    复用热键模块的键盘监听器，回调在钩子线程中调用
+    Args:
+        on_chord: 捕获到组合键时的回调
+        on_cancel: 按下 ESC 取消时的回调
+    Returns:
+        CaptureSession: 捕获会话
+    """
+    global _capture
+    if _capture is not None:
+        _capture.end()
+    session = CaptureSession(on_chord, on_cancel)
+    reset_sequence()
+    _capture = session
+    _ensure_listener()
+    return session
+
+
+def _on_press(key_name):
+    """全局按键按下回调（key_name 为键盘事件源给出的规范化键名）"""
+    global _pressed_mask, _modifier_events, _sequence_node, _release_pending
+
+    if _modifier_check is not None:
+        _apply_modifier_check()
 
     # 记录修饰键
-    if key == keyboard.Key.ctrl or key == keyboard.Key.ctrl_l or key == keyboard.Key.ctrl_r:
-        _pressed_modifiers.add('Ctrl')
-    elif key == keyboard.Key.alt or key == keyboard.Key.alt_l or key == keyboard.Key.alt_r:
-        _pressed_modifiers.add('Alt')
-    elif key == keyboard.Key.shift or key == keyboard.Key.shift_l or key == keyboard.Key.shift_r:
-        _pressed_modifiers.add('Shift')
-    elif key == keyboard.Key.cmd or key == keyboard.Key.cmd_l or key == keyboard.Key.cmd_r:
-        _pressed_modifiers.add('Win')
+    bit = MODIFIER_KEYS.get(key_name)
+    if bit:
+        _pressed_mask |= bit
+        _modifier_events += 1
+        return
+
+    # 按住不放产生的自动重复：只有第一次按下会被处理
+    # （只记录匹配到的键，普通打字时字典为空，不用查找）
+    if _held_keys:
+        held = _held_keys.get(key_name)
+        if held is not None:
+            now = _clock()
+            if now - held < _REPEAT_WINDOW:
+                _held_keys[key_name] = now
+                _input_stats['suppressed_repeats'] += 1
+                return
+            # 太久没有事件，说明漏掉了释放事件，按新的按键处理
+            del _held_keys[key_name]
+
+        # 按了别的键：取消等待松开的热键
+        _release_pending = None
+
+    # 正在录制快捷键：交给捕获会话，不触发已有热键
+    capture = _capture
+    if capture is not None:
+        if key_name:
+            _held_keys[key_name] = _clock()
+            capture._feed(key_name)
+        return
+
+    # 读取一次当前热键表快照：之后即使界面线程发布了新表，本次按键也只看这一份
+    table = _active_table
+
+    # 按键序列进行中：沿前缀树走一步，不匹配或超时则作为普通按键继续处理
+    node = _sequence_node
+    if node is not None:
+        _sequence_node = None
+        received = _clock()
+        if received - _sequence_time <= _sequence_timeout:
+            target = node.get((_pressed_mask, key_name))
+            if target is not None:
+                _advance(key_name, target, received, table)
+                return
+
+    # 没有任何热键使用这个键，直接放过（普通打字走这里）
+    if key_name not in table.bound_keys:
+        return
+
+    received = _clock()
 
     # 检查是否匹配已注册的热键
-    current_mod = '+'.join(sorted(_pressed_modifiers))
+    target = table.dispatch.get((_pressed_mask, key_name))
+    if target is not None:
+        _advance(key_name, target, received, table)
 
-    for shortcut_id, info in _hotkey_callbacks.items():
-        expected_mod = info['modifiers']
-        if expected_mod:
-            expected_mod_sorted = '+'.join(sorted(expected_mod.split('+')))
-        else:
-            expected_mod_sorted = ''
 
-        if current_mod == expected_mod_sorted and key_name == info['key']:
-            _trigger_callback(shortcut_id)
-            break
+def _advance(key_name, target, received, table):
+    """匹配到前缀树中的一项：中间节点等待下一步，叶子触发热键（或等待松开）"""
+    global _sequence_node, _sequence_time, _release_pending
+    _held_keys[key_name] = received
+    if target.__class__ is SequenceNode:
+        _sequence_node = target
+        _sequence_time = received
+    elif target in table.release_ids:
+        _release_pending = (key_name, target)
+    else:
+        _trigger_callback(target, received)
 
 
-def _on_release(key):
+def _on_release(key_name):
     """全局按键释放回调"""
-    global _pressed_modifiers
+    global _pressed_mask, _modifier_events, _release_pending
 
-    try:
-        key_name = key.char
-    except AttributeError:
-        key_name = str(key).replace('Key.', '')
+    if _modifier_check is not None:
+        _apply_modifier_check()
 
     # 移除修饰键
-    if key == keyboard.Key.ctrl or key == keyboard.Key.ctrl_l or key == keyboard.Key.ctrl_r:
-        _pressed_modifiers.discard('Ctrl')
-    elif key == keyboard.Key.alt or key == keyboard.Key.alt_l or key == keyboard.Key.alt_r:
-        _pressed_modifiers.discard('Alt')
-    elif key == keyboard.Key.shift or key == keyboard.Key.shift_l or key == keyboard.Key.shift_r:
-        _pressed_modifiers.discard('Shift')
-    elif key == keyboard.Key.cmd or key == keyboard.Key.cmd_l or key == keyboard.Key.cmd_r:
-        _pressed_modifiers.discard('Win')
-
-
-def _trigger_callback(shortcut_id):
-    """热键触发时的内部回调"""
-    current_time = time.time()
-
-    if shortcut_id in _last_trigger_time:
-        if current_time - _last_trigger_time[shortcut_id] < _TRIGGER_COOLDOWN:
-            print(f"Hotkey ignored (cooldown): {shortcut_id}")
-            return
+    bit = MODIFIER_KEYS.get(key_name)
+    if bit:
+        _pressed_mask &= ~bit
+        _modifier_events += 1
+        return
+
+    _held_keys.pop(key_name, None)
+
+    # 松开时触发的热键
+    pending = _release_pending
+    if pending is not None and pending[0] == key_name:
+        _release_pending = None
+        _trigger_callback(pending[1], _clock())
+
+
+def trigger(shortcut_id):
+    """
+    不经过键盘直接触发热键（如来自控制通道），与按键走同一个执行队列
+    Args:
+        shortcut_id: 热键 ID
+    Returns:
+        bool: 热键是否已注册
+    """
+    if shortcut_id not in _callbacks:
+        return False
+    _ensure_listener()
+    now = time.perf_counter()
+    _executor.submit(shortcut_id, now, now)
+    return True
+
 
-    _last_trigger_time[shortcut_id] = current_time
-    print(f">>> Hotkey triggered: {shortcut_id}")
+def _trigger_callback(shortcut_id, received=None):
+    """热键触发时的内部回调（钩子线程，只做入队）"""
+    _executor.submit(shortcut_id, time.perf_counter(), received)
 
-    # 调用注册的回调
-    if shortcut_id in _callbacks:
-        _callbacks[shortcut_id]()
+
+def _run_callback(shortcut_id, received, matched):
+    """在执行线程中调用注册的回调"""
+    trace = stats.begin(shortcut_id, received)
+    trace.mark('match', matched)
+    trace.mark('queue')
+    try:
+        log.info("Hotkey triggered: %s", shortcut_id)
+        callback = _callbacks.get(shortcut_id)
+        if callback:
+            callback()
+    finally:
+        stats.end()
+
+
+# 动作执行器：窗口查找和切换都在这里完成，不阻塞键盘钩子
+_executor = ActionExecutor(_run_callback)
+
+
+def get_executor_stats():
+    """
+    获取动作执行器的计数器
+    Returns:
+        dict: 队列深度、合并次数、入队到执行延迟等
+    """
+    return _executor.stats()
+
+
+stats.register_source('executor', get_executor_stats)
+stats.register_source('input', get_input_stats)
 
 
 def unregister(hwnd, shortcut_id):
     """注销热键"""
-    if shortcut_id in _hotkey_callbacks:
-        del _hotkey_callbacks[shortcut_id]
+    with _editing():
+        if shortcut_id in _hotkey_callbacks:
+            info = _hotkey_callbacks.pop(shortcut_id)
+            _unbind(shortcut_id, info['steps'], info['profile'])
+
+
+def reconcile(hwnd, shortcuts, make_callback=None):
+    """
+    把已注册的热键同步为期望的快捷键集合
+    只注册新增、注销删除、重新编译变更的条目，监听器和修饰键状态保持不变
+    Args:
+        hwnd: 窗口句柄
+        shortcuts: 期望的快捷键配置列表（包含 id, modifiers, key，可选 profile、then、trigger）
+        make_callback: 为快捷键生成回调的函数 make_callback(shortcut_id)，
+                       新增条目及尚无回调的条目会调用它
+    Returns:
+        dict: {'added': [...], 'removed': [...], 'changed': [...]}，值为快捷键 ID
+    """
+    desired = {s.get('id'): s for s in shortcuts}
+    with _editing():
+        removed = [sid for sid in _hotkey_callbacks if sid not in desired]
+        return apply_changes(hwnd, desired.values(), removed, make_callback)
+
+
+def apply_changes(hwnd, changed=(), removed=(), make_callback=None):
+    """
+    增量同步热键：只处理给出的条目，其他已注册的热键保持不变
+    所有变化在草稿上完成后一次发布，钩子线程只会看到同步前或同步后的完整表
+    Args:
+        hwnd: 窗口句柄
+        changed: 新增或修改的快捷键配置列表（没有 key 的条目视为删除）
+        removed: 删除的快捷键 ID 列表
+        make_callback: 同 reconcile()
+    Returns:
+        dict: {'added': [...], 'removed': [...], 'changed': [...]}，值为快捷键 ID
+    """
+    changed = list(changed)
+    invalid = [s.get('id') for s in changed if not (s.get('id') and s.get('key'))]
+    result = {'added': [], 'removed': [], 'changed': []}
+    with _editing():
+        for shortcut_id in list(removed) + invalid:
+            if shortcut_id in _hotkey_callbacks:
+                unregister(hwnd, shortcut_id)
+                _draft_callback_map().pop(shortcut_id, None)
+                result['removed'].append(shortcut_id)
+
+        for s in changed:
+            shortcut_id = s.get('id')
+            if not (shortcut_id and s.get('key')):
+                continue
+            modifiers = s.get('modifiers', '')
+            key = s['key']
+            profile = s.get('profile')
+            then = s.get('then')
+            on_release = s.get('trigger') == TRIGGER_RELEASE
+            current = _hotkey_callbacks.get(shortcut_id)
+
+            if current is None:
+                if not register(hwnd, shortcut_id, modifiers, key, profile, then, on_release):
+                    continue
+                result['added'].append(shortcut_id)
+            elif ((current['modifiers'], current['key'], current['profile'], current['then'], current['on_release'])
+                  != (modifiers, key, profile, tuple(shortcut_steps(s)[1:]), on_release)):
+                if not register(hwnd, shortcut_id, modifiers, key, profile, then, on_release):
+                    continue
+                result['changed'].append(shortcut_id)
+
+            # 没有变化的热键也可能还没有回调（之前注册时没有提供 make_callback）
+            if make_callback:
+                callbacks = _draft_callbacks if _draft_callbacks is not None else _callbacks
+                if shortcut_id not in callbacks:
+                    _draft_callback_map()[shortcut_id] = make_callback(shortcut_id)
+
+    return result
 
 
 def set_callback(shortcut_id, callback):
     """设置热键触发时的回调"""
-    _callbacks[shortcut_id] = callback
+    with _editing():
+        _draft_callback_map()[shortcut_id] = callback
 
 
 def unregister_all():
     """注销所有热键"""
-    global _listener, _pressed_modifiers
+    global _listener, _pressed_mask, _modifier_check, _active_table, _active_profile, _callbacks, _draft_callbacks, _release_pending
+    if _capture is not None:
+        _capture.end()
     if _listener:
         _listener.stop()
         _listener = None
-    _hotkey_callbacks.clear()
-    _callbacks.clear()
-    _last_trigger_time.clear()
-    _pressed_modifiers.clear()
+    _stop_watchdog()
+    _executor.stop()
+    with _write_lock:
+        _hotkey_callbacks.clear()
+        _draft_tables.clear()
+        _draft_callbacks = None
+        _callbacks = {}
+        _tables.clear()
+        _tables[None] = _active_table = HotkeyTable(None)
+        _active_profile = None
+    reset_sequence()
+    _held_keys.clear()
+    _release_pending = None
+    _pressed_mask = 0
+    _modifier_check = None
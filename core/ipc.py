@@ -0,0 +1,391 @@
+"""
+本地控制通道模块
+通过本地套接字接收按行分隔的 JSON 命令，供脚本和启动器直接切换窗口、批量管理快捷键
+支持 Unix 域套接字的平台使用 CONFIG_DIR/control.sock（仅当前用户可访问），否则监听
+127.0.0.1 的随机端口，端口号和随机令牌写入仅当前用户可读的 CONFIG_DIR/control.port，
+TCP 连接上的每个请求都必须带上该令牌
+
+请求:  {"cmd": "toggle", "id": 3, "token": "..."}
+响应:  {"ok": true, ...} 或 {"ok": false, "error": "..."}
+格式错误、过长或未授权的请求会收到错误响应，随后连接被关闭
+
+命令:
+    ping                              检查服务是否可用
+    list    [resolve]                 列出快捷键及解析到的目标窗口
+    toggle  id                        切换快捷键对应的窗口（与按键走同一个执行队列）
+    reload                            重新读取配置文件并同步热键
+    batch   [add] [remove]            一次往返完成批量添加/删除
+    profile [name]                    查询或切换配置方案（name 为 null 时只启用公共快捷键）
+"""
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import threading
+
+from core import config, hotkey, window as window_mgr
+from core.controller import get_controller
+from utils.logger import get_logger
+
+log = get_logger("ipc")
+
+SOCKET_NAME = 'control.sock'
+PORT_FILE_NAME = 'control.port'
+LOOPBACK = '127.0.0.1'
+# 单个请求行的最大字节数
+MAX_REQUEST_BYTES = 1024 * 1024
+
+
+def _use_unix_socket():
+    return hasattr(socket, 'AF_UNIX') and os.name != 'nt'
+
+
+def default_address():
+    """
+    默认控制地址
+    Returns:
+        str or tuple: Unix 套接字路径，或 (host, port)（服务未启动时 port 为 0）
+    """
+    if _use_unix_socket():
+        return os.path.join(config.CONFIG_DIR, SOCKET_NAME)
+    return (LOOPBACK, _read_port_file()[0])
+
+
+def _read_port_file():
+    """
+    读取 TCP 服务写下的端口号和令牌
+    Returns:
+        tuple: (port, token)，服务未启动时为 (0, None)
+    """
+    try:
+        with open(os.path.join(config.CONFIG_DIR, PORT_FILE_NAME), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return int(data['port']), str(data['token'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0, None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """一个连接可以连续发送多个请求，每行一个"""
+
+    def setup(self):
+        super().setup()
+        if self.connection.family != getattr(socket, 'AF_UNIX', None):
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        control = self.server.control
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+            if not line:
+                return
+            # 请求格式错误或未授权时回复错误并关闭连接，不再解析后续内容
+            if len(line) > MAX_REQUEST_BYTES:
+                self._reply({'ok': False, 'error': "request too long"})
+                return
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                self._reply({'ok': False, 'error': f"invalid json: {e}"})
+                return
+            if not isinstance(request, dict):
+                self._reply({'ok': False, 'error': "request must be an object"})
+                return
+            if not control.authorize(request):
+                self._reply({'ok': False, 'error': "unauthorized"})
+                return
+            self._reply(control.handle(request))
+
+    def _reply(self, response):
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixServer = None
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ControlServer:
+    """本地控制服务"""
+
+    def __init__(self, controller=None, address=None):
+        """
+        Args:
+            controller: 热键控制器，默认使用全局控制器
+            address: Unix 套接字路径或 (host, port)，默认见 default_address()
+        """
+        self.controller = controller or get_controller()
+        self.address = address if address is not None else (
+            default_address() if _use_unix_socket() else (LOOPBACK, 0))
+        self.request_count = 0
+        # TCP 监听时生成的随机令牌；Unix 套接字靠文件权限限制访问，为 None
+        self.token = None
+        self._server = None
+        self._thread = None
+        self._port_file = None
+        self._commands = {
+            'ping': self.cmd_ping,
+            'list': self.cmd_list,
+            'toggle': self.cmd_toggle,
+            'reload': self.cmd_reload,
+            'batch': self.cmd_batch,
+            'profile': self.cmd_profile,
+        }
+
+    def start(self):
+        """
+        开始监听
+        Returns:
+            str or tuple: 实际监听的地址
+        """
+        if self._server is not None:
+            return self.address
+
+        if isinstance(self.address, str):
+            self._remove_stale_socket(self.address)
+            os.makedirs(os.path.dirname(self.address) or '.', mode=0o700, exist_ok=True)
+            # 套接字文件在 bind 时按 umask 创建，先收紧 umask，避免 bind 之后再 chmod 的窗口期
+            old_umask = os.umask(0o177)
+            try:
+                server = _UnixServer(self.address, _Handler)
+            finally:
+                os.umask(old_umask)
+        else:
+            server = _TCPServer(self.address, _Handler)
+            self.address = server.server_address[:2]
+            self.token = secrets.token_hex(16)
+            if self.address[0] == LOOPBACK:
+                try:
+                    self._write_port_file(self.address[1], self.token)
+                except OSError:
+                    server.server_close()
+                    raise
+        server.control = self
+        self._server = server
+
+        self._thread = threading.Thread(target=server.serve_forever, name="control-server", daemon=True)
+        self._thread.start()
+        log.info("控制通道已启动: %s", self.address)
+        return self.address
+
+    def stop(self):
+        """停止监听并清理套接字文件"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+        self.token = None
+        for path in (self.address if isinstance(self.address, str) else None, self._port_file):
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self._port_file = None
+
+    def _remove_stale_socket(self, path):
+        """上次异常退出留下的套接字文件：无人监听则删除，有人监听说明已有实例在运行"""
+        if not os.path.exists(path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            os.remove(path)
+        else:
+            raise OSError(f"control socket already in use: {path}")
+        finally:
+            probe.close()
+
+    def _write_port_file(self, port, token):
+        """端口号和令牌写入只有当前用户可读的新文件（旧文件可能权限过宽，先删除）"""
+        config.ensure_config_dir()
+        path = os.path.join(config.CONFIG_DIR, PORT_FILE_NAME)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with open(fd, 'w', encoding='utf-8') as f:
+            json.dump({'port': port, 'token': token}, f)
+        self._port_file = path
+
+    def authorize(self, request):
+        """
+        校验并移除请求中的令牌
+        Args:
+            request: 请求字典
+        Returns:
+            bool: 是否允许处理该请求
+        """
+        supplied = request.pop('token', None)
+        if self.token is None:
+            return True
+        return isinstance(supplied, str) and hmac.compare_digest(supplied.encode('utf-8'), self.token.encode('utf-8'))
+
+    def handle(self, request):
+        """
+        处理一个请求
+        Args:
+            request: 请求字典，cmd 为命令名
+        Returns:
+            dict: 响应
+        """
+        self.request_count += 1
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': "request must be an object"}
+        command = self._commands.get(request.get('cmd'))
+        if command is None:
+            return {'ok': False, 'error': f"unknown command: {request.get('cmd')!r}"}
+        try:
+            result = command(request)
+        except (KeyError, TypeError, ValueError) as e:
+            return {'ok': False, 'error': f"bad request: {e}"}
+        except Exception as e:
+            log.error("处理控制命令 %s 失败: %s", request.get('cmd'), e)
+            return {'ok': False, 'error': str(e)}
+        response = {'ok': True}
+        response.update(result)
+        return response
+
+    def cmd_ping(self, request):
+        return {}
+
+    def cmd_list(self, request):
+        resolve = request.get('resolve', True)
+        shortcuts = config.get_store().shortcuts()
+        if resolve:
+            for s in shortcuts:
+                hwnds, method = self.controller.resolve(s.get('id'))
+                s['method'] = method
+                s['windows'] = [info for info in map(window_mgr.get_window_info, hwnds) if info]
+        return {'shortcuts': shortcuts}
+
+    def cmd_toggle(self, request):
+        shortcut_id = request['id']
+        if not hotkey.trigger(shortcut_id):
+            raise ValueError(f"shortcut {shortcut_id!r} is not registered")
+        return {'queued': True}
+
+    def cmd_reload(self, request):
+        store = config.get_store()
+        store.reload()
+        count = len(store.shortcuts())
+        # 配置变化事件通常已经同步了热键，控制器没有订阅配置时在这里补一次
+        self.controller.register_all_hotkeys()
+        return {'count': count}
+
+    def cmd_batch(self, request):
+        adds = request.get('add', [])
+        removes = request.get('remove', [])
+        if not isinstance(adds, list) or not all(isinstance(s, dict) for s in adds):
+            raise ValueError("add must be a list of objects")
+        if not isinstance(removes, list):
+            raise ValueError("remove must be a list of ids")
+        # 与保留下来的快捷键及本批中先添加的快捷键比较，有冲突时整批拒绝
+        removed_ids = set(removes)
+        existing = [s for s in config.get_store().shortcuts() if s.get('id') not in removed_ids]
+        for i, shortcut in enumerate(adds):
+            # 还没有分配 ID，用负数占位区分本批中的各项
+            candidate = dict(shortcut, id=-(i + 1))
+            conflicts = hotkey.find_conflicts(candidate, existing)
+            if conflicts:
+                raise ValueError(f"{shortcut.get('key')!r} conflicts with {conflicts}")
+            existing.append(candidate)
+        added, removed = config.apply_batch(adds, removes)
+        return {'added': added, 'removed': removed}
+
+
+    def cmd_profile(self, request):
+        if 'name' in request:
+            self.controller.switch_profile(request['name'])
+        return {'active': hotkey.get_active_profile(), 'profiles': config.get_profiles()}
+
+
+class ControlClient:
+    """控制通道客户端，连接可复用"""
+
+    def __init__(self, address=None, timeout=5.0, token=None):
+        """
+        Args:
+            address: Unix 套接字路径或 (host, port)，默认见 default_address()
+            timeout: 超时（秒）
+            token: 请求令牌，默认地址为 TCP 时从端口文件读取
+        """
+        if address is None and not _use_unix_socket():
+            port, saved_token = _read_port_file()
+            address = (LOOPBACK, port)
+            token = token or saved_token
+        self.address = address if address is not None else default_address()
+        self.token = token
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+
+    def connect(self):
+        if self._sock is not None:
+            return
+        if isinstance(self.address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            if not self.address[1]:
+                raise ConnectionRefusedError("control server is not running")
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.address)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+
+    def close(self):
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+            self._sock = None
+            self._reader = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, cmd, **params):
+        """
+        发送一个命令并等待响应
+        Args:
+            cmd: 命令名
+            params: 命令参数
+        Returns:
+            dict: 响应
+        """
+        self.connect()
+        params['cmd'] = cmd
+        if self.token:
+            params['token'] = self.token
+        self._sock.sendall(json.dumps(params, ensure_ascii=False).encode('utf-8') + b'\n')
+        line = self._reader.readline()
+        if not line:
+            self.close()
+            raise ConnectionError("control server closed the connection")
+        return json.loads(line)
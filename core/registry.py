@@ -0,0 +1,424 @@
+"""
+窗口注册表模块
+常驻内存的顶层窗口索引（按 hwnd / 类名 / 进程），由窗口事件增量维护，
+并定期全量同步一次作为兜底
+"""
+import threading
+
+from utils.logger import get_logger
+
+log = get_logger("registry")
+
+
+# 窗口事件类型
+EVENT_CREATE = 'create'
+EVENT_DESTROY = 'destroy'
+EVENT_RENAME = 'rename'
+EVENT_SHOW = 'show'
+EVENT_HIDE = 'hide'
+
+EVENTS = (EVENT_CREATE, EVENT_DESTROY, EVENT_RENAME, EVENT_SHOW, EVENT_HIDE)
+
+
+class WindowEventSource:
+    """
+    窗口事件源接口
+    start() 之后每个事件调用一次 callback(event, hwnd)
+    """
+
+    def start(self, callback):
+        """开始投递事件"""
+        raise NotImplementedError
+
+    def stop(self):
+        """停止投递事件"""
+        raise NotImplementedError
+
+
+class ScriptedEventSource(WindowEventSource):
+    """
+    内存事件源，事件由调用方手动发出（同步投递）
+    用于在非 Windows 环境驱动和测试注册表
+    """
+
+    def __init__(self):
+        self._callback = None
+
+    def start(self, callback):
+        self._callback = callback
+
+    def stop(self):
+        self._callback = None
+
+    def emit(self, event, hwnd):
+        """
+        发出一个事件
+        Args:
+            event: 事件类型（EVENT_*）
+            hwnd: 窗口句柄
+        """
+        if self._callback:
+            self._callback(event, hwnd)
+
+    def play(self, events):
+        """
+        依次发出一组事件
+        Args:
+            events: [(event, hwnd), ...]
+        """
+        for event, hwnd in events:
+            self.emit(event, hwnd)
+
+
+class WinEventHookSource(WindowEventSource):
+    """
+    基于 SetWinEventHook 的 Windows 事件源
+    在独立线程中运行消息循环，只投递顶层窗口自身的事件
+    """
+
+    _EVENT_MAP = {
+        0x8000: EVENT_CREATE,   # EVENT_OBJECT_CREATE
+        0x8001: EVENT_DESTROY,  # EVENT_OBJECT_DESTROY
+        0x8002: EVENT_SHOW,     # EVENT_OBJECT_SHOW
+        0x8003: EVENT_HIDE,     # EVENT_OBJECT_HIDE
+        0x800C: EVENT_RENAME,   # EVENT_OBJECT_NAMECHANGE
+    }
+
+    def __init__(self):
+        self._callback = None
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+
+    def start(self, callback):
+        self._callback = callback
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="win-event-hook", daemon=True)
+        self._thread.start()
+        self._ready.wait(2.0)
+
+    def stop(self):
+        import ctypes
+        if self._thread_id:
+            # WM_QUIT 结束消息循环
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, 0x0012, 0, 0)
+        if self._thread:
+            self._thread.join(2.0)
+        self._thread = None
+        self._thread_id = None
+        self._callback = None
+
+    def _run(self):
+        """事件钩子线程：注册钩子并运行消息循环"""
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        proc_type = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+        user32.GetAncestor.restype = wintypes.HWND
+
+        event_map = self._EVENT_MAP
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread_id, timestamp):
+            # 只关心窗口对象本身（OBJID_WINDOW / CHILDID_SELF），且为顶层窗口
+            if id_object != 0 or id_child != 0 or not hwnd:
+                return
+            if event != 0x8001 and user32.GetAncestor(hwnd, 2) != hwnd:  # GA_ROOT
+                return
+            callback = self._callback
+            if callback:
+                try:
+                    callback(event_map[event], hwnd)
+                except Exception as e:
+                    log.error("处理窗口事件失败: %s", e)
+
+        proc = proc_type(on_event)
+        flags = 0x0000 | 0x0002  # WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+        hooks = [
+            user32.SetWinEventHook(0x8000, 0x8003, 0, proc, 0, 0, flags),
+            user32.SetWinEventHook(0x800C, 0x800C, 0, proc, 0, 0, flags),
+        ]
+        self._thread_id = kernel32.GetCurrentThreadId()
+        self._ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+
+
+class WindowRegistry:
+    """
+    顶层窗口注册表
+    记录格式与 window.get_all_windows() 一致，另含 pid 和 visible 字段
+    """
+
+    def __init__(self, query, enumerate_handles, source=None, resync_interval=30.0, on_process_gone=None):
+        """
+        Args:
+            query: 查询单个窗口的函数 query(hwnd) -> dict or None，
+                   dict 包含 hwnd, title, class_name, pid, visible
+            enumerate_handles: 按 z-order 枚举所有顶层窗口句柄的函数
+            source: 窗口事件源（WindowEventSource），None 表示只靠定期全量同步
+            resync_interval: 全量同步间隔（秒），0 或 None 表示不定期同步
+            on_process_gone: 进程的最后一个窗口被移除时调用 on_process_gone(pid)
+                             （进程可能已退出，PID 之后可能被复用）
+        """
+        self._query = query
+        self._on_process_gone = on_process_gone
+        self._enumerate_handles = enumerate_handles
+        self._source = source
+        self._resync_interval = resync_interval
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._resync_thread = None
+
+        self._by_hwnd = {}
+        # 类名/进程 -> {hwnd: None}，用 dict 保持枚举顺序
+        self._by_class = {}
+        self._by_pid = {}
+        # 小写标题索引：hwnd -> 小写标题，小写标题 -> {hwnd: None}
+        self._lower_titles = {}
+        self._by_title = {}
+        self._sorted_titles = None
+        # 窗口加入注册表的顺序，用于按枚举顺序返回标题匹配结果
+        self._seq = {}
+        self._next_seq = 0
+        # 每次内容变化递增，便于调用方做缓存
+        self.version = 0
+        self.resync_count = 0
+        self.event_count = 0
+
+    def start(self):
+        """全量同步一次，然后开始接收事件和定期同步"""
+        self.resync()
+        if self._source:
+            self._source.start(self.handle_event)
+        if self._resync_interval:
+            self._stop_event.clear()
+            self._resync_thread = threading.Thread(
+                target=self._resync_loop, name="window-resync", daemon=True
+            )
+            self._resync_thread.start()
+
+    def stop(self):
+        """停止接收事件和定期同步"""
+        if self._source:
+            self._source.stop()
+        self._stop_event.set()
+        if self._resync_thread:
+            self._resync_thread.join(2.0)
+            self._resync_thread = None
+
+    def _resync_loop(self):
+        while not self._stop_event.wait(self._resync_interval):
+            try:
+                self.resync()
+            except Exception as e:
+                log.warning("全量同步失败: %s", e)
+
+    def resync(self):
+        """全量枚举并重建索引"""
+        records = []
+        for hwnd in self._enumerate_handles():
+            info = self._query(hwnd)
+            if info:
+                records.append(info)
+
+        with self._lock:
+            old_pids = list(self._by_pid)
+            self._by_hwnd.clear()
+            self._by_class.clear()
+            self._by_pid.clear()
+            self._lower_titles.clear()
+            self._by_title.clear()
+            self._sorted_titles = None
+            self._seq.clear()
+            self._next_seq = 0
+            for info in records:
+                self._add(info)
+            self.version += 1
+            self.resync_count += 1
+            if self._on_process_gone:
+                for pid in old_pids:
+                    if pid not in self._by_pid:
+                        self._on_process_gone(pid)
+
+    def handle_event(self, event, hwnd):
+        """
+        处理一个窗口事件
+        Args:
+            event: 事件类型（EVENT_*）
+            hwnd: 窗口句柄
+        """
+        self.event_count += 1
+        if event == EVENT_DESTROY:
+            with self._lock:
+                if self._remove(hwnd):
+                    self.version += 1
+            return
+
+        # 创建 / 改名 / 显示 / 隐藏：重新查询该窗口
+        info = self._query(hwnd)
+        with self._lock:
+            old = self._by_hwnd.get(hwnd)
+            if info is None:
+                if old is not None:
+                    self._remove(hwnd)
+                    self.version += 1
+                return
+            if old is not None:
+                if old == info:
+                    return
+                if old['class_name'] == info['class_name'] and old['pid'] == info['pid']:
+                    # 类名/进程未变，原地更新保持顺序
+                    self._by_hwnd[hwnd] = info
+                    if old['title'] != info['title']:
+                        self._unindex_title(hwnd)
+                        self._index_title(hwnd, info['title'])
+                    self.version += 1
+                    return
+                self._remove(hwnd)
+            self._add(info)
+            self.version += 1
+
+    def _add(self, info):
+        hwnd = info['hwnd']
+        self._by_hwnd[hwnd] = info
+        self._by_class.setdefault(info['class_name'], {})[hwnd] = None
+        self._by_pid.setdefault(info['pid'], {})[hwnd] = None
+        self._index_title(hwnd, info['title'])
+        self._seq[hwnd] = self._next_seq
+        self._next_seq += 1
+
+    def _index_title(self, hwnd, title):
+        """标题只在观察到时小写一次"""
+        lower = title.lower()
+        self._lower_titles[hwnd] = lower
+        bucket = self._by_title.get(lower)
+        if bucket is None:
+            self._by_title[lower] = {hwnd: None}
+            self._sorted_titles = None
+        else:
+            bucket[hwnd] = None
+
+    def _unindex_title(self, hwnd):
+        lower = self._lower_titles.pop(hwnd, None)
+        bucket = self._by_title.get(lower)
+        if bucket is not None:
+            bucket.pop(hwnd, None)
+            if not bucket:
+                del self._by_title[lower]
+                self._sorted_titles = None
+
+    def _remove(self, hwnd):
+        info = self._by_hwnd.pop(hwnd, None)
+        if info is None:
+            return False
+        self._unindex_title(hwnd)
+        self._seq.pop(hwnd, None)
+        for index, key in ((self._by_class, info['class_name']), (self._by_pid, info['pid'])):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(hwnd, None)
+                if not bucket:
+                    del index[key]
+        if self._on_process_gone and info['pid'] not in self._by_pid:
+            self._on_process_gone(info['pid'])
+        return True
+
+    @staticmethod
+    def _listed(info):
+        """是否属于 get_all_windows() 的结果（可见且有标题）"""
+        return info['visible'] and info['title']
+
+    def get(self, hwnd):
+        """
+        获取窗口记录
+        Returns:
+            dict or None: 窗口信息
+        """
+        return self._by_hwnd.get(hwnd)
+
+    def contains(self, hwnd):
+        """窗口是否存在于注册表中"""
+        return hwnd in self._by_hwnd
+
+    def windows(self):
+        """
+        获取所有可见且有标题的窗口
+        Returns:
+            list: 窗口信息列表
+        """
+        with self._lock:
+            return [info for info in self._by_hwnd.values() if self._listed(info)]
+
+    def windows_by_class(self, class_name):
+        """
+        获取指定类名的所有可见窗口
+        Returns:
+            list: 窗口信息列表
+        """
+        with self._lock:
+            bucket = self._by_class.get(class_name, ())
+            return [self._by_hwnd[h] for h in bucket if self._listed(self._by_hwnd[h])]
+
+    def windows_by_process(self, pid):
+        """
+        获取指定进程的所有可见窗口
+        Returns:
+            list: 窗口信息列表
+        """
+        with self._lock:
+            bucket = self._by_pid.get(pid, ())
+            return [self._by_hwnd[h] for h in bucket if self._listed(self._by_hwnd[h])]
+
+    def _sorted(self):
+        if self._sorted_titles is None:
+            self._sorted_titles = sorted(self._by_title)
+        return self._sorted_titles
+
+    def find_by_title(self, rule):
+        """
+        按编译后的标题规则查找所有可见窗口
+        结果按注册表版本缓存在规则上，窗口没有变化时重复查找不再扫描
+        Args:
+            rule: TitleRule
+        Returns:
+            list: 窗口句柄列表（按枚举顺序）
+        """
+        with self._lock:
+            key = (id(self), self.version)
+            hwnds = rule.cached(key)
+            if hwnds is None:
+                hwnds = []
+                for lower in rule.select(self._by_title.keys(), self._sorted):
+                    hwnds.extend(self._by_title[lower])
+                by_hwnd = self._by_hwnd
+                hwnds = [h for h in hwnds if self._listed(by_hwnd[h])]
+                if len(hwnds) > 1:
+                    hwnds.sort(key=self._seq.__getitem__)
+                rule.store(key, hwnds)
+            return list(hwnds)
+
+    def find_by_class(self, class_name):
+        """
+        查找指定类名的第一个可见窗口
+        Returns:
+            int or None: 窗口句柄
+        """
+        with self._lock:
+            for hwnd in self._by_class.get(class_name, ()):
+                if self._listed(self._by_hwnd[hwnd]):
+                    return hwnd
+        return None
@@ -0,0 +1,231 @@
+"""
+目标窗口解析模块
+按顺序尝试多种策略定位快捷键的目标窗口，成功的结果会被缓存，
+之后每次按键只做一次校验，慢路径只在目标窗口重建时才会再走
+"""
+from core import window as window_mgr
+
+
+# 窗口组类型
+GROUP_CLASS = 'class'
+GROUP_PROCESS = 'process'
+GROUP_LIST = 'list'
+
+# 解析方式（用于统计）
+METHOD_CACHE = 'cache'
+METHOD_HWND = 'hwnd'
+METHOD_PROCESS = 'process'
+METHOD_CLASS_TITLE = 'class_title'
+METHOD_CLASS = 'class'
+METHOD_TITLE = 'title'
+METHOD_MISS = 'miss'
+
+
+class TargetResolver:
+    """
+    单个快捷键的目标窗口解析器
+
+    解析顺序:
+        1. 缓存的 hwnd（校验窗口仍存在且类名、进程未变；只缓存在最好的一层上找到的窗口）
+        2. 配置中保存的 hwnd（同样校验类名）
+        3. 进程可执行文件 + 窗口类名
+        4. 窗口类名 + 标题规则
+        5. 只按窗口类名
+        6. 没有类名时只按标题规则
+    """
+
+    def __init__(self, shortcut):
+        """
+        Args:
+            shortcut: 快捷键配置（window_class, window_title, title_rule, process_name, hwnd）
+        Raises:
+            ValueError: 目标配置无效
+        """
+        if not isinstance(shortcut, dict):
+            raise ValueError(f"Target must be an object: {shortcut!r}")
+        for field in ('window_class', 'process_name'):
+            if shortcut.get(field) is not None and not isinstance(shortcut[field], str):
+                raise ValueError(f"{field} must be a string: {shortcut.get(field)!r}")
+        self.shortcut = dict(shortcut)
+        self.window_class = shortcut.get('window_class', '')
+        self.process_name = (shortcut.get('process_name') or '').lower()
+        self.saved_hwnd = shortcut.get('hwnd')
+
+        # 标题规则在注册时编译一次；没有配置规则时按标题子串匹配
+        rule = shortcut.get('title_rule') or shortcut.get('window_title', '')
+        self.title_rule = window_mgr.compile_title_rule(rule)
+        if not self.title_rule.pattern:
+            self.title_rule = None
+
+        # 这个目标能达到的最好解析层
+        if self.window_class:
+            if self.process_name:
+                self._best_method = METHOD_PROCESS
+            elif self.title_rule:
+                self._best_method = METHOD_CLASS_TITLE
+            else:
+                self._best_method = METHOD_CLASS
+        else:
+            self._best_method = METHOD_TITLE
+
+        # 缓存的目标窗口身份 {hwnd, class_name, pid, method}
+        self._cached = None
+
+    def invalidate(self):
+        """丢弃缓存的目标窗口"""
+        self._cached = None
+
+    def _validate(self, hwnd, pid=None):
+        """
+        校验窗口是否仍是目标
+        Returns:
+            dict or None: 窗口身份
+        """
+        info = window_mgr.describe_window(hwnd)
+        if info is None:
+            return None
+        if self.window_class and info['class_name'] != self.window_class:
+            return None
+        if pid is not None and info['pid'] != pid:
+            return None
+        return info
+
+    def _remember(self, info, method):
+        self._cached = {'hwnd': info['hwnd'], 'class_name': info['class_name'], 'pid': info['pid'],
+                        'method': method}
+
+    def resolve(self):
+        """
+        解析目标窗口
+        Returns:
+            tuple: (hwnd or None, 解析方式)
+        """
+        cached = self._cached
+        # 退回到较低层找到的窗口不走缓存：更合适的窗口（如指定进程的窗口）出现后要改用它
+        if cached is not None and cached['method'] in (self._best_method, METHOD_HWND):
+            if self._validate(cached['hwnd'], cached['pid']):
+                return cached['hwnd'], METHOD_CACHE
+            self._cached = None
+
+        if self.saved_hwnd:
+            info = self._validate(self.saved_hwnd)
+            if info:
+                self._remember(info, METHOD_HWND)
+                return info['hwnd'], METHOD_HWND
+            # 保存的 hwnd 已失效（重启后几乎总是如此），不再尝试
+            self.saved_hwnd = None
+
+        if self.window_class:
+            candidates = window_mgr.find_windows_by_class(self.window_class)
+
+            if self.process_name:
+                for w in candidates:
+                    pid = w.get('pid')
+                    if pid is None:
+                        pid = window_mgr.get_window_pid(w['hwnd'])
+                    if window_mgr.get_process_name(pid) == self.process_name:
+                        return self._found(w, METHOD_PROCESS)
+
+            if self.title_rule:
+                for w in candidates:
+                    if self.title_rule.matches(w['title']):
+                        return self._found(w, METHOD_CLASS_TITLE)
+
+            if candidates:
+                return self._found(candidates[0], METHOD_CLASS)
+
+        elif self.title_rule:
+            hwnd = window_mgr.find_window_by_title(self.title_rule)
+            if hwnd:
+                info = window_mgr.describe_window(hwnd)
+                if info:
+                    self._remember(info, METHOD_TITLE)
+                return hwnd, METHOD_TITLE
+
+        return None, METHOD_MISS
+
+    def _found(self, window, method):
+        info = window_mgr.describe_window(window['hwnd'])
+        if info is None:
+            return None, METHOD_MISS
+        self._remember(info, method)
+        return info['hwnd'], method
+
+
+class GroupResolver:
+    """
+    窗口组解析器
+    快捷键配置中的 group 字段:
+        {'type': 'class', 'value': 窗口类名}        该类的所有窗口
+        {'type': 'process', 'value': 可执行文件名}  该进程的所有窗口
+        {'type': 'list', 'windows': [目标配置, ...]} 明确列出的窗口，每个按 TargetResolver 解析
+    """
+
+    def __init__(self, shortcut):
+        """
+        Args:
+            shortcut: 包含 group 字段的快捷键配置
+        Raises:
+            ValueError: 窗口组配置无效
+        """
+        self.shortcut = dict(shortcut)
+        group = shortcut['group']
+        if not isinstance(group, dict):
+            raise ValueError(f"Window group must be an object: {group!r}")
+        self.group_type = group.get('type')
+        self.value = group.get('value', '')
+        self.members = []
+
+        if self.group_type == GROUP_LIST:
+            windows = group.get('windows', [])
+            if not isinstance(windows, list):
+                raise ValueError(f"Window group windows must be a list: {windows!r}")
+            self.members = [TargetResolver(m) for m in windows]
+        elif self.group_type not in (GROUP_CLASS, GROUP_PROCESS):
+            raise ValueError(f"Unknown window group type: {self.group_type}")
+        elif not isinstance(self.value, str):
+            raise ValueError(f"Window group value must be a string: {self.value!r}")
+        elif self.group_type == GROUP_PROCESS:
+            self.value = self.value.lower()
+
+    def invalidate(self):
+        """丢弃成员的缓存"""
+        for member in self.members:
+            member.invalidate()
+
+    def resolve(self):
+        """
+        解析组内所有窗口
+        Returns:
+            tuple: (窗口句柄列表, 解析方式)
+        """
+        if self.group_type == GROUP_CLASS:
+            hwnds = [w['hwnd'] for w in window_mgr.find_windows_by_class(self.value)]
+        elif self.group_type == GROUP_PROCESS:
+            hwnds = []
+            for w in window_mgr.get_all_windows():
+                pid = w.get('pid')
+                if pid is None:
+                    pid = window_mgr.get_window_pid(w['hwnd'])
+                if window_mgr.get_process_name(pid) == self.value:
+                    hwnds.append(w['hwnd'])
+        else:
+            hwnds = []
+            for member in self.members:
+                hwnd, _ = member.resolve()
+                if hwnd and hwnd not in hwnds:
+                    hwnds.append(hwnd)
+        return hwnds, f"group_{self.group_type}" if hwnds else METHOD_MISS
+
+
+def create_resolver(shortcut):
+    """
+    根据快捷键配置创建解析器
+    Returns:
+        TargetResolver or GroupResolver
+    Raises:
+        ValueError: 配置无效
+    """
+    if shortcut.get('group'):
+        return GroupResolver(shortcut)
+    return TargetResolver(shortcut)
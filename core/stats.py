@@ -0,0 +1,243 @@
+"""
+热键延迟统计模块
+记录一次热键触发在各阶段的耗时，按快捷键汇总为固定分桶直方图，可按需导出 JSON 快照
+
+阶段:
+    match    钩子收到按键 → 匹配到快捷键
+    queue    匹配 → 执行线程开始处理
+    resolve  开始处理 → 找到目标窗口
+    toggle   找到窗口 → ShowWindow / SetForegroundWindow 返回
+    total    钩子收到按键 → 处理完成
+"""
+import bisect
+import json
+import os
+import threading
+import time
+
+
+STAGES = ('match', 'queue', 'resolve', 'toggle', 'total')
+
+# 直方图分桶上界（微秒），最后一个桶收集所有更大的值
+BUCKETS_US = (
+    50, 100, 250, 500,
+    1000, 2500, 5000, 10000, 25000, 50000,
+    100000, 250000, 500000, 1000000,
+)
+
+
+class Histogram:
+    """固定分桶直方图"""
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_US) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        """记录一个耗时（秒）"""
+        us = seconds * 1e6
+        self.counts[bisect.bisect_left(BUCKETS_US, us)] += 1
+        self.count += 1
+        self.total += us
+        if us > self.max:
+            self.max = us
+
+    def percentile(self, p):
+        """
+        估算分位数（返回所在桶的上界，微秒）
+        Args:
+            p: 0~100
+        """
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100.0
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target and c:
+                return float(BUCKETS_US[i]) if i < len(BUCKETS_US) else self.max
+        return self.max
+
+    def to_dict(self):
+        """转换为可序列化的字典（时间单位：微秒）"""
+        counts = list(self.counts)
+        return {
+            'count': self.count,
+            'avg_us': self.total / self.count if self.count else 0.0,
+            'max_us': self.max,
+            'p50_us': self.percentile(50),
+            'p90_us': self.percentile(90),
+            'p99_us': self.percentile(99),
+            'buckets_us': list(BUCKETS_US),
+            'counts': counts,
+        }
+
+
+# shortcut_id -> {stage: Histogram}
+_histograms = {}
+# shortcut_id -> {name: count}，如窗口查找方式
+_counters = {}
+# 附加到快照中的其他统计来源: name -> 函数
+_sources = {}
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def record(shortcut_id, stage, seconds):
+    """
+    记录一个阶段耗时
+    Args:
+        shortcut_id: 快捷键 ID
+        stage: 阶段名
+        seconds: 耗时（秒）
+    """
+    stages = _histograms.get(shortcut_id)
+    if stages is None:
+        with _lock:
+            stages = _histograms.setdefault(shortcut_id, {})
+    hist = stages.get(stage)
+    if hist is None:
+        with _lock:
+            hist = stages.setdefault(stage, Histogram())
+    hist.add(seconds)
+
+
+def count(shortcut_id, name):
+    """
+    计数加一
+    Args:
+        shortcut_id: 快捷键 ID
+        name: 计数项名称
+    """
+    with _lock:
+        counters = _counters.setdefault(shortcut_id, {})
+        counters[name] = counters.get(name, 0) + 1
+
+
+class Trace:
+    """一次热键触发的计时，mark() 记录从上一个阶段到现在的耗时"""
+    __slots__ = ('shortcut_id', 'start', 'last')
+
+    def __init__(self, shortcut_id, start):
+        self.shortcut_id = shortcut_id
+        self.start = start
+        self.last = start
+
+    def mark(self, stage, now=None):
+        """
+        结束一个阶段
+        Args:
+            stage: 阶段名
+            now: 阶段结束时间（time.perf_counter），默认取当前时间
+        """
+        if now is None:
+            now = time.perf_counter()
+        record(self.shortcut_id, stage, now - self.last)
+        self.last = now
+
+    def finish(self):
+        """记录总耗时"""
+        record(self.shortcut_id, 'total', time.perf_counter() - self.start)
+
+
+def begin(shortcut_id, start):
+    """
+    开始当前线程上的一次触发计时
+    Args:
+        shortcut_id: 快捷键 ID
+        start: 钩子收到按键的时间（time.perf_counter）
+    Returns:
+        Trace: 计时对象
+    """
+    trace = Trace(shortcut_id, start)
+    _local.trace = trace
+    return trace
+
+
+def end():
+    """结束当前线程上的计时并记录总耗时"""
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.finish()
+        _local.trace = None
+
+
+def current():
+    """
+    获取当前线程上的计时对象
+    Returns:
+        Trace or None
+    """
+    return getattr(_local, 'trace', None)
+
+
+def mark(stage):
+    """结束当前计时的一个阶段（当前线程没有计时时忽略）"""
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.mark(stage)
+
+
+def register_source(name, func):
+    """
+    注册附加统计来源，快照中以 name 为键包含 func() 的返回值
+    Args:
+        name: 名称
+        func: 返回可序列化数据的函数
+    """
+    _sources[name] = func
+
+
+def snapshot():
+    """
+    获取统计快照
+    Returns:
+        dict: {'generated_at', 'shortcuts': {id: {'stages', 'counters'}}, ...附加来源}
+    """
+    with _lock:
+        ids = set(_histograms) | set(_counters)
+        shortcuts = {}
+        for shortcut_id in ids:
+            stages = _histograms.get(shortcut_id, {})
+            shortcuts[str(shortcut_id)] = {
+                'stages': {stage: stages[stage].to_dict() for stage in STAGES if stage in stages},
+                'counters': dict(_counters.get(shortcut_id, {})),
+            }
+
+    data = {
+        'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'shortcuts': shortcuts,
+    }
+    for name, func in _sources.items():
+        try:
+            data[name] = func()
+        except Exception as e:
+            data[name] = {'error': str(e)}
+    return data
+
+
+def export(path=None):
+    """
+    把统计快照写入 JSON 文件
+    Args:
+        path: 文件路径，默认为配置目录下的 stats.json
+    Returns:
+        str: 文件路径
+    """
+    if path is None:
+        from core.config import CONFIG_DIR
+        path = os.path.join(CONFIG_DIR, 'stats.json')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot(), f, indent=2, ensure_ascii=False)
+    return path
+
+
+def reset():
+    """清空所有统计"""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
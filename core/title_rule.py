@@ -0,0 +1,139 @@
+"""
+窗口标题匹配规则
+规则在注册快捷键时编译一次，查找时直接使用窗口注册表的小写标题索引
+"""
+import bisect
+import fnmatch
+import re
+
+
+RULE_SUBSTRING = 'substring'
+RULE_PREFIX = 'prefix'
+RULE_GLOB = 'glob'
+RULE_REGEX = 'regex'
+
+RULE_TYPES = (RULE_SUBSTRING, RULE_PREFIX, RULE_GLOB, RULE_REGEX)
+
+_GLOB_SPECIAL = re.compile(r'[*?\[]')
+
+
+class TitleRule:
+    """
+    编译后的标题规则（大小写不敏感）
+    """
+    __slots__ = ('rule_type', 'pattern', '_needle', '_regex', '_prefix', '_cache_key', '_cache')
+
+    def __init__(self, rule_type, pattern):
+        """
+        Args:
+            rule_type: 规则类型（substring / prefix / glob / regex）
+            pattern: 匹配模式
+        Raises:
+            ValueError: 未知的规则类型、模式不是字符串或无效的正则表达式
+        """
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"Unknown title rule type: {rule_type}")
+        if not isinstance(pattern, str):
+            raise ValueError(f"Title rule pattern must be a string: {pattern!r}")
+        self.rule_type = rule_type
+        self.pattern = pattern
+        self._needle = pattern.lower()
+        self._regex = None
+        # glob / prefix 可以先按字面前缀缩小候选范围
+        self._prefix = ''
+
+        if rule_type == RULE_PREFIX:
+            self._prefix = self._needle
+        elif rule_type == RULE_GLOB:
+            self._regex = re.compile(fnmatch.translate(self._needle), re.DOTALL)
+            m = _GLOB_SPECIAL.search(self._needle)
+            self._prefix = self._needle[:m.start()] if m else self._needle
+        elif rule_type == RULE_REGEX:
+            try:
+                self._regex = re.compile(pattern, re.IGNORECASE)
+            except re.error as e:
+                raise ValueError(f"Invalid title regex {pattern!r}: {e}")
+
+        self._cache_key = None
+        self._cache = None
+
+    def __repr__(self):
+        return f"TitleRule({self.rule_type!r}, {self.pattern!r})"
+
+    def to_dict(self):
+        """转换为配置文件中的格式"""
+        return {'type': self.rule_type, 'pattern': self.pattern}
+
+    def matches_lower(self, lower_title):
+        """
+        判断已小写的标题是否匹配
+        Args:
+            lower_title: 小写标题
+        """
+        if self.rule_type == RULE_SUBSTRING:
+            return self._needle in lower_title
+        if self.rule_type == RULE_PREFIX:
+            return lower_title.startswith(self._needle)
+        if self.rule_type == RULE_GLOB:
+            return self._regex.match(lower_title) is not None
+        return self._regex.search(lower_title) is not None
+
+    def matches(self, title):
+        """判断标题是否匹配"""
+        return self.matches_lower(title.lower())
+
+    def select(self, distinct_titles, sorted_titles):
+        """
+        从标题索引中挑出匹配的标题
+        Args:
+            distinct_titles: 所有不重复的小写标题
+            sorted_titles: 排好序的不重复小写标题（仅在需要时调用的函数）
+        Returns:
+            list: 匹配的小写标题
+        """
+        if self._prefix:
+            titles = sorted_titles()
+            lo = bisect.bisect_left(titles, self._prefix)
+            hi = bisect.bisect_left(titles, self._prefix + '\U0010ffff')
+            candidates = titles[lo:hi]
+            if self.rule_type == RULE_PREFIX:
+                return candidates
+        else:
+            candidates = distinct_titles
+        return [t for t in candidates if self.matches_lower(t)]
+
+    def cached(self, key):
+        """
+        获取上次查找的结果
+        Args:
+            key: 缓存键（注册表与其版本号）
+        Returns:
+            list or None: 缓存的窗口句柄列表，失效时返回 None
+        """
+        if self._cache_key == key:
+            return self._cache
+        return None
+
+    def store(self, key, hwnds):
+        """保存查找结果"""
+        self._cache_key = key
+        self._cache = hwnds
+
+
+def compile_title_rule(rule):
+    """
+    编译标题规则
+    Args:
+        rule: 字符串（按子串匹配）、{'type': ..., 'pattern': ...} 或 TitleRule
+    Returns:
+        TitleRule: 编译后的规则
+    Raises:
+        ValueError: 规则无效
+    """
+    if isinstance(rule, TitleRule):
+        return rule
+    if isinstance(rule, str):
+        return TitleRule(RULE_SUBSTRING, rule)
+    if not isinstance(rule, dict):
+        raise ValueError(f"title rule must be a string or an object: {rule!r}")
+    return TitleRule(rule.get('type', RULE_SUBSTRING), rule.get('pattern', ''))
@@ -2,37 +2,119 @@
 窗口管理模块
 负责窗口枚举、toggle 功能
 """
-import win32gui
-import win32con
-import win32process
+from core import stats
+from core.backend import get_backend, SW_SHOWMINIMIZED, SW_SHOWMAXIMIZED, SW_MINIMIZE, SW_RESTORE
+from core.registry import WindowRegistry
+from core.title_rule import compile_title_rule
+from utils.logger import get_logger
 
+log = get_logger("toggle")
 
-def get_all_windows():
+
+# 常驻窗口注册表，未启动时退化为每次枚举
+_registry = None
+# 进程 ID -> 可执行文件名（小写）
+# 只在注册表运行时缓存：进程的最后一个窗口消失时删除，PID 被新进程复用后重新查询
+_process_names = {}
+
+
+def _enumerate_handles():
+    """按 z-order 枚举所有顶层窗口句柄"""
+    return get_backend().enumerate_windows()
+
+
+def _query_window(hwnd):
     """
-    获取所有可见顶层窗口
+    查询单个窗口的注册表记录
     Returns:
-        list: 窗口信息列表，每个元素为 (hwnd, title, class_name)
+        dict or None: 窗口不存在时返回 None
+    """
+    b = get_backend()
+    if not b.is_window(hwnd):
+        return None
+    return {
+        'hwnd': hwnd,
+        'title': b.get_window_text(hwnd),
+        'class_name': b.get_class_name(hwnd),
+        'pid': b.get_window_pid(hwnd),
+        'visible': b.is_window_visible(hwnd)
+    }
+
+
+def start_registry(source=None, resync_interval=30.0):
+    """
+    启动常驻窗口注册表，之后的查找直接命中索引
+    Args:
+        source: 窗口事件源，默认使用平台后端提供的事件源
+        resync_interval: 全量同步间隔（秒）
+    Returns:
+        WindowRegistry: 注册表实例
+    """
+    global _registry
+    stop_registry()
+    if source is None:
+        source = get_backend().window_event_source()
+    registry = WindowRegistry(_query_window, _enumerate_handles, source, resync_interval,
+                              on_process_gone=_forget_process)
+    registry.start()
+    _registry = registry
+    return registry
+
+
+def stop_registry():
+    """停止常驻窗口注册表"""
+    global _registry
+    if _registry is not None:
+        _registry.stop()
+        _registry = None
+    _process_names.clear()
+
+
+def get_registry():
+    """
+    获取当前的窗口注册表
+    Returns:
+        WindowRegistry or None: 未启动时为 None
+    """
+    return _registry
+
+
+def iter_windows():
     """
-    windows = []
+    逐个产出可见顶层窗口，调用方可以边枚举边处理
+    Yields:
+        dict: 窗口信息 {hwnd, title, class_name}
+    """
+    if _registry is not None:
+        yield from _registry.windows()
+        return
 
-    def enum_callback(hwnd, _):
-        if not win32gui.IsWindowVisible(hwnd):
-            return True
+    b = get_backend()
+    for hwnd in b.enumerate_windows():
+        if not b.is_window_visible(hwnd):
+            continue
 
-        title = win32gui.GetWindowText(hwnd)
+        title = b.get_window_text(hwnd)
         if not title:
-            return True
+            continue
 
-        class_name = win32gui.GetClassName(hwnd)
-        windows.append({
+        class_name = b.get_class_name(hwnd)
+        yield {
             'hwnd': hwnd,
             'title': title,
             'class_name': class_name
-        })
-        return True
+        }
 
-    win32gui.EnumWindows(enum_callback, None)
-    return windows
+
+def get_all_windows():
+    """
+    获取所有可见顶层窗口
+    Returns:
+        list: 窗口信息列表，每个元素为 (hwnd, title, class_name)
+    """
+    if _registry is not None:
+        return _registry.windows()
+    return list(iter_windows())
 
 
 def get_window_info(hwnd):
@@ -43,13 +125,14 @@ def get_window_info(hwnd):
     Returns:
         dict: 窗口信息
     """
-    if not win32gui.IsWindow(hwnd):
+    b = get_backend()
+    if not b.is_window(hwnd):
         return None
 
     return {
         'hwnd': hwnd,
-        'title': win32gui.GetWindowText(hwnd),
-        'class_name': win32gui.GetClassName(hwnd)
+        'title': b.get_window_text(hwnd),
+        'class_name': b.get_class_name(hwnd)
     }
 
 
@@ -78,7 +161,7 @@ def is_window_minimized(hwnd):
     Returns:
         bool: 是否最小化
     """
-    return win32gui.IsIconic(hwnd)
+    return get_backend().is_iconic(hwnd)
 
 
 def is_window_visible(hwnd):
@@ -89,7 +172,8 @@ def is_window_visible(hwnd):
     Returns:
         bool: 是否可见
     """
-    return win32gui.IsWindowVisible(hwnd) and not win32gui.IsIconic(hwnd)
+    b = get_backend()
+    return b.is_window_visible(hwnd) and not b.is_iconic(hwnd)
 
 
 def is_valid_window(hwnd):
@@ -102,7 +186,7 @@ def is_valid_window(hwnd):
     """
     if not hwnd:
         return False
-    return win32gui.IsWindow(hwnd)
+    return get_backend().is_window(hwnd)
 
 
 def toggle_window(hwnd):
@@ -115,31 +199,60 @@ def toggle_window(hwnd):
     Returns:
         bool: 操作是否成功
     """
-    if not win32gui.IsWindow(hwnd):
+    b = get_backend()
+    if not b.is_window(hwnd):
         return False
 
     # 使用 GetWindowPlacement 更精确地判断窗口状态
-    # placement[0] = flags, placement[1] = showCmd
     # SW_SHOWNORMAL=1, SW_SHOWMINIMIZED=2, SW_SHOWMAXIMIZED=3
-    placement = win32gui.GetWindowPlacement(hwnd)
-    show_cmd = placement[1]
-    
+    show_cmd = b.get_show_cmd(hwnd)
+
     # 判断是否最小化
-    minimized = (show_cmd == win32con.SW_SHOWMINIMIZED)
-    print(f"[toggle] hwnd={hwnd}, showCmd={show_cmd}, minimized={minimized}")
+    minimized = (show_cmd == SW_SHOWMINIMIZED)
+    log.debug("hwnd=%s, showCmd=%s, minimized=%s", hwnd, show_cmd, minimized)
 
     if minimized:
         # 最小化 → 恢复并激活 (先最大化再正常，保证窗口回到之前的状态)
-        if show_cmd == win32con.SW_SHOWMAXIMIZED:
-            win32gui.ShowWindow(hwnd, win32con.SW_SHOWMAXIMIZED)
+        if show_cmd == SW_SHOWMAXIMIZED:
+            b.show_window(hwnd, SW_SHOWMAXIMIZED)
         else:
-            win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
-        win32gui.SetForegroundWindow(hwnd)
-        print(f"[toggle] Restored window")
+            b.show_window(hwnd, SW_RESTORE)
+        b.set_foreground_window(hwnd)
+        stats.mark('toggle')
+        log.info("Restored window %s", hwnd)
     else:
         # 正常/最大化 → 最小化
-        win32gui.ShowWindow(hwnd, win32con.SW_MINIMIZE)
-        print(f"[toggle] Minimized window")
+        b.show_window(hwnd, SW_MINIMIZE)
+        stats.mark('toggle')
+        log.info("Minimized window %s", hwnd)
+
+    return True
+
+
+def toggle_group(hwnds):
+    """
+    把一组窗口作为整体切换
+    整组只做一次判断：全部最小化时恢复整组并放到最前，否则最小化整组
+    Args:
+        hwnds: 窗口句柄列表（第一个窗口恢复后成为前台窗口）
+    Returns:
+        bool: 是否有窗口被操作
+    """
+    b = get_backend()
+    hwnds = [h for h in hwnds if h and b.is_window(h)]
+    if not hwnds:
+        return False
+
+    minimized = all(b.get_show_cmd(h) == SW_SHOWMINIMIZED for h in hwnds)
+    log.info("group of %d, minimized=%s", len(hwnds), minimized)
+
+    if minimized:
+        # 整组恢复，再一次性调整 z-order 并激活第一个窗口
+        b.show_windows(hwnds, SW_RESTORE)
+        b.bring_to_front(hwnds)
+    else:
+        b.show_windows(hwnds, SW_MINIMIZE)
+    stats.mark('toggle')
 
     return True
 
@@ -152,6 +265,9 @@ def find_window_by_class(window_class):
     Returns:
         int or None: 窗口句柄
     """
+    if _registry is not None:
+        return _registry.find_by_class(window_class)
+
     windows = get_all_windows()
     for w in windows:
         if w['class_name'] == window_class:
@@ -159,19 +275,120 @@ def find_window_by_class(window_class):
     return None
 
 
+def find_windows_by_class(window_class):
+    """
+    获取指定类名的所有可见窗口
+    Args:
+        window_class: 窗口类名
+    Returns:
+        list: 窗口信息列表（按枚举顺序）
+    """
+    if _registry is not None:
+        return _registry.windows_by_class(window_class)
+
+    return [w for w in get_all_windows() if w['class_name'] == window_class]
+
+
+def get_window_pid(hwnd):
+    """
+    获取窗口所属进程 ID
+    Args:
+        hwnd: 窗口句柄
+    Returns:
+        int: 进程 ID
+    """
+    if _registry is not None:
+        info = _registry.get(hwnd)
+        if info is not None:
+            return info['pid']
+    return get_backend().get_window_pid(hwnd)
+
+
+def get_process_name(pid):
+    """
+    获取进程的可执行文件名（小写，不含路径）
+    Args:
+        pid: 进程 ID
+    Returns:
+        str: 如 "code.exe"，无法获取时为空字符串
+    """
+    name = _process_names.get(pid)
+    if name is None:
+        path = get_backend().get_process_path(pid)
+        name = path.replace('\\', '/').rsplit('/', 1)[-1].lower() if path else ''
+        # 没有注册表时得不到窗口销毁通知，无法发现 PID 被复用，不缓存
+        if name and _registry is not None:
+            _process_names[pid] = name
+    return name
+
+
+def _forget_process(pid):
+    """进程的窗口都已消失：删除缓存的进程名"""
+    _process_names.pop(pid, None)
+
+
+def describe_window(hwnd):
+    """
+    获取校验缓存所需的窗口身份（类名和进程）
+    Args:
+        hwnd: 窗口句柄
+    Returns:
+        dict or None: {hwnd, class_name, pid}，窗口不存在时返回 None
+    """
+    if _registry is not None:
+        info = _registry.get(hwnd)
+        if info is not None:
+            return info
+    b = get_backend()
+    if not hwnd or not b.is_window(hwnd):
+        return None
+    return {
+        'hwnd': hwnd,
+        'class_name': b.get_class_name(hwnd),
+        'pid': b.get_window_pid(hwnd)
+    }
+
+
+def find_windows_by_process(pid):
+    """
+    获取指定进程的所有可见窗口
+    Args:
+        pid: 进程 ID
+    Returns:
+        list: 窗口信息列表
+    """
+    if _registry is not None:
+        return _registry.windows_by_process(pid)
+
+    b = get_backend()
+    return [w for w in get_all_windows() if b.get_window_pid(w['hwnd']) == pid]
+
+
+def find_windows_by_title(rule):
+    """
+    通过标题规则查找所有匹配的窗口
+    Args:
+        rule: 标题字符串（子串匹配）、规则字典或编译后的 TitleRule
+    Returns:
+        list: 窗口句柄列表（按枚举顺序）
+    """
+    rule = compile_title_rule(rule)
+    if _registry is not None:
+        return _registry.find_by_title(rule)
+
+    return [w['hwnd'] for w in get_all_windows() if rule.matches(w['title'])]
+
+
 def find_window_by_title(title):
     """
-    通过窗口标题查找窗口（模糊匹配）
+    通过窗口标题查找窗口（默认模糊匹配）
     Args:
-        title: 窗口标题
+        title: 标题字符串、规则字典或编译后的 TitleRule
     Returns:
         int or None: 窗口句柄
     """
-    windows = get_all_windows()
-    for w in windows:
-        if title.lower() in w['title'].lower():
-            return w['hwnd']
-    return None
+    hwnds = find_windows_by_title(title)
+    return hwnds[0] if hwnds else None
 
 
 def activate_window(hwnd):
@@ -180,6 +397,7 @@ def activate_window(hwnd):
     Args:
         hwnd: 窗口句柄
     """
-    if win32gui.IsIconic(hwnd):
-        win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
-    win32gui.SetForegroundWindow(hwnd)
+    b = get_backend()
+    if b.is_iconic(hwnd):
+        b.show_window(hwnd, SW_RESTORE)
+    b.set_foreground_window(hwnd)
@@ -0,0 +1,106 @@
+"""
+Window Toggle 命令行控制工具
+通过本地控制通道操作正在运行的 Window Toggle
+
+用法:
+    python ctl.py list                  列出快捷键及解析到的窗口
+    python ctl.py toggle 3              切换快捷键 3 对应的窗口
+    python ctl.py reload                重新读取配置文件
+    python ctl.py remove 3 4            删除快捷键 3 和 4
+    python ctl.py batch changes.json    批量修改，文件格式 {"add": [...], "remove": [...]}，- 表示标准输入
+    python ctl.py profile [name]        查询或切换配置方案，--none 只启用公共快捷键
+"""
+import argparse
+import json
+import sys
+
+from core.hotkey import format_steps, shortcut_steps
+from core.ipc import ControlClient
+
+
+def format_row(s):
+    hotkey_str = format_steps(shortcut_steps(s))
+    target = s.get('window_title') or s.get('window_class') or ''
+    windows = s.get('windows')
+    if windows is None:
+        resolved = ''
+    elif windows:
+        resolved = f"-> {len(windows)} window(s) [{s.get('method')}] {windows[0]['title']}"
+    else:
+        resolved = "-> (not found)"
+    return f"{s.get('id'):>4}  {hotkey_str:<20} {target:<30} {resolved}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Window Toggle 控制工具")
+    parser.add_argument("--json", action="store_true", help="输出原始 JSON 响应")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("list", help="列出快捷键")
+    p.add_argument("--no-resolve", action="store_true", help="不解析目标窗口")
+    p = sub.add_parser("toggle", help="切换快捷键对应的窗口")
+    p.add_argument("ids", type=int, nargs="+")
+    sub.add_parser("reload", help="重新读取配置文件")
+    p = sub.add_parser("remove", help="删除快捷键")
+    p.add_argument("ids", type=int, nargs="+")
+    p = sub.add_parser("batch", help="批量添加/删除")
+    p.add_argument("file")
+    p = sub.add_parser("profile", help="查询或切换配置方案")
+    p.add_argument("name", nargs="?")
+    p.add_argument("--none", action="store_true", help="只启用公共快捷键")
+    sub.add_parser("ping", help="检查服务是否可用")
+    args = parser.parse_args(argv)
+
+    try:
+        with ControlClient() as client:
+            if args.command == "list":
+                responses = [client.request("list", resolve=not args.no_resolve)]
+            elif args.command == "toggle":
+                responses = [client.request("toggle", id=i) for i in args.ids]
+            elif args.command == "remove":
+                responses = [client.request("batch", remove=args.ids)]
+            elif args.command == "profile":
+                if args.none:
+                    responses = [client.request("profile", name=None)]
+                elif args.name:
+                    responses = [client.request("profile", name=args.name)]
+                else:
+                    responses = [client.request("profile")]
+            elif args.command == "batch":
+                if args.file == "-":
+                    changes = json.load(sys.stdin)
+                else:
+                    with open(args.file, 'r', encoding='utf-8') as f:
+                        changes = json.load(f)
+                responses = [client.request("batch", add=changes.get('add', []), remove=changes.get('remove', []))]
+            else:
+                responses = [client.request(args.command)]
+    except OSError as e:
+        print(f"无法连接到 Window Toggle: {e}", file=sys.stderr)
+        return 2
+
+    status = 0
+    for response in responses:
+        if args.json:
+            print(json.dumps(response, ensure_ascii=False))
+        elif not response.get('ok'):
+            print(f"错误: {response.get('error')}", file=sys.stderr)
+        elif args.command == "list":
+            for s in response['shortcuts']:
+                print(format_row(s))
+        elif args.command in ("remove", "batch"):
+            print(f"added: {[s['id'] for s in response['added']]}, removed: {response['removed']}")
+        elif args.command == "profile":
+            for name in response['profiles']:
+                print(f"{'*' if name == response['active'] else ' '} {name}")
+            if response['active'] is None:
+                print("* (公共)")
+        elif args.command == "reload":
+            print(f"reloaded {response['count']} shortcut(s)")
+        if not response.get('ok'):
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
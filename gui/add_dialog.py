@@ -2,10 +2,23 @@
 添加快捷键对话框模块
 负责捕获按键、显示窗口列表、保存配置
 """
+import queue
+import threading
+
 import customtkinter as ctk
-import tkinter as tk
-from pynput import keyboard
 from core import config, hotkey, window as window_mgr
+from gui.virtual_list import VirtualListbox
+from gui.window_picker import WindowRowModel
+from utils.logger import get_logger
+
+log = get_logger("gui")
+
+
+# 后台枚举每批发送的窗口数，以及 Tk 线程取批次的间隔（毫秒）
+ENUM_BATCH_SIZE = 100
+ENUM_POLL_MS = 15
+# Tk 线程处理其他线程投递的调用的间隔（毫秒）
+TASK_POLL_MS = 15
 
 
 class AddDialog:
@@ -21,11 +34,18 @@ class AddDialog:
         self.hwnd = hwnd
         self.on_close_callback = on_close_callback
         self.result = None
-        self.selected_hotkey = None
+        # 已录制的按键序列 [{'modifiers': ..., 'key': ...}, ...]
+        self.steps = []
         self.selected_window = None
         self.capture_mode = True  # True=捕获按键, False=选择窗口
-        self.listener = None
-        self.pressed_modifiers = set()  # 记录按下的修饰键
+        self.capture = None  # 热键模块的按键捕获会话
+        self.closed = False
+        # 后台窗口枚举
+        self.enumerating = False
+        self.enum_queue = queue.Queue()
+        self.enum_cancel = threading.Event()
+        # 键盘钩子线程投递给 Tk 线程的调用 (func, args)
+        self.tasks = queue.Queue()
 
         # 创建对话框
         self.dialog = ctk.CTkToplevel(parent)
@@ -33,11 +53,14 @@ class AddDialog:
         self.dialog.geometry("600x500")
         self.dialog.transient(parent)
         self.dialog.grab_set()
+        # 点窗口关闭按钮与取消相同：结束按键捕获，停止枚举
+        self.dialog.protocol("WM_DELETE_WINDOW", self.on_cancel)
 
         self.create_widgets()
+        self.dialog.after(TASK_POLL_MS, self._run_tasks)
 
         # 开始捕获键盘
-        self.start_keyboard_listener()
+        self.start_capture()
 
     def create_widgets(self):
         """创建界面元素"""
@@ -61,10 +84,29 @@ class AddDialog:
         # 说明
         info = ctk.CTkLabel(
             self.dialog,
-            text="例如: F1, Ctrl+F1, Alt+F2, Ctrl+Shift+F3",
+            text="例如: F1, Ctrl+F1, Alt+F2, Ctrl+Shift+F3；可以继续添加后续按键组成序列，如 Ctrl+Alt+W, T",
             font=ctk.CTkFont(size=12)
         )
-        info.pack(pady=(0, 20))
+        info.pack(pady=(0, 10))
+
+        # 录制按键序列的下一步（捕获到第一个组合键后可用）
+        self.next_step_button = ctk.CTkButton(
+            self.dialog,
+            text="+ 后续按键",
+            width=120,
+            command=self.on_next_step_click,
+            state="disabled"
+        )
+        self.next_step_button.pack(pady=(0, 10))
+
+        # 冲突提示
+        self.conflict_label = ctk.CTkLabel(
+            self.dialog,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color="#e74c3c"
+        )
+        self.conflict_label.pack()
 
         # 窗口列表框架（初始隐藏）
         self.window_frame = ctk.CTkFrame(self.dialog)
@@ -83,10 +125,13 @@ class AddDialog:
         scrollbar = ctk.CTkScrollbar(self.window_frame)
         scrollbar.pack(side="right", fill="y")
 
-        # 使用 tkinter Listbox 支持选中
-        self.window_listbox = tk.Listbox(
+        # 虚拟列表：只渲染可见行，行号直接映射到窗口
+        self.window_model = WindowRowModel()
+        self.window_list = VirtualListbox(
             self.window_frame,
-            yscrollcommand=scrollbar.set,
+            self.window_model,
+            scrollbar,
+            on_select=self.on_window_select,
             font=("Segoe UI", 12),
             bg="#1f1f1f",
             fg="white",
@@ -95,8 +140,7 @@ class AddDialog:
             bd=0,
             highlightthickness=0
         )
-        self.window_listbox.pack(side="left", fill="both", expand=True)
-        scrollbar.configure(command=self.window_listbox.yview)
+        self.window_list.pack(side="left", fill="both", expand=True)
 
         # 按钮框架
         button_frame = ctk.CTkFrame(self.dialog, fg_color="transparent")
@@ -123,180 +167,221 @@ class AddDialog:
         # 绑定 ESC 键
         self.dialog.bind("<Escape>", lambda e: self.on_cancel())
 
-    def start_keyboard_listener(self):
-        """启动键盘监听器"""
-        self.listener = keyboard.Listener(
-            on_press=self.on_key_press,
-            on_release=self.on_key_release
+    def start_capture(self):
+        """通过热键模块的键盘监听器捕获下一个组合键"""
+        # 回调在键盘钩子线程中调用，切回 Tk 线程处理
+        self.capture = hotkey.begin_capture(
+            on_chord=lambda chord: self.post(self.on_chord_captured, chord),
+            on_cancel=lambda: self.post(self.on_cancel)
         )
-        self.listener.start()
 
-    def on_key_press(self, key):
-        """键盘按键事件"""
-        if not self.capture_mode:
-            return
-
-        # ESC 取消
-        if key == keyboard.Key.esc:
-            self.on_cancel()
-            return
-
-        # 记录修饰键
-        if key in [keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r]:
-            self.pressed_modifiers.add('Shift')
-            return
-        elif key in [keyboard.Key.ctrl, keyboard.Key.ctrl_l, keyboard.Key.ctrl_r]:
-            self.pressed_modifiers.add('Ctrl')
-            return
-        elif key in [keyboard.Key.alt, keyboard.Key.alt_l, keyboard.Key.alt_r]:
-            self.pressed_modifiers.add('Alt')
-            return
-        elif key in [keyboard.Key.cmd, keyboard.Key.cmd_l, keyboard.Key.cmd_r]:
-            self.pressed_modifiers.add('Win')
+    def post(self, func, *args):
+        """
+        把调用投递到 Tk 线程（线程安全，对话框已关闭时忽略）
+        只放入队列、不调用 Tk：钩子线程不能等待 Tk 线程
+        """
+        if not self.closed:
+            self.tasks.put((func, args))
+
+    def _run_tasks(self):
+        """Tk 线程：执行投递的调用"""
+        while not self.closed:
+            try:
+                func, args = self.tasks.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception as e:
+                log.error("执行对话框任务失败: %s", e)
+        if not self.closed:
+            self.dialog.after(TASK_POLL_MS, self._run_tasks)
+
+    def steps_text(self):
+        """已录制的按键序列，如 "Ctrl+Alt+w, t" """
+        return hotkey.format_steps([(step['modifiers'], step['key']) for step in self.steps])
+
+    def on_chord_captured(self, chord):
+        """
+        捕获到组合键（按键序列的一步）
+        Args:
+            chord: {'modifiers': ..., 'key': ...}
+        """
+        if self.closed or not self.capture_mode:
             return
 
-        # 获取按键名称
-        try:
-            key_name = key.char
-        except AttributeError:
-            key_name = str(key).replace('Key.', '')
+        self.steps.append({
+            'modifiers': chord['modifiers'],
+            'key': chord['key']
+        })
 
-        if not key_name:
-            return
+        # 显示捕获的快捷键
+        self.hotkey_label.configure(text=self.steps_text(), text_color="green")
+        self.conflict_label.configure(text="")
 
-        # 获取当前按下的修饰键
-        mod_str = '+'.join(sorted(self.pressed_modifiers))
-        
-        # 格式化显示
-        if mod_str:
-            hotkey_str = f"{mod_str}+{key_name}"
-        else:
-            hotkey_str = key_name
+        self.capture_mode = False
+        self.capture = None
+        self.next_step_button.configure(state="normal")
 
-        self.selected_hotkey = {
-            'modifiers': mod_str,
-            'key': key_name
-        }
+        # 第一步捕获后切换到窗口选择
+        if len(self.steps) == 1:
+            self.show_window_list()
 
-        # 显示捕获的快捷键
-        self.hotkey_label.configure(text=hotkey_str, text_color="green")
+    def on_next_step_click(self):
+        """录制按键序列的下一步"""
+        if self.closed or self.capture_mode:
+            return
+        self.capture_mode = True
+        self.next_step_button.configure(state="disabled")
+        self.hotkey_label.configure(text=f"{self.steps_text()}, ...", text_color="gray")
+        self.capture = hotkey.begin_capture(
+            on_chord=lambda chord: self.post(self.on_chord_captured, chord),
+            on_cancel=lambda: self.post(self.on_next_step_cancelled)
+        )
 
-        # 切换到窗口选择模式
+    def on_next_step_cancelled(self):
+        """录制下一步时按了 ESC：保留已录制的步骤"""
+        if self.closed:
+            return
         self.capture_mode = False
-        self.show_window_list()
-
-    def on_key_release(self, key):
-        """键盘按键释放事件"""
-        if key in [keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r]:
-            self.pressed_modifiers.discard('Shift')
-        elif key in [keyboard.Key.ctrl, keyboard.Key.ctrl_l, keyboard.Key.ctrl_r]:
-            self.pressed_modifiers.discard('Ctrl')
-        elif key in [keyboard.Key.alt, keyboard.Key.alt_l, keyboard.Key.alt_r]:
-            self.pressed_modifiers.discard('Alt')
-        elif key in [keyboard.Key.cmd, keyboard.Key.cmd_l, keyboard.Key.cmd_r]:
-            self.pressed_modifiers.discard('Win')
+        self.capture = None
+        self.next_step_button.configure(state="normal")
+        self.hotkey_label.configure(text=self.steps_text(), text_color="green")
 
     def show_window_list(self):
         """显示窗口列表"""
-        # 停止键盘监听
-        if self.listener:
-            self.listener.stop()
-            self.listener = None
-        
-        # 清除修饰键状态
-        self.pressed_modifiers.clear()
-
         # 切换界面
         self.step_label.configure(text="步骤 2: 选择目标窗口")
         self.window_frame.pack(fill="both", expand=True, padx=20, pady=10)
 
-        # 枚举窗口
-        windows = window_mgr.get_all_windows()
-
-        # 按窗口类分组
-        groups = window_mgr.group_by_class(windows)
-
-        # 清空列表
-        self.window_listbox.delete(0, "end")
-
-        self.window_options = []
-
-        for class_name, wins in groups.items():
-            # 只显示有标题的窗口
-            valid_wins = [w for w in wins if w['title']]
-            if not valid_wins:
-                continue
-
-            # 添加分组标题
-            self.window_listbox.insert("end", f"--- {class_name} ---")
-            self.window_listbox.itemconfig(self.window_listbox.size() - 1, fg="#888888", selectbackground="#1f1f1f")
-
-            for w in valid_wins:
-                self.window_options.append(w)
-                self.window_listbox.insert("end", f"  {w['title']}")
-
-        # 绑定选择事件
-        self.window_listbox.bind("<<ListboxSelect>>", self.on_window_select)
+        # 在后台线程枚举窗口，分批交给 Tk 线程显示
+        self.window_model.set_windows([])
+        self.window_list.set_model(self.window_model)
+        self.enumerating = True
+        threading.Thread(target=self._enumerate_windows, name="window-enum", daemon=True).start()
+        self.dialog.after(ENUM_POLL_MS, self._drain_windows)
 
         # 启用确定按钮
         self.confirm_button.configure(state="normal")
 
-    def on_window_select(self, event):
-        """窗口选择事件"""
-        selection = self.window_listbox.curselection()
-        if not selection:
+    def _enumerate_windows(self):
+        """后台线程：枚举窗口，按批放入队列，最后放入 None 表示结束"""
+        batch = []
+        try:
+            for w in window_mgr.iter_windows():
+                if self.enum_cancel.is_set():
+                    return
+                batch.append(w)
+                if len(batch) >= ENUM_BATCH_SIZE:
+                    self.enum_queue.put(batch)
+                    batch = []
+            if batch:
+                self.enum_queue.put(batch)
+        except Exception as e:
+            log.error("枚举窗口失败: %s", e)
+        finally:
+            self.enum_queue.put(None)
+
+    def _drain_windows(self):
+        """Tk 线程：取出已到达的批次并追加到列表"""
+        if self.closed:
             return
 
-        idx = selection[0]
-        selected_text = self.window_listbox.get(idx)
+        batches = []
+        done = False
+        while True:
+            try:
+                batch = self.enum_queue.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                done = True
+                break
+            batches.append(batch)
+
+        if batches:
+            self._append_windows([w for batch in batches for w in batch])
+
+        if done:
+            self.enumerating = False
+            self.step_label.configure(text="步骤 2: 选择目标窗口")
+        else:
+            self.step_label.configure(
+                text=f"步骤 2: 选择目标窗口（正在枚举... {self.window_model.window_count}）"
+            )
+            self.dialog.after(ENUM_POLL_MS, self._drain_windows)
 
-        # 检查是否选中分组标题
-        if selected_text.startswith("---"):
-            self.window_listbox.selection_clear(idx)
-            return
+    def _append_windows(self, windows):
+        """追加窗口，保持当前看到的首行和选中的窗口不变"""
+        view = self.window_list
+        model = self.window_model
+        anchor = model.row_key(view.offset)
+        selected = model.row_key(view.selected) if view.selected is not None else None
 
-        # 计算实际窗口索引
-        window_idx = idx
-        for i in range(idx):
-            if self.window_listbox.get(i).startswith("---"):
-                window_idx -= 1
+        model.add_windows(windows)
 
-        if 0 <= window_idx < len(self.window_options):
-            self.selected_window = self.window_options[window_idx]
+        if anchor is not None:
+            view.offset = model.row_of(anchor)
+        if selected is not None:
+            view.selected = model.row_of(selected)
+        view.refresh()
+
+    def on_window_select(self, row):
+        """
+        窗口选择事件
+        Args:
+            row: 选中的行号
+        """
+        window = self.window_model.window_at(row) if row is not None else None
+        if window is not None:
+            self.selected_window = window
 
     def on_confirm(self):
         """确定按钮点击"""
-        if not self.selected_hotkey or not self.selected_window:
+        if not self.steps or not self.selected_window or self.capture_mode:
             return
 
         # 保存配置（包括 hwnd）
         shortcut = {
-            'key': self.selected_hotkey['key'],
-            'modifiers': self.selected_hotkey['modifiers'],
+            'key': self.steps[0]['key'],
+            'modifiers': self.steps[0]['modifiers'],
             'window_title': self.selected_window['title'],
             'window_class': self.selected_window['class_name'],
+            'process_name': window_mgr.get_process_name(
+                window_mgr.get_window_pid(self.selected_window['hwnd'])
+            ),
             'hwnd': self.selected_window['hwnd']
         }
+        if len(self.steps) > 1:
+            shortcut['then'] = self.steps[1:]
+
+        # 与已有快捷键相同、或互为前缀时，后添加的永远不会触发
+        existing = {s.get('id'): s for s in config.get_store().shortcuts()}
+        conflicts = hotkey.find_conflicts(shortcut, existing.values())
+        if conflicts:
+            names = "; ".join(hotkey.format_steps(hotkey.shortcut_steps(existing[sid])) for sid, _ in conflicts)
+            self.conflict_label.configure(text=f"与已有快捷键冲突: {names}")
+            return
 
-        saved = config.add_shortcut(shortcut)
-
-        if saved:
-            hotkey.register(
-                self.hwnd,
-                saved['id'],
-                saved['modifiers'],
-                saved['key']
-            )
+        # 热键由控制器根据配置变化事件注册
+        config.add_shortcut(shortcut)
 
+        self.closed = True
+        self.enum_cancel.set()
         self.dialog.destroy()
 
         if self.on_close_callback:
             self.on_close_callback()
 
     def on_cancel(self):
-        """取消按钮点击"""
-        # 停止键盘监听
-        if self.listener:
-            self.listener.stop()
-            self.listener = None
+        """取消按钮点击或关闭对话框"""
+        if self.closed:
+            return
+        self.closed = True
+        self.enum_cancel.set()
+
+        # 结束按键捕获，恢复热键分发
+        if self.capture:
+            self.capture.end()
+            self.capture = None
         self.dialog.destroy()
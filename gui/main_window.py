@@ -2,22 +2,31 @@
 主窗口模块
 显示快捷键列表，提供添加/删除功能
 """
+import queue
+import threading
+
 import customtkinter as ctk
 import tkinter as tk
-from core import config, hotkey, window as window_mgr
+from core import config
+from core.controller import get_controller
+from gui.shortcut_list import ShortcutRowModel
+from gui.virtual_list import VirtualListbox
 
 
 class MainWindow:
-    def __init__(self, app, hwnd=None):
+    def __init__(self, app, post, controller=None):
         """
         初始化主窗口
         Args:
             app: CTk 实例
-            hwnd: 窗口句柄，用于注册热键（可以后设置）
+            post: 线程安全地把回调交给 Tk 线程执行的函数 post(callback)
+            controller: 热键控制器，默认使用全局控制器（热键注册与窗口无关）
         """
         self.app = app
-        self.hwnd = hwnd
-        self.registered_hotkeys = {}
+        self.post = post
+        self.controller = controller or get_controller()
+        # 尚未应用到列表的配置变化 (event, shortcut)，按发生顺序处理
+        self._changes = queue.Queue()
 
         # 设置主题
         ctk.set_appearance_mode("dark")
@@ -30,8 +39,9 @@ class MainWindow:
         # 创建界面元素
         self.create_widgets()
 
-        # 加载配置并刷新列表
+        # 加载配置并刷新列表，之后的配置变化只更新受影响的行
         self.refresh_list()
+        config.subscribe(self.on_config_changed)
 
     def create_widgets(self):
         """创建界面元素"""
@@ -59,10 +69,13 @@ class MainWindow:
         scrollbar = tk.Scrollbar(list_frame)
         scrollbar.pack(side="right", fill="y")
 
-        # 使用 tkinter Listbox 支持选中
-        self.listbox = tk.Listbox(
+        # 虚拟列表：只渲染可见行，配置变化时按行更新
+        self.shortcut_model = ShortcutRowModel()
+        self.shortcut_list = VirtualListbox(
             list_frame,
-            yscrollcommand=scrollbar.set,
+            self.shortcut_model,
+            scrollbar,
+            on_select=self.on_list_select,
             font=("Segoe UI", 12),
             bg="#1f1f1f",
             fg="white",
@@ -72,11 +85,7 @@ class MainWindow:
             highlightthickness=0,
             justify="left"
         )
-        self.listbox.pack(side="left", fill="both", expand=True)
-        scrollbar.configure(command=self.listbox.yview)
-
-        # 绑定选择事件
-        self.listbox.bind("<<ListboxSelect>>", self.on_list_select)
+        self.shortcut_list.pack(side="left", fill="both", expand=True)
 
         # 按钮框架
         button_frame = ctk.CTkFrame(self.app, fg_color="transparent")
@@ -102,140 +111,82 @@ class MainWindow:
         )
         self.delete_button.pack(side="left", padx=10)
 
-        # 保存选中的索引（用于删除）
-        self.listbox.bind("<Button-1>", self.on_list_click)
-
     def refresh_list(self):
-        """刷新快捷键列表"""
-        # 清空列表
-        self.listbox.delete(0, "end")
-
-        # 加载配置
+        """重新加载配置并重建整个列表"""
         data = config.load()
-        shortcuts = data.get('shortcuts', [])
+        self.shortcut_model.reset(data.get('shortcuts', []))
+        self.shortcut_list.set_model(self.shortcut_model)
 
-        if not shortcuts:
-            self.listbox.insert("end", "暂无配置的快捷键")
-            self.listbox.insert("end", "点击「添加」配置新快捷键")
+    def on_config_changed(self, event, shortcut):
+        """
+        配置变化事件（可能来自控制通道、文件监视或执行线程）
+        其他线程只入队并通过 post() 通知 Tk 线程，不直接调用 Tk，也不等待 Tk 线程
+        Args:
+            event: config.EVENT_ADD / EVENT_REMOVE / EVENT_UPDATE
+            shortcut: 快捷键配置
+        """
+        self._changes.put((event, shortcut))
+        if threading.current_thread() is threading.main_thread():
+            self._apply_pending_changes()
         else:
-            for s in shortcuts:
-                mod = s.get('modifiers', '')
-                key = s.get('key', '')
-                title = s.get('window_title', '')
-
-                if mod:
-                    hotkey_str = f"{mod}+{key}"
-                else:
-                    hotkey_str = key
-
-                self.listbox.insert("end", f"{hotkey_str} → {title}")
-
-    def register_all_hotkeys(self):
-        """注册所有已配置的热键"""
-        data = config.load()
-        shortcuts = data.get('shortcuts', [])
-
-        for s in shortcuts:
-            shortcut_id = s.get('id')
-            modifiers = s.get('modifiers', '')
-            key = s.get('key', '')
-
-            if shortcut_id and key:
-                # 保存窗口信息（包括 hwnd）
-                self.registered_hotkeys[shortcut_id] = {
-                    'modifiers': modifiers,
-                    'key': key,
-                    'window_title': s.get('window_title', ''),
-                    'window_class': s.get('window_class', ''),
-                    'hwnd': s.get('hwnd')
-                }
-
-                # 注册热键并设置回调
-                if hotkey.register(self.hwnd, shortcut_id, modifiers, key):
-                    # 设置回调
-                    window_class = s.get('window_class', '')
-                    hotkey.set_callback(shortcut_id, lambda sid=shortcut_id: self.on_hotkey_triggered(sid))
+            self.post(self._apply_pending_changes)
+
+    def _apply_pending_changes(self):
+        """Tk 线程：按顺序应用排队的配置变化"""
+        while True:
+            try:
+                event, shortcut = self._changes.get_nowait()
+            except queue.Empty:
+                return
+            self.apply_config_change(event, shortcut)
+
+    def apply_config_change(self, event, shortcut):
+        """只更新受影响的行，保持滚动位置和选中项"""
+        model = self.shortcut_model
+        view = self.shortcut_list
+        was_empty = model.empty
+
+        if event == config.EVENT_ADD:
+            row = model.add(shortcut)
+            if was_empty:
+                view.refresh()
+            else:
+                view.rows_inserted(row)
+        elif event == config.EVENT_REMOVE:
+            row = model.remove(shortcut.get('id'))
+            if row is None:
+                return
+            if model.empty:
+                view.selected = None
+                view.refresh()
+            else:
+                view.rows_removed(row)
+        elif event == config.EVENT_UPDATE:
+            row = model.update(shortcut)
+            if row is not None:
+                view.row_changed(row)
 
     def on_add_click(self):
         """添加按钮点击事件"""
         from gui.add_dialog import AddDialog
 
-        # 保存主窗口引用
-        main_window = self
-
-        # 定义对话框关闭后的回调
-        def on_dialog_close():
-            main_window.refresh_list()
-            main_window.register_all_hotkeys()
-
-        # 创建对话框，传入回调函数
-        dialog = AddDialog(self.app, self.hwnd, on_dialog_close)
+        # 列表和热键都通过配置变化事件更新
+        dialog = AddDialog(self.app, self.controller.hwnd)
 
     def on_delete_click(self):
         """删除按钮点击事件"""
         # 获取选中的项
-        selection = self.listbox.curselection()
-        if not selection:
+        row = self.shortcut_list.selected
+        if row is None:
             return
 
-        idx = selection[0]
-
-        # 加载配置
-        data = config.load()
-        shortcuts = data.get('shortcuts', [])
-
-        if not shortcuts or idx >= len(shortcuts):
+        shortcut = self.shortcut_model.shortcut_at(row)
+        if not shortcut:
             return
 
-        # 获取要删除的快捷键
-        shortcut = shortcuts[idx]
-        shortcut_id = shortcut.get('id')
-
-        # 注销热键（通过重新注册所有来清除）
-        hotkey.unregister_all()
-        self.registered_hotkeys.clear()
-
-        # 删除配置
-        config.remove_shortcut(shortcut_id)
-
-        # 刷新列表
-        self.refresh_list()
-
-        # 重新注册剩余热键
-        self.register_all_hotkeys()
+        # 删除配置（列表和热键通过配置变化事件更新）
+        config.remove_shortcut(shortcut.get('id'))
 
-    def on_list_select(self, event):
+    def on_list_select(self, row):
         """列表选择事件"""
         pass
-
-    def on_list_click(self, event):
-        """列表点击事件"""
-        pass
-
-    def on_hotkey_triggered(self, shortcut_id):
-        """
-        热键触发事件
-        Args:
-            shortcut_id: 热键 ID
-        """
-        if shortcut_id not in self.registered_hotkeys:
-            return
-
-        shortcut_info = self.registered_hotkeys[shortcut_id]
-        
-        # 优先使用保存的 hwnd
-        hwnd = shortcut_info.get('hwnd')
-        
-        # 如果 hwnd 无效，尝试用 window_class 查找
-        if not hwnd or not window_mgr.is_valid_window(hwnd):
-            window_class = shortcut_info.get('window_class', '')
-            if window_class:
-                hwnd = window_mgr.find_window_by_class(window_class)
-        
-        if hwnd:
-            # 切换窗口显示/隐藏
-            result = window_mgr.toggle_window(hwnd)
-            if not result:
-                print(f"[hotkey] 窗口操作失败，可能需要重新配置")
-        else:
-            print(f"[hotkey] 未找到窗口，可能需要重新配置")
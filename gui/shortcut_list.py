@@ -0,0 +1,122 @@
+"""
+快捷键列表的行模型
+按配置顺序保存快捷键，配置变化事件只修改受影响的行
+"""
+from core import hotkey
+from core.controller import ACTION_PROFILE
+from gui.virtual_list import RowModel
+
+
+PLACEHOLDER_ROWS = ("暂无配置的快捷键", "点击「添加」配置新快捷键")
+
+
+def format_shortcut(s):
+    """
+    格式化列表中的一行
+    Args:
+        s: 快捷键配置
+    Returns:
+        str: 如 "Ctrl+Alt+F1 → Terminal"、"Ctrl+Alt+w, t → Terminal"，
+             属于配置方案的快捷键后面带 "[方案名]"
+    """
+    title = s.get('window_title', '')
+    hotkey_str = hotkey.format_steps(hotkey.shortcut_steps(s))
+
+    if s.get('action') == ACTION_PROFILE:
+        text = f"{hotkey_str} → 切换方案: {s.get('target_profile') or '公共'}"
+    else:
+        text = f"{hotkey_str} → {title}"
+    if s.get('profile'):
+        text += f"  [{s['profile']}]"
+    return text
+
+
+class ShortcutRowModel(RowModel):
+    """
+    快捷键列表行模型
+    没有快捷键时显示两行不可选的提示
+    """
+
+    def __init__(self, shortcuts=()):
+        self.shortcuts = []
+        self.texts = []
+        # 快捷键 ID -> 行号
+        self._row_of = {}
+        self.reset(shortcuts)
+
+    def reset(self, shortcuts):
+        """用快捷键列表重建所有行"""
+        self.shortcuts = [dict(s) for s in shortcuts]
+        self.texts = [format_shortcut(s) for s in self.shortcuts]
+        self._reindex(0)
+
+    def _reindex(self, start):
+        """更新 start 及之后各行的行号"""
+        if start == 0:
+            self._row_of = {}
+        for row in range(start, len(self.shortcuts)):
+            self._row_of[self.shortcuts[row].get('id')] = row
+
+    @property
+    def empty(self):
+        return not self.shortcuts
+
+    def add(self, shortcut):
+        """
+        追加一个快捷键
+        Returns:
+            int: 新行的行号
+        """
+        row = len(self.shortcuts)
+        self.shortcuts.append(dict(shortcut))
+        self.texts.append(format_shortcut(shortcut))
+        self._row_of[shortcut.get('id')] = row
+        return row
+
+    def remove(self, shortcut_id):
+        """
+        删除一个快捷键
+        Returns:
+            int or None: 被删除的行号，不存在时返回 None
+        """
+        row = self._row_of.pop(shortcut_id, None)
+        if row is None:
+            return None
+        del self.shortcuts[row]
+        del self.texts[row]
+        self._reindex(row)
+        return row
+
+    def update(self, shortcut):
+        """
+        更新一个快捷键
+        Returns:
+            int or None: 所在行号，不存在时返回 None
+        """
+        row = self._row_of.get(shortcut.get('id'))
+        if row is None:
+            return None
+        self.shortcuts[row] = dict(shortcut)
+        self.texts[row] = format_shortcut(shortcut)
+        return row
+
+    def shortcut_at(self, row):
+        """
+        获取行对应的快捷键
+        Returns:
+            dict or None
+        """
+        if 0 <= row < len(self.shortcuts):
+            return self.shortcuts[row]
+        return None
+
+    def __len__(self):
+        return len(self.shortcuts) or len(PLACEHOLDER_ROWS)
+
+    def text(self, row):
+        if not self.shortcuts:
+            return PLACEHOLDER_ROWS[row]
+        return self.texts[row]
+
+    def selectable(self, row):
+        return bool(self.shortcuts)
@@ -0,0 +1,232 @@
+"""
+虚拟列表模块
+只渲染可见行的 Listbox，数据来自行模型，行数很多时打开和滚动都不卡顿
+"""
+import tkinter as tk
+import tkinter.font as tkfont
+
+
+class RowModel:
+    """
+    行模型接口
+    VirtualListbox 通过它获取行数、行文本和行样式
+    """
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def text(self, row):
+        """行文本"""
+        raise NotImplementedError
+
+    def selectable(self, row):
+        """该行能否被选中"""
+        return True
+
+    def style(self, row):
+        """
+        行样式
+        Returns:
+            dict or None: 传给 Listbox.itemconfig 的参数
+        """
+        return None
+
+
+class VirtualListbox:
+    """
+    虚拟列表
+    内部的 tk.Listbox 只保存当前可见的若干行，滚动时重新填充；
+    选中状态以模型行号保存，与滚动位置无关
+    """
+
+    def __init__(self, parent, model, scrollbar, on_select=None, **listbox_options):
+        """
+        Args:
+            parent: 父容器
+            model: RowModel
+            scrollbar: 滚动条（tk.Scrollbar 或 CTkScrollbar）
+            on_select: 选中行变化时的回调 on_select(row)
+            listbox_options: 传给 tk.Listbox 的参数
+        """
+        self.model = model
+        self.scrollbar = scrollbar
+        self.on_select = on_select
+        self.offset = 0
+        self.selected = None
+        self.visible_rows = 1
+        self.render_count = 0
+
+        self.listbox = tk.Listbox(parent, exportselection=False, **listbox_options)
+        font = tkfont.Font(font=self.listbox.cget('font'))
+        self._line_height = max(1, font.metrics('linespace') + 1)
+
+        self.scrollbar.configure(command=self._on_scrollbar)
+        self.listbox.bind("<Configure>", self._on_configure)
+        self.listbox.bind("<<ListboxSelect>>", self._on_listbox_select)
+        self.listbox.bind("<MouseWheel>", self._on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(3))
+        self.listbox.bind("<Up>", lambda e: self._move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self._move_selection(1))
+        self.listbox.bind("<Prior>", lambda e: self._move_selection(-self.visible_rows))
+        self.listbox.bind("<Next>", lambda e: self._move_selection(self.visible_rows))
+
+    def pack(self, **kwargs):
+        self.listbox.pack(**kwargs)
+
+    # ---- 模型变化 ----
+
+    def set_model(self, model):
+        """替换模型并回到顶部"""
+        self.model = model
+        self.offset = 0
+        self.selected = None
+        self.refresh()
+
+    def rows_inserted(self, index, count=1):
+        """
+        通知在 index 处插入了 count 行，保持当前看到的内容和选中项不变
+        """
+        if self.selected is not None and self.selected >= index:
+            self.selected += count
+        if index < self.offset:
+            self.offset += count
+        self.refresh()
+
+    def rows_removed(self, index, count=1):
+        """
+        通知从 index 开始删除了 count 行
+        """
+        if self.selected is not None:
+            if index <= self.selected < index + count:
+                self.selected = None
+            elif self.selected >= index + count:
+                self.selected -= count
+        if index < self.offset:
+            self.offset -= min(count, self.offset - index)
+        self.refresh()
+
+    def row_changed(self, row):
+        """通知某一行的内容变化，只在可见时重绘该行"""
+        i = row - self.offset
+        if 0 <= i < self.listbox.size():
+            self.listbox.delete(i)
+            self.listbox.insert(i, self.model.text(row))
+            self._apply_style(i, row)
+            if row == self.selected:
+                self.listbox.selection_set(i)
+
+    # ---- 渲染 ----
+
+    def refresh(self):
+        """重新填充可见行"""
+        total = len(self.model)
+        max_offset = max(0, total - self.visible_rows)
+        self.offset = min(max(0, self.offset), max_offset)
+        end = min(total, self.offset + self.visible_rows)
+
+        self.listbox.delete(0, "end")
+        if end > self.offset:
+            self.listbox.insert("end", *[self.model.text(r) for r in range(self.offset, end)])
+            for r in range(self.offset, end):
+                self._apply_style(r - self.offset, r)
+        if self.selected is not None and self.offset <= self.selected < end:
+            self.listbox.selection_set(self.selected - self.offset)
+        self.render_count += 1
+
+        if total:
+            self.scrollbar.set(self.offset / total, end / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _apply_style(self, i, row):
+        style = self.model.style(row)
+        if style:
+            self.listbox.itemconfig(i, **style)
+
+    def scroll_to(self, offset):
+        """滚动到指定的首行"""
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def scroll(self, delta):
+        """滚动 delta 行"""
+        self.scroll_to(self.offset + delta)
+
+    def see(self, row):
+        """滚动使某行可见"""
+        if row < self.offset:
+            self.scroll_to(row)
+        elif row >= self.offset + self.visible_rows:
+            self.scroll_to(row - self.visible_rows + 1)
+
+    # ---- 选中 ----
+
+    def select(self, row):
+        """
+        选中某一行
+        Args:
+            row: 模型行号，None 表示清除选中
+        """
+        if row is not None and not (0 <= row < len(self.model) and self.model.selectable(row)):
+            return
+        self.selected = row
+        self.listbox.selection_clear(0, "end")
+        if row is not None:
+            self.see(row)
+            if self.offset <= row < self.offset + self.visible_rows:
+                self.listbox.selection_set(row - self.offset)
+        if self.on_select:
+            self.on_select(row)
+
+    def _move_selection(self, delta):
+        total = len(self.model)
+        if not total:
+            return "break"
+        row = self.selected if self.selected is not None else self.offset - (1 if delta > 0 else 0)
+        step = 1 if delta > 0 else -1
+        target = min(max(row + delta, 0), total - 1)
+        # 跳过不可选的行（如分组标题）
+        while 0 <= target < total and not self.model.selectable(target):
+            target += step
+        if 0 <= target < total:
+            self.select(target)
+        return "break"
+
+    # ---- 事件 ----
+
+    def _on_configure(self, event):
+        rows = max(1, event.height // self._line_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.refresh()
+
+    def _on_listbox_select(self, event):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        row = self.offset + selection[0]
+        if not self.model.selectable(row):
+            # 恢复原来的选中项
+            self.listbox.selection_clear(0, "end")
+            if self.selected is not None and self.offset <= self.selected < self.offset + self.visible_rows:
+                self.listbox.selection_set(self.selected - self.offset)
+            return
+        self.selected = row
+        if self.on_select:
+            self.on_select(row)
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _on_scrollbar(self, action, *args):
+        total = len(self.model)
+        if action == "moveto":
+            self.scroll_to(int(float(args[0]) * total))
+        elif action == "scroll":
+            amount = int(args[0])
+            if args[1] == "pages":
+                amount *= self.visible_rows
+            self.scroll(amount)
@@ -0,0 +1,137 @@
+"""
+窗口选择列表的行模型
+按窗口类分组，每组一个标题行加该类的窗口行；窗口分批到达时只追加到所属分组，
+并从第一个变化的分组起更新各组的起始行号，不重建整个列表
+"""
+import bisect
+
+from gui.virtual_list import RowModel
+
+
+HEADER_STYLE = {'fg': "#888888", 'selectbackground': "#1f1f1f"}
+
+
+class WindowRowModel(RowModel):
+    """
+    窗口列表行模型
+    每行为 (窗口信息, 文本, 窗口类名)，分组标题行的窗口信息为 None
+    """
+
+    def __init__(self, windows=()):
+        self.set_windows(windows)
+
+    def set_windows(self, windows):
+        """
+        用窗口列表重建行
+        Args:
+            windows: window.get_all_windows() 的结果
+        """
+        # 分组按首次出现的顺序排列：类名、该类的窗口列表、标题行的行号
+        self._class_names = []
+        self._members = []
+        self._starts = []
+        self._group_of = {}
+        # 窗口句柄 -> (分组序号, 组内序号)
+        self._position = {}
+        self._row_count = 0
+        self.window_count = 0
+        self.add_windows(windows)
+
+    def add_windows(self, windows):
+        """
+        追加一批窗口（分组顺序保持首次出现的顺序）
+        Args:
+            windows: 窗口信息列表
+        """
+        first_changed = None
+        for w in windows:
+            # 只显示有标题的窗口
+            if not w['title']:
+                continue
+            class_name = w['class_name']
+            group = self._group_of.get(class_name)
+            if group is None:
+                group = len(self._class_names)
+                self._group_of[class_name] = group
+                self._class_names.append(class_name)
+                self._members.append([])
+                self._starts.append(0)
+            members = self._members[group]
+            self._position[w['hwnd']] = (group, len(members))
+            members.append(w)
+            self.window_count += 1
+            if first_changed is None or group < first_changed:
+                first_changed = group
+
+        if first_changed is None:
+            return
+        # 变化的分组之前的行号不变
+        if first_changed:
+            row = self._starts[first_changed - 1] + 1 + len(self._members[first_changed - 1])
+        else:
+            row = 0
+        for group in range(first_changed, len(self._class_names)):
+            self._starts[group] = row
+            row += 1 + len(self._members[group])
+        self._row_count = row
+
+    def _row(self, row):
+        """
+        Returns:
+            tuple: (窗口信息, 窗口类名)，分组标题行的窗口信息为 None；行号无效时返回 None
+        """
+        if not 0 <= row < self._row_count:
+            return None
+        group = bisect.bisect_right(self._starts, row) - 1
+        offset = row - self._starts[group]
+        window = self._members[group][offset - 1] if offset else None
+        return window, self._class_names[group]
+
+    def row_key(self, row):
+        """
+        获取行键，行号变化后可以用 row_of() 找回同一行
+        Returns:
+            窗口句柄或 ('class', 类名)，行号无效时返回 None
+        """
+        found = self._row(row)
+        if found is None:
+            return None
+        window, class_name = found
+        return window['hwnd'] if window is not None else ('class', class_name)
+
+    def row_of(self, key):
+        """
+        根据行键获取行号
+        Returns:
+            int or None
+        """
+        if isinstance(key, tuple):
+            group = self._group_of.get(key[1])
+            return self._starts[group] if group is not None else None
+        position = self._position.get(key)
+        if position is None:
+            return None
+        group, index = position
+        return self._starts[group] + 1 + index
+
+    def __len__(self):
+        return self._row_count
+
+    def text(self, row):
+        window, class_name = self._row(row)
+        return f"  {window['title']}" if window is not None else f"--- {class_name} ---"
+
+    def selectable(self, row):
+        return self._row(row)[0] is not None
+
+    def style(self, row):
+        return HEADER_STYLE if self._row(row)[0] is None else None
+
+    def window_at(self, row):
+        """
+        获取行对应的窗口
+        Returns:
+            dict or None: 窗口信息，分组标题行返回 None
+        """
+        found = self._row(row)
+        return found[0] if found is not None else None
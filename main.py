@@ -1,45 +1,133 @@
 """
 Window Toggle 主程序
-使用 keyboard 库实现热键
+启动时只加载配置和热键引擎，主窗口在第一次显示时才创建
+
+用法:
+    python main.py          启动并显示主窗口
+    python main.py --tray   只在托盘中运行，需要时再打开主窗口
 """
-import sys
-import os
+import time
 
-import customtkinter as ctk
+# 启动计时起点（放在其他导入之前，计入导入耗时）
+_START = time.perf_counter()
 
-from core import config, hotkey
-from gui.main_window import MainWindow
-from utils.tray import TrayIcon
+import argparse
+import os
+import queue
+import sys
 
+from core import config, config_watcher, stats, window as window_mgr
+from core.controller import get_controller
+from utils import logger
+from utils.startup_timer import StartupTimer
 
-class WindowToggleApp:
-    def __init__(self):
-        # 创建 customtkinter 应用
-        self.app = ctk.CTk()
-        self.app.title("Window Toggle")
-        self.app.geometry("500x400")
+log = logger.get_logger("app")
 
-        # 创建主窗口
-        self.main_window = MainWindow(self.app, None)
 
-        # 注册热键
-        self.main_window.register_all_hotkeys()
+class WindowToggleApp:
+    def __init__(self, show_window=True):
+        """
+        Args:
+            show_window: 启动后是否立即显示主窗口
+        """
+        self.timer = StartupTimer(_START)
+        self.timer.mark('import')
+        stats.register_source('startup', self.timer.report)
+
+        # 界面在第一次显示时才创建
+        self.app = None
+        self.main_window = None
+        self.running = True
+        # 主线程任务队列：托盘等其他线程通过 post() 提交回调
+        self.tasks = queue.Queue()
+
+        # 启动后台日志写线程（热路径只写内存缓冲区）
+        logger.configure(os.path.join(config.CONFIG_DIR, 'logs', 'window-toggle.log'))
+        logger.start()
+
+        config.load()
+        self.timer.mark('config')
+
+        # 启动常驻窗口注册表（热键触发时直接查索引）
+        window_mgr.start_registry()
+        self.timer.mark('registry')
+
+        # 注册热键，之后配置变化时自动同步
+        self.controller = get_controller()
+        self.controller.start()
+        self.timer.mark('hotkeys')
+
+        # 监视配置文件，外部修改后增量重载
+        config_watcher.start()
+
+        # 本地控制通道（供脚本和 ctl.py 使用），失败不影响热键
+        from core.ipc import ControlServer
+        self.control = ControlServer(self.controller)
+        try:
+            self.control.start()
+        except OSError as e:
+            log.warning("控制通道启动失败: %s", e)
+        self.timer.mark('control')
 
         # 创建托盘图标
+        from utils.tray import TrayIcon
         self.tray = TrayIcon(
-            self.app,
+            self.post,
             show_callback=self.show_window,
             quit_callback=self.quit_app
         )
+        self.timer.mark('tray')
+
+        if show_window:
+            self.show_window()
+        log.info("启动完成: %s", self.timer.summary())
+
+    def post(self, callback):
+        """在主线程中执行回调（线程安全）"""
+        self.tasks.put(callback)
+
+    def _run_tasks(self):
+        """执行队列中的回调"""
+        while True:
+            try:
+                callback = self.tasks.get_nowait()
+            except queue.Empty:
+                return
+            callback()
+
+    def _poll_tasks(self):
+        """界面运行期间定时处理任务队列"""
+        self._run_tasks()
+        if self.running:
+            self.app.after(50, self._poll_tasks)
+
+    def run(self):
+        """主循环：界面创建前阻塞等待任务，创建后交给 Tk 事件循环"""
+        while self.running:
+            if self.app is None:
+                self.tasks.get()()
+            else:
+                self._poll_tasks()
+                self.app.mainloop()
+                break
+
+    def create_window(self):
+        """第一次显示时导入并创建主窗口"""
+        import customtkinter as ctk
+        from gui.main_window import MainWindow
+
+        self.app = ctk.CTk()
+        self.main_window = MainWindow(self.app, self.post, self.controller)
 
         # 处理窗口关闭事件
         self.app.protocol("WM_DELETE_WINDOW", self.on_close)
-
-        # 启动 GUI
-        self.app.mainloop()
+        self.timer.mark('gui')
+        log.info("主窗口已创建: %s", self.timer.summary())
 
     def show_window(self):
         """显示窗口"""
+        if self.app is None:
+            self.create_window()
         self.app.deiconify()
         self.app.lift()
         self.app.focus_force()
@@ -51,14 +139,29 @@ class WindowToggleApp:
 
     def quit_app(self):
         """退出程序"""
-        hotkey.unregister_all()
-        self.app.quit()
+        self.running = False
+        self.control.stop()
+        config_watcher.stop()
+        self.controller.stop()
+        window_mgr.stop_registry()
+        logger.stop()
+        if self.app is not None:
+            self.app.quit()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Window Toggle")
+    parser.add_argument("--tray", action="store_true",
+                        help="只在托盘中运行，不显示主窗口")
+    return parser.parse_args(argv)
 
 
 def main():
     """主函数"""
+    args = parse_args()
     try:
-        app = WindowToggleApp()
+        app = WindowToggleApp(show_window=not args.tray)
+        app.run()
     except Exception as e:
         print(f"Error: {e}")
         import traceback
@@ -0,0 +1,35 @@
+"""
+基准对比测试：亚微秒级指标变慢几倍时必须报告退化，波动范围内的差异不报告
+"""
+import unittest
+
+from benchmarks.run import compare
+
+
+class CompareTest(unittest.TestCase):
+
+    def test_several_fold_slowdown_of_fast_metric(self):
+        baseline = {'hotkey.on_press.typing[100]': 216.0}
+        noise = {'hotkey.on_press.typing[100]': 40.0}
+        regressions = compare({'hotkey.on_press.typing[100]': 4 * 216.0}, baseline, 0.35, noise, noise)
+        self.assertEqual([r[0] for r in regressions], ['hotkey.on_press.typing[100]'])
+        self.assertAlmostEqual(regressions[0][3], 4.0)
+
+    def test_within_noise_not_reported(self):
+        baseline = {'config.load.cold[1000]': 1.5e6}
+        # 基线各轮之间本来就相差 1.8 ms：慢 60% 仍在波动范围内
+        regressions = compare({'config.load.cold[1000]': 2.4e6}, baseline, 0.35,
+                              {'config.load.cold[1000]': 2e5}, {'config.load.cold[1000]': 1.8e6})
+        self.assertEqual(regressions, [])
+
+    def test_tolerance_without_noise(self):
+        baseline = {'a': 100.0, 'b': 100.0}
+        regressions = compare({'a': 130.0, 'b': 140.0}, baseline, 0.35)
+        self.assertEqual([r[0] for r in regressions], ['b'])
+
+    def test_missing_baseline_metric_skipped(self):
+        self.assertEqual(compare({'new': 1e9}, {}, 0.35), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+配置存储测试：外部修改 config.json 时不丢失只写入变更日志的修改，
+写快照和替换日志之间崩溃时不重复重放已经写进快照的日志
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from core import config
+
+
+class ExternalEditTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'config.json')
+        self.store = config.ConfigStore(self.path)
+        self.store.save({'shortcuts': [{'id': 1, 'key': 'F1', 'modifiers': 'Ctrl'}]})
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def edit_file(self, edit):
+        """模拟手动编辑/同步工具：读取 config.json，修改后整体写回"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        edit(data)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
+
+    def test_journal_survives_external_edit(self):
+        added = self.store.add({'key': 'F2', 'modifiers': 'Ctrl'})
+        self.edit_file(lambda data: data['shortcuts'].append({'id': 100, 'key': 'F3', 'modifiers': 'Alt'}))
+
+        self.assertTrue(self.store.reload())
+        ids = {s['id'] for s in self.store.shortcuts()}
+        self.assertEqual(ids, {1, added['id'], 100})
+
+        # 合并结果已写回 config.json，新的存储实例直接读到全部配置
+        with open(self.path, 'r', encoding='utf-8') as f:
+            on_disk = {s['id'] for s in json.load(f)['shortcuts']}
+        self.assertEqual(on_disk, ids)
+        self.assertEqual({s['id'] for s in config.ConfigStore(self.path).shortcuts()}, ids)
+
+    def test_external_edit_reusing_journal_id(self):
+        added = self.store.add({'key': 'F2', 'modifiers': 'Ctrl'})
+        # 编辑者看不到只在日志中的快捷键，按文件内容分配了同一个 ID
+        self.edit_file(lambda data: data['shortcuts'].append({'id': added['id'], 'key': 'F9', 'modifiers': 'Alt'}))
+
+        shortcuts = self.store.shortcuts()
+        keys = sorted(s['key'] for s in shortcuts)
+        self.assertEqual(keys, ['F1', 'F2', 'F9'])
+        self.assertEqual(len({s['id'] for s in shortcuts}), 3)
+
+    def test_removal_in_journal_survives_external_edit(self):
+        self.store.remove(1)
+        self.edit_file(lambda data: data.setdefault('profiles', []).append('work'))
+
+        self.assertEqual(self.store.shortcuts(), [])
+        self.assertEqual(self.store.profiles(), ['work'])
+
+
+class ValidateTest(unittest.TestCase):
+
+    def test_target_shapes(self):
+        for bad in ({'group': 'oops'}, {'group': ['class']}, {'title_rule': 5},
+                    {'window_title': 5}, {'window_class': ['A']}, {'process_name': {}}):
+            with self.subTest(bad=bad):
+                with self.assertRaises(ValueError):
+                    config.validate_config({'shortcuts': [dict({'id': 1, 'key': 'F1'}, **bad)]})
+        config.validate_config({'shortcuts': [
+            {'id': 1, 'key': 'F1', 'group': {'type': 'class', 'value': 'A'}},
+            {'id': 2, 'key': 'F2', 'title_rule': {'type': 'regex', 'pattern': 'a+'}, 'window_title': None},
+        ]})
+
+
+class CompactCrashTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'config.json')
+        self.store = config.ConfigStore(self.path)
+        self.store.save({'shortcuts': [{'id': 1, 'key': 'F1', 'modifiers': 'Ctrl'}]})
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def crash_after_snapshot(self, store, write):
+        """快照替换成功，替换日志时进程退出"""
+        replace = store._replace_file
+
+        def crashing_replace(path, text):
+            if path == store.journal_path:
+                raise OSError("simulated crash")
+            replace(path, text)
+
+        store._replace_file = crashing_replace
+        with self.assertRaises(OSError):
+            write()
+
+    def test_journal_not_replayed_after_crash(self):
+        added = self.store.add({'key': 'F2', 'modifiers': 'Ctrl', 'window_title': 'old'})
+        self.store.update(dict(added, window_title='new'))
+        self.crash_after_snapshot(self.store, self.store.compact)
+
+        reloaded = config.ConfigStore(self.path)
+        shortcuts = sorted(reloaded.shortcuts(), key=lambda s: s['id'])
+        self.assertEqual([(s['id'], s.get('window_title')) for s in shortcuts], [(1, None), (added['id'], 'new')])
+
+        # 旧日志不能继续追加：下一次修改先写新快照，之后再读取结果不变
+        third = reloaded.add({'key': 'F3', 'modifiers': 'Ctrl'})
+        self.assertEqual(third['id'], added['id'] + 1)
+        ids = [s['id'] for s in config.ConfigStore(self.path).shortcuts()]
+        self.assertEqual(sorted(ids), [1, added['id'], third['id']])
+
+    def test_removal_not_undone_after_crash(self):
+        added = self.store.add({'key': 'F2', 'modifiers': 'Ctrl'})
+        self.store.remove(added['id'])
+        self.crash_after_snapshot(self.store, self.store.compact)
+        self.assertEqual([s['id'] for s in config.ConfigStore(self.path).shortcuts()], [1])
+
+    def test_save_without_generation_after_crash(self):
+        self.store.add({'key': 'F2', 'modifiers': 'Ctrl'})
+        # 新实例还没读取过文件，传入的数据也不带代数：新快照的代数仍要大于现有日志
+        fresh = config.ConfigStore(self.path)
+        self.crash_after_snapshot(fresh, lambda: fresh.save({'shortcuts': [{'id': 5, 'key': 'F5', 'modifiers': 'Alt'}]}))
+        self.assertEqual([s['id'] for s in config.ConfigStore(self.path).shortcuts()], [5])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+热键控制器测试：外部修改配置后同步热键不死锁，配置变化只增量应用
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from core import config, hotkey
+from core.backend import set_backend
+from core.backend.simulated import SimulatedDesktop
+from core.controller import HotkeyController
+
+
+class ControllerSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'config.json')
+        self.previous_backend = set_backend(SimulatedDesktop())
+        self.store = config.ConfigStore(self.path)
+        self.previous_store = config.set_store(self.store)
+        self.store.save({'shortcuts': [{'id': 1, 'key': 'F1', 'modifiers': 'Ctrl', 'window_class': 'A'}]})
+        self.controller = HotkeyController()
+        self.controller.start()
+
+    def tearDown(self):
+        self.controller.stop()
+        config.set_store(self.previous_store)
+        set_backend(self.previous_backend)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_register_all_after_external_edit(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data['shortcuts'].append({'id': 2, 'key': 'F2', 'modifiers': 'Ctrl', 'window_class': 'B'})
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+        worker = threading.Thread(target=self.controller.register_all_hotkeys, daemon=True)
+        worker.start()
+        worker.join(5)
+        self.assertFalse(worker.is_alive(), "register_all_hotkeys deadlocked")
+        self.assertEqual(sorted(self.controller.registered_hotkeys), [1, 2])
+
+    def test_batch_applies_incrementally(self):
+        resolver = self.controller.registered_hotkeys[1]['resolver']
+        added, removed = config.apply_batch(
+            [{'key': f'k{i}', 'modifiers': 'Alt', 'window_class': 'C'} for i in range(50)], [])
+        self.assertEqual(removed, [])
+        self.assertEqual(len(self.controller.registered_hotkeys), 51)
+        self.assertEqual(set(hotkey._callbacks), set(self.controller.registered_hotkeys))
+        # 未变化的快捷键保留原解析器
+        self.assertIs(self.controller.registered_hotkeys[1]['resolver'], resolver)
+
+        config.apply_batch([], [s['id'] for s in added])
+        self.assertEqual(sorted(self.controller.registered_hotkeys), [1])
+        self.assertEqual(sorted(hotkey._callbacks), [1])
+
+    def test_invalid_target_does_not_block_others(self):
+        # 通过配置校验、但解析器无法使用的目标配置
+        added, _ = config.apply_batch([
+            {'key': 'F2', 'modifiers': 'Ctrl', 'group': {'type': 'process', 'value': 5}},
+            {'key': 'F3', 'modifiers': 'Ctrl', 'group': {'type': 'list', 'windows': [{'process_name': 5}]}},
+            {'key': 'F4', 'modifiers': 'Ctrl', 'window_class': 'D'},
+        ], [])
+        ids = [1] + [s['id'] for s in added]
+        self.assertEqual(sorted(self.controller.registered_hotkeys), ids)
+        self.assertEqual(sorted(hotkey._callbacks), ids)
+        self.assertEqual(self.controller.resolve(added[0]['id']), ([], 'miss'))
+
+    def test_invalid_shortcut_rejected(self):
+        with self.assertRaises(ValueError):
+            config.apply_batch([{'key': 'F2', 'modifiers': 'Ctrl'}, {'key': 'F3', 'group': 'oops'}], [])
+        self.assertEqual(sorted(self.controller.registered_hotkeys), [1])
+        self.assertEqual([s['id'] for s in self.store.shortcuts()], [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
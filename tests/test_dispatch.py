@@ -0,0 +1,80 @@
+"""
+动作执行器测试：停止后重新启动时不等待仍在执行动作的线程，也不会另起第二个线程
+"""
+import threading
+import unittest
+
+from core.dispatch import ActionExecutor
+
+
+class ExecutorRestartTest(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.calls = []
+
+        def handler(shortcut_id, received, timestamp):
+            self.calls.append((shortcut_id, threading.current_thread()))
+            if shortcut_id == 'slow':
+                self.started.set()
+                self.release.wait(5.0)
+            else:
+                self.done.set()
+
+        self.executor = ActionExecutor(handler, name='test-executor')
+
+    def tearDown(self):
+        self.release.set()
+        self.executor.stop()
+
+    def test_restart_while_handler_running(self):
+        self.executor.start()
+        self.executor.submit('slow')
+        self.assertTrue(self.started.wait(5.0))
+        worker = self.calls[0][1]
+
+        # 动作还没执行完：停止只等一小会儿，重新启动不等待，沿用同一个线程
+        self.executor.stop(timeout=0.05)
+        self.executor.start()
+        self.assertIs(self.executor._thread, worker)
+        self.executor.submit('fast')
+        self.assertFalse(self.done.is_set())
+        self.assertEqual(sum(t.name == self.executor.name for t in threading.enumerate()), 1)
+
+        self.release.set()
+        self.assertTrue(self.done.wait(5.0))
+        self.assertEqual([sid for sid, _ in self.calls], ['slow', 'fast'])
+        self.assertIs(self.calls[1][1], worker)
+
+    def test_stopped_during_handler(self):
+        self.executor.start()
+        self.executor.submit('slow')
+        self.assertTrue(self.started.wait(5.0))
+        worker = self.calls[0][1]
+        self.executor.stop(timeout=0.05)
+        # 停止期间提交的动作不会被旧线程执行，线程执行完当前动作后退出
+        self.executor.submit('fast')
+        self.release.set()
+        worker.join(5.0)
+        self.assertFalse(worker.is_alive())
+        self.assertIsNone(self.executor._thread)
+        self.assertEqual([sid for sid, _ in self.calls], ['slow'])
+
+        self.executor.start()
+        self.assertTrue(self.done.wait(5.0))
+        self.assertIsNot(self.calls[1][1], worker)
+
+    def test_stop_joins_idle_thread(self):
+        self.executor.start()
+        thread = self.executor._thread
+        self.executor.stop()
+        self.assertFalse(thread.is_alive())
+        self.executor.start()
+        self.executor.submit('fast')
+        self.assertTrue(self.done.wait(5.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,272 @@
+"""
+热键模块测试：卡住的修饰键只在钩子线程中清除，增量同步为没有回调的热键补上回调，
+按键序列的匹配、超时和中断，序列冲突检查，注销热键和切换配置方案
+"""
+import threading
+import unittest
+from unittest import mock
+
+from core import hotkey
+from core.backend import set_backend
+from core.backend.simulated import SimulatedDesktop
+
+
+class StuckModifierTest(unittest.TestCase):
+
+    def setUp(self):
+        self.desktop = SimulatedDesktop()
+        self.previous_backend = set_backend(self.desktop)
+        self.assertTrue(hotkey.register(None, 1, 'Ctrl', 'F1'))
+        self.resets = hotkey.get_input_stats()['stuck_modifier_resets']
+
+    def tearDown(self):
+        hotkey.unregister_all()
+        set_backend(self.previous_backend)
+
+    def stick_ctrl(self):
+        """按下 Ctrl，释放事件丢失"""
+        self.desktop.press('ctrl_l')
+        self.desktop.release('ctrl_l', deliver=False)
+        self.assertEqual(hotkey._pressed_mask, hotkey.MODIFIER_KEYS['ctrl_l'])
+
+    def test_cleared_on_next_hook_event(self):
+        self.stick_ctrl()
+        # 在其他线程检查：只读取真实状态，不修改掩码
+        checker = threading.Thread(target=hotkey.reconcile_modifiers)
+        checker.start()
+        checker.join()
+        self.assertEqual(hotkey._pressed_mask, hotkey.MODIFIER_KEYS['ctrl_l'])
+
+        self.desktop.press('a')
+        self.assertEqual(hotkey._pressed_mask, 0)
+        self.assertEqual(hotkey.get_input_stats()['stuck_modifier_resets'], self.resets + 1)
+
+    def test_modifier_pressed_again_is_kept(self):
+        self.stick_ctrl()
+        hotkey.reconcile_modifiers()
+        # 下一个事件就是再次按下 Ctrl：先清除卡住的位，再记录这次按下
+        self.desktop.press('ctrl_l')
+        self.assertEqual(hotkey._pressed_mask, hotkey.MODIFIER_KEYS['ctrl_l'])
+
+    def test_stale_check_discarded(self):
+        self.stick_ctrl()
+        hotkey.reconcile_modifiers()
+        # 读取状态之后钩子又处理了修饰键事件：这次结果作废，等下一轮检查
+        hotkey._modifier_events += 1
+        self.desktop.press('a')
+        self.assertEqual(hotkey._pressed_mask, hotkey.MODIFIER_KEYS['ctrl_l'])
+        self.assertEqual(hotkey.get_input_stats()['stuck_modifier_resets'], self.resets)
+
+
+class ApplyChangesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.previous_backend = set_backend(SimulatedDesktop())
+        self.shortcut = {'id': 1, 'key': 'F1', 'modifiers': 'Ctrl'}
+
+    def tearDown(self):
+        hotkey.unregister_all()
+        set_backend(self.previous_backend)
+
+    def test_callback_attached_to_unchanged_entry(self):
+        hotkey.apply_changes(None, [self.shortcut])
+        self.assertNotIn(1, hotkey._callbacks)
+
+        result = hotkey.apply_changes(None, [self.shortcut], make_callback=lambda sid: (lambda: sid))
+        self.assertEqual(result, {'added': [], 'removed': [], 'changed': []})
+        self.assertEqual(hotkey._callbacks[1](), 1)
+
+    def test_existing_callback_kept(self):
+        first = lambda: 'first'
+        hotkey.apply_changes(None, [self.shortcut], make_callback=lambda sid: first)
+        hotkey.apply_changes(None, [self.shortcut], make_callback=lambda sid: (lambda: 'second'))
+        self.assertIs(hotkey._callbacks[1], first)
+
+
+class TriggerTestCase(unittest.TestCase):
+    """触发的热键直接记录下来，不送进执行队列"""
+
+    def setUp(self):
+        self.desktop = SimulatedDesktop()
+        self.previous_backend = set_backend(self.desktop)
+        self.now = 0.0
+        self.previous_clock = hotkey.set_clock(lambda: self.now)
+        self.triggered = []
+        patcher = mock.patch.object(hotkey, '_trigger_callback',
+                                    lambda shortcut_id, received=None: self.triggered.append(shortcut_id))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.assertTrue(hotkey.register(None, 'seq', 'Ctrl', 'k', then=[{'modifiers': '', 'key': 't'}]))
+        self.assertTrue(hotkey.register(None, 'single', '', 'x'))
+
+    def tearDown(self):
+        hotkey.unregister_all()
+        hotkey.set_clock(self.previous_clock)
+        set_backend(self.previous_backend)
+
+
+class SequenceTest(TriggerTestCase):
+
+    def test_multi_step_match(self):
+        self.desktop.tap('ctrl_l+k')
+        self.assertEqual(self.triggered, [])
+        self.now += 0.5
+        self.desktop.tap('t')
+        self.assertEqual(self.triggered, ['seq'])
+        # 序列结束后再按第二步不会再次触发
+        self.now += 0.5
+        self.desktop.tap('t')
+        self.assertEqual(self.triggered, ['seq'])
+
+    def test_timeout_resets_sequence(self):
+        self.desktop.tap('ctrl_l+k')
+        self.now += 1.5
+        self.desktop.tap('t')
+        self.assertEqual(self.triggered, [])
+        # 超时后重新开始的序列照常匹配
+        self.desktop.tap('ctrl_l+k')
+        self.desktop.tap('t')
+        self.assertEqual(self.triggered, ['seq'])
+
+    def test_abort_falls_back_to_single_chord(self):
+        self.desktop.tap('ctrl_l+k')
+        self.desktop.tap('x')
+        self.assertEqual(self.triggered, ['single'])
+        # 被中断的序列不再等待第二步
+        self.desktop.tap('t')
+        self.assertEqual(self.triggered, ['single'])
+
+    def test_timeout_falls_back_to_single_chord(self):
+        hotkey.register(None, 'letter', '', 't')
+        self.desktop.tap('ctrl_l+k')
+        self.now += 1.5
+        self.desktop.tap('t')
+        self.assertEqual(self.triggered, ['letter'])
+
+
+class UnbindTest(TriggerTestCase):
+    """注销热键只移除它自己的路径，被它遮住的热键接替"""
+
+    def test_path_removed_and_pruned(self):
+        published = hotkey._active_table.dispatch
+        hotkey.unregister(None, 'seq')
+        self.assertEqual(hotkey._active_table.dispatch, {(0, 'x'): 'single'})
+        self.assertNotIn('k', hotkey._active_table.bound_keys)
+        # 已发布的快照不受影响
+        self.assertIn((hotkey.MOD_CTRL, 'k'), published)
+        self.desktop.tap('ctrl_l+k')
+        self.desktop.tap('t')
+        self.assertEqual(self.triggered, [])
+
+    def test_sibling_kept(self):
+        hotkey.register(None, 'other', 'Ctrl', 'k', then=[{'modifiers': '', 'key': 'w'}])
+        hotkey.unregister(None, 'seq')
+        self.desktop.tap('ctrl_l+k')
+        self.desktop.tap('w')
+        self.assertEqual(self.triggered, ['other'])
+
+    def test_same_sequence_takes_over(self):
+        hotkey.register(None, 'copy', 'Ctrl', 'k', then=[{'modifiers': '', 'key': 't'}])
+        hotkey.unregister(None, 'seq')
+        self.desktop.tap('ctrl_l+k')
+        self.desktop.tap('t')
+        self.assertEqual(self.triggered, ['copy'])
+
+    def test_prefix_takes_over(self):
+        # 先注册的序列占住了 Ctrl+k；之后注册的 Ctrl+k 和 Ctrl+k, w 按注册顺序重新竞争
+        hotkey.register(None, 'chord', 'Ctrl', 'k')
+        hotkey.register(None, 'other', 'Ctrl', 'k', then=[{'modifiers': '', 'key': 'w'}])
+        self.desktop.tap('ctrl_l+k')
+        self.desktop.tap('w')
+        self.assertEqual(self.triggered, ['other'])
+
+        hotkey.unregister(None, 'seq')
+        self.desktop.tap('ctrl_l+k')
+        self.assertEqual(self.triggered, ['other', 'chord'])
+        self.assertEqual(hotkey._active_table.shadowed, {'other': hotkey.compile_steps([('Ctrl', 'k'), ('', 'w')])})
+
+    def test_shadowed_binding_removed(self):
+        hotkey.register(None, 'copy', 'Ctrl', 'k', then=[{'modifiers': '', 'key': 't'}])
+        hotkey.unregister(None, 'copy')
+        self.assertEqual(hotkey._active_table.shadowed, {})
+        self.desktop.tap('ctrl_l+k')
+        self.desktop.tap('t')
+        self.assertEqual(self.triggered, ['seq'])
+
+
+class ProfileTest(TriggerTestCase):
+    """配置方案只替换当前热键表，公共热键在所有方案中生效"""
+
+    def setUp(self):
+        super().setUp()
+        hotkey.register(None, 'work_y', '', 'y', profile='work')
+        hotkey.register(None, 'home_y', '', 'y', profile='home')
+
+    def test_activate(self):
+        self.desktop.tap('y')
+        self.assertEqual(self.triggered, [])
+        self.assertTrue(hotkey.activate_profile('work'))
+        self.assertFalse(hotkey.activate_profile('work'))
+        self.desktop.tap('y')
+        self.desktop.tap('x')
+        hotkey.activate_profile('home')
+        self.assertEqual(hotkey.get_active_profile(), 'home')
+        self.desktop.tap('y')
+        self.assertEqual(self.triggered, ['work_y', 'single', 'home_y'])
+
+    def test_activate_abandons_sequence(self):
+        self.desktop.tap('ctrl_l+k')
+        hotkey.activate_profile('work')
+        self.desktop.tap('t')
+        self.assertEqual(self.triggered, [])
+
+    def test_unbind_in_profile(self):
+        hotkey.activate_profile('work')
+        hotkey.unregister(None, 'work_y')
+        self.desktop.tap('y')
+        hotkey.activate_profile('home')
+        self.desktop.tap('y')
+        self.assertEqual(self.triggered, ['home_y'])
+
+    def test_common_unbind_reaches_every_profile(self):
+        hotkey.prepare_profiles(['work', 'home'])
+        hotkey.unregister(None, 'single')
+        for profile in (None, 'work', 'home'):
+            hotkey.activate_profile(profile)
+            self.desktop.tap('x')
+        self.assertEqual(self.triggered, [])
+        hotkey.register(None, 'single', '', 'x')
+        hotkey.activate_profile('work')
+        self.desktop.tap('x')
+        self.assertEqual(self.triggered, ['single'])
+
+
+class FindConflictsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.shortcuts = [
+            {'id': 1, 'modifiers': 'Ctrl', 'key': 'k', 'then': [{'modifiers': '', 'key': 't'}]},
+            {'id': 2, 'modifiers': 'Ctrl', 'key': 'j'},
+            {'id': 3, 'modifiers': 'Ctrl', 'key': 'k', 'then': [{'modifiers': '', 'key': 'w'}], 'profile': 'work'},
+        ]
+
+    def test_same_sequence(self):
+        # 修饰键和键名的写法不同也是同一个序列
+        shortcut = {'id': 9, 'modifiers': 'Ctrl', 'key': 'K', 'then': [{'modifiers': '', 'key': 'T'}]}
+        self.assertEqual(hotkey.find_conflicts(shortcut, self.shortcuts), [(1, 'same')])
+
+    def test_prefix_sequences(self):
+        shortcut = {'id': 9, 'modifiers': 'Ctrl', 'key': 'k'}
+        self.assertEqual(hotkey.find_conflicts(shortcut, self.shortcuts), [(1, 'prefix'), (3, 'prefix')])
+        shortcut = {'id': 9, 'modifiers': 'Ctrl', 'key': 'j', 'then': [{'modifiers': '', 'key': 'x'}]}
+        self.assertEqual(hotkey.find_conflicts(shortcut, self.shortcuts), [(2, 'extends')])
+
+    def test_other_profile_and_same_id_ignored(self):
+        shortcut = {'id': 9, 'modifiers': 'Ctrl', 'key': 'k', 'profile': 'home'}
+        self.assertEqual(hotkey.find_conflicts(shortcut, self.shortcuts), [(1, 'prefix')])
+        shortcut = dict(self.shortcuts[0])
+        self.assertEqual(hotkey.find_conflicts(shortcut, self.shortcuts), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+控制通道测试：TCP 请求必须带令牌，格式错误的请求会关闭连接，Unix 套接字创建时即只有用户可访问
+"""
+import json
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import unittest
+
+from core import config, ipc
+
+
+class _Controller:
+    """ping 之外的命令在这些测试中用不到"""
+
+
+class ControlServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.previous_dir = config.CONFIG_DIR
+        config.CONFIG_DIR = os.path.join(self.dir, 'config')
+        self.server = None
+
+    def tearDown(self):
+        if self.server:
+            self.server.stop()
+        config.CONFIG_DIR = self.previous_dir
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def start_tcp(self):
+        self.server = ipc.ControlServer(_Controller(), (ipc.LOOPBACK, 0))
+        return self.server.start()
+
+    def exchange(self, address, payload):
+        """发送原始字节，读到服务端关闭连接为止"""
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5.0)
+            sock.connect(address)
+            sock.sendall(payload)
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile('rb') as reader:
+                return [json.loads(line) for line in reader]
+
+    def test_tcp_requires_token(self):
+        address = self.start_tcp()
+        with ipc.ControlClient(address) as client:
+            self.assertEqual(client.request('ping'), {'ok': False, 'error': "unauthorized"})
+        with ipc.ControlClient(address, token='0' * 32) as client:
+            self.assertFalse(client.request('ping')['ok'])
+        with ipc.ControlClient(address, token=self.server.token) as client:
+            self.assertEqual(client.request('ping'), {'ok': True})
+            self.assertEqual(client.request('ping'), {'ok': True})
+
+    def test_port_file_is_private(self):
+        address = self.start_tcp()
+        path = os.path.join(config.CONFIG_DIR, ipc.PORT_FILE_NAME)
+        self.assertEqual(ipc._read_port_file(), (address[1], self.server.token))
+        if os.name != 'nt':
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+        self.server.stop()
+        self.assertFalse(os.path.exists(path))
+
+    def test_malformed_line_closes_connection(self):
+        address = self.start_tcp()
+        ping = json.dumps({'cmd': 'ping', 'token': self.server.token}).encode('utf-8')
+        responses = self.exchange(address, ping + b'\nnot json\n' + ping + b'\n')
+        self.assertEqual(len(responses), 2)
+        self.assertEqual(responses[0], {'ok': True})
+        self.assertIn("invalid json", responses[1]['error'])
+
+        responses = self.exchange(address, b'[1, 2]\n' + ping + b'\n')
+        self.assertEqual(responses, [{'ok': False, 'error': "request must be an object"}])
+
+    def test_overlong_line_closes_connection(self):
+        address = self.start_tcp()
+        responses = self.exchange(address, b'x' * (ipc.MAX_REQUEST_BYTES + 1))
+        self.assertEqual(responses, [{'ok': False, 'error': "request too long"}])
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX') and os.name != 'nt', "需要 Unix 域套接字")
+    def test_unix_socket_created_private(self):
+        path = os.path.join(config.CONFIG_DIR, ipc.SOCKET_NAME)
+        self.server = ipc.ControlServer(_Controller(), path)
+        self.server.start()
+        self.assertIsNone(self.server.token)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(config.CONFIG_DIR).st_mode), 0o700)
+        with ipc.ControlClient(path) as client:
+            self.assertEqual(client.request('ping'), {'ok': True})
+
+
+if __name__ == '__main__':
+    unittest.main()
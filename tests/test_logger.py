@@ -0,0 +1,85 @@
+"""
+日志模块测试：多个线程同时记录、同时写出时，记录按序号顺序进入环形缓冲区，
+每条记录要么写出一次，要么计入丢弃数
+"""
+import collections
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from utils import logger
+
+
+class ConcurrentLogTest(unittest.TestCase):
+
+    THREADS = 4
+    PER_THREAD = 5000
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.writer = logger._Writer()
+        self.writer.path = os.path.join(self.dir, 'test.log')
+        self.writer.console = False
+        self.writer.max_bytes = 1 << 30
+        # 小缓冲区：写出跟不上时一定会覆盖旧记录
+        patcher = mock.patch.object(logger, '_ring', collections.deque(maxlen=256))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.writer._next_seq = next(logger._seq) + 1
+        self.previous_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.previous_interval)
+        if self.writer._file:
+            self.writer._file.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_concurrent_log_and_flush(self):
+        log = logger.get_logger('test')
+        done = threading.Event()
+        out_of_order = []
+        errors = []
+
+        def produce(n):
+            for i in range(self.PER_THREAD):
+                log.info("t%d-%d", n, i)
+
+        def consume():
+            try:
+                while not done.is_set():
+                    self.writer.flush()
+                    with logger._ring_lock:
+                        seqs = [r[0] for r in logger._ring]
+                    if seqs != sorted(seqs):
+                        out_of_order.append(seqs)
+            except Exception as e:
+                errors.append(e)
+
+        consumers = [threading.Thread(target=consume) for _ in range(2)]
+        producers = [threading.Thread(target=produce, args=(n,)) for n in range(self.THREADS)]
+        for t in consumers + producers:
+            t.start()
+        for t in producers:
+            t.join()
+        done.set()
+        for t in consumers:
+            t.join()
+        self.writer.flush()
+        self.writer._file.close()
+        self.writer._file = None
+
+        with open(self.writer.path, encoding='utf-8') as f:
+            messages = [line.rsplit(' ', 1)[1].strip() for line in f]
+        self.assertEqual(errors, [])
+        self.assertEqual(out_of_order, [])
+        self.assertEqual(len(messages), len(set(messages)))
+        self.assertEqual(len(messages) + self.writer.dropped, self.THREADS * self.PER_THREAD)
+
+
+if __name__ == '__main__':
+    unittest.main()
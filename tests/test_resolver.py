@@ -0,0 +1,107 @@
+"""
+目标解析测试：进程窗口组和“进程 + 类名”解析层经过后端的 get_process_path(pid)，
+后端返回完整路径（可能带大写）或 None；退回到较低层找到的窗口不被缓存
+"""
+import unittest
+
+from core import resolver, window
+from core.backend import set_backend
+from core.backend.simulated import SimulatedDesktop
+
+
+class ProcessResolveTest(unittest.TestCase):
+    """不启动窗口注册表：进程 ID 逐个向后端查询"""
+
+    use_registry = False
+
+    def setUp(self):
+        self.desktop = SimulatedDesktop()
+        self.previous_backend = set_backend(self.desktop)
+        self.editor = self.desktop.create_window("a.txt - 编辑器", "Chrome_WidgetWin_1", pid=100,
+                                                 exe="C:\\Program Files\\Editor\\Editor.exe")
+        self.browser = self.desktop.create_window("新标签页", "Chrome_WidgetWin_1", pid=200,
+                                                  exe="C:\\Program Files\\Browser\\browser.exe")
+        self.editor2 = self.desktop.create_window("b.txt - 编辑器", "EditorPanel", pid=100)
+        if self.use_registry:
+            window.start_registry(resync_interval=0)
+
+    def tearDown(self):
+        window.stop_registry()
+        set_backend(self.previous_backend)
+
+    def test_process_group(self):
+        group = resolver.create_resolver({'group': {'type': 'process', 'value': 'EDITOR.EXE'}})
+        hwnds, method = group.resolve()
+        self.assertEqual(sorted(hwnds), sorted([self.editor, self.editor2]))
+        self.assertEqual(method, 'group_process')
+
+    def test_process_group_miss(self):
+        group = resolver.create_resolver({'group': {'type': 'process', 'value': 'missing.exe'}})
+        self.assertEqual(group.resolve(), ([], resolver.METHOD_MISS))
+
+    def test_process_and_class_tier(self):
+        # 同类名的两个窗口分属两个进程，进程层按可执行文件名（不区分大小写）选中
+        target = resolver.create_resolver({'window_class': 'Chrome_WidgetWin_1', 'process_name': 'Browser.exe'})
+        self.assertEqual(target.resolve(), (self.browser, resolver.METHOD_PROCESS))
+        target = resolver.create_resolver({'window_class': 'Chrome_WidgetWin_1', 'process_name': 'editor.exe'})
+        self.assertEqual(target.resolve(), (self.editor, resolver.METHOD_PROCESS))
+        self.assertEqual(target.resolve(), (self.editor, resolver.METHOD_CACHE))
+
+    def test_unknown_process_path_falls_back_to_class(self):
+        # 进程无法打开时后端返回 None，解析退回到类名层
+        del self.desktop.processes[200]
+        target = resolver.create_resolver({'window_class': 'Chrome_WidgetWin_1', 'process_name': 'browser.exe'})
+        first = window.find_windows_by_class('Chrome_WidgetWin_1')[0]['hwnd']
+        self.assertEqual(target.resolve(), (first, resolver.METHOD_CLASS))
+
+    def test_fallback_not_cached(self):
+        target = resolver.create_resolver({'window_class': 'Chrome_WidgetWin_1', 'process_name': 'terminal.exe'})
+        first = window.find_windows_by_class('Chrome_WidgetWin_1')[0]['hwnd']
+        self.assertEqual(target.resolve(), (first, resolver.METHOD_CLASS))
+        self.assertEqual(target.resolve(), (first, resolver.METHOD_CLASS))
+
+        # 指定进程的窗口出现后立即改用它，之后走缓存
+        terminal = self.desktop.create_window("终端", "Chrome_WidgetWin_1", pid=300,
+                                              exe="C:\\Apps\\Terminal.exe")
+        self.assertEqual(target.resolve(), (terminal, resolver.METHOD_PROCESS))
+        self.assertEqual(target.resolve(), (terminal, resolver.METHOD_CACHE))
+
+    def test_title_fallback_not_cached(self):
+        target = resolver.create_resolver({'window_class': 'EditorPanel', 'window_title': 'c.txt'})
+        self.assertEqual(target.resolve(), (self.editor2, resolver.METHOD_CLASS))
+        panel = self.desktop.create_window("c.txt - 编辑器", "EditorPanel", pid=100)
+        self.assertEqual(target.resolve(), (panel, resolver.METHOD_CLASS_TITLE))
+        self.assertEqual(target.resolve(), (panel, resolver.METHOD_CACHE))
+
+        # 只按类名的目标，类名层就是最好的一层
+        target = resolver.create_resolver({'window_class': 'EditorPanel'})
+        hwnd, _ = target.resolve()
+        self.assertEqual(target.resolve(), (hwnd, resolver.METHOD_CACHE))
+
+    def test_process_group_after_pid_reuse(self):
+        group = resolver.create_resolver({'group': {'type': 'process', 'value': 'browser.exe'}})
+        self.assertEqual(group.resolve()[0], [self.browser])
+
+        self.desktop.destroy_window(self.browser)
+        terminal = self.desktop.create_window("终端", "ConsoleWindowClass", pid=200,
+                                              exe="C:\\Windows\\System32\\conhost.exe")
+        self.assertEqual(group.resolve(), ([], resolver.METHOD_MISS))
+        group = resolver.create_resolver({'group': {'type': 'process', 'value': 'conhost.exe'}})
+        self.assertEqual(group.resolve()[0], [terminal])
+
+
+class RegistryProcessResolveTest(ProcessResolveTest):
+    """启动窗口注册表：进程 ID 来自注册表，进程名走缓存"""
+
+    use_registry = True
+
+    def test_process_name_cached(self):
+        group = resolver.create_resolver({'group': {'type': 'process', 'value': 'editor.exe'}})
+        group.resolve()
+        queried = self.desktop.calls['get_process_path']
+        group.resolve()
+        self.assertEqual(self.desktop.calls['get_process_path'], queried)
+
+
+if __name__ == '__main__':
+    unittest.main()
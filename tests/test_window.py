@@ -0,0 +1,50 @@
+"""
+窗口模块测试：进程名缓存在 PID 被复用后不会返回旧的可执行文件名
+"""
+import unittest
+
+from core import window
+from core.backend import set_backend
+from core.backend.simulated import SimulatedDesktop
+
+
+class ProcessNameCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.desktop = SimulatedDesktop()
+        self.previous_backend = set_backend(self.desktop)
+        window.start_registry(resync_interval=0)
+
+    def tearDown(self):
+        window.stop_registry()
+        set_backend(self.previous_backend)
+
+    def test_pid_reuse_after_windows_destroyed(self):
+        hwnd = self.desktop.create_window("编辑器", "EditorClass", pid=4242, exe="C:\\Apps\\editor.exe")
+        self.assertEqual(window.get_process_name(4242), "editor.exe")
+
+        self.desktop.destroy_window(hwnd)
+        self.desktop.create_window("终端", "TermClass", pid=4242, exe="C:\\Apps\\term.exe")
+        self.assertEqual(window.get_process_name(4242), "term.exe")
+
+    def test_pid_reuse_seen_by_resync(self):
+        hwnd = self.desktop.create_window("编辑器", "EditorClass", pid=4242, exe="C:\\Apps\\editor.exe")
+        self.assertEqual(window.get_process_name(4242), "editor.exe")
+
+        # 事件丢失时由全量同步发现进程的窗口已全部消失
+        self.desktop.events.stop()
+        self.desktop.destroy_window(hwnd)
+        self.desktop.processes[4242] = "C:\\Apps\\term.exe"
+        window.get_registry().resync()
+        self.assertEqual(window.get_process_name(4242), "term.exe")
+
+    def test_no_cache_without_registry(self):
+        window.stop_registry()
+        self.desktop.create_window("编辑器", "EditorClass", pid=4242, exe="C:\\Apps\\editor.exe")
+        self.assertEqual(window.get_process_name(4242), "editor.exe")
+        self.desktop.processes[4242] = "C:\\Apps\\term.exe"
+        self.assertEqual(window.get_process_name(4242), "term.exe")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+窗口选择列表测试：分批追加窗口与一次性构建得到相同的行，行键在追加后仍能找回同一行
+"""
+import random
+import unittest
+
+from gui.window_picker import WindowRowModel
+
+
+def _windows(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {'hwnd': 1000 + i, 'title': rng.choice(["", f"窗口 {i}"]) if i % 7 == 0 else f"窗口 {i}",
+         'class_name': f"Class{rng.randrange(8)}"}
+        for i in range(count)
+    ]
+
+
+def _expected_rows(windows):
+    groups = {}
+    for w in windows:
+        if w['title']:
+            groups.setdefault(w['class_name'], []).append(w)
+    rows = []
+    for class_name, members in groups.items():
+        rows.append((None, f"--- {class_name} ---"))
+        rows.extend((w, f"  {w['title']}") for w in members)
+    return rows
+
+
+def _rows(model):
+    return [(model.window_at(row), model.text(row)) for row in range(len(model))]
+
+
+class WindowRowModelTest(unittest.TestCase):
+
+    def test_batches_match_full_build(self):
+        windows = _windows(300)
+        model = WindowRowModel()
+        for i in range(0, len(windows), 37):
+            model.add_windows(windows[i:i + 37])
+            self.assertEqual(_rows(model), _expected_rows(windows[:i + 37]))
+        self.assertEqual(model.window_count, sum(1 for w in windows if w['title']))
+        self.assertEqual(_rows(WindowRowModel(windows)), _rows(model))
+
+    def test_row_keys_follow_rows(self):
+        windows = _windows(200, seed=1)
+        model = WindowRowModel(windows[:50])
+        keys = [model.row_key(row) for row in range(len(model))]
+        model.add_windows(windows[50:])
+        for key in keys:
+            row = model.row_of(key)
+            self.assertEqual(model.row_key(row), key)
+        self.assertIsNone(model.row_key(len(model)))
+        self.assertIsNone(model.row_of(-1))
+        self.assertIsNone(model.window_at(-1))
+
+    def test_headers_not_selectable(self):
+        model = WindowRowModel([{'hwnd': 1, 'title': "a", 'class_name': "A"}])
+        self.assertFalse(model.selectable(0))
+        self.assertIsNotNone(model.style(0))
+        self.assertTrue(model.selectable(1))
+        self.assertIsNone(model.style(1))
+
+    def test_set_windows_resets(self):
+        model = WindowRowModel(_windows(50))
+        model.set_windows([])
+        self.assertEqual(len(model), 0)
+        self.assertEqual(model.window_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
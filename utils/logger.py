@@ -0,0 +1,277 @@
+"""
+日志模块
+热路径上只把记录追加到内存环形缓冲区（不格式化、不做 I/O），
+后台线程负责格式化并写入滚动日志文件；每个子系统可以单独设置级别
+"""
+import collections
+import itertools
+import os
+import sys
+import threading
+import time
+
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+
+# 环形缓冲区容量：写线程来不及写出时最旧的记录会被覆盖
+RING_SIZE = 4096
+
+# 记录格式: (序号, 时间, 级别, 子系统, 消息, 参数)
+_ring = collections.deque(maxlen=RING_SIZE)
+_seq = itertools.count()
+# 取序号和追加在同一把锁下完成，缓冲区中的记录始终按序号排列
+_ring_lock = threading.Lock()
+
+_default_level = INFO
+# 子系统 -> 级别
+_levels = {}
+_loggers = {}
+
+
+class Logger:
+    """子系统日志器"""
+    __slots__ = ('name', 'level')
+
+    def __init__(self, name):
+        self.name = name
+        self.level = _levels.get(name, _default_level)
+
+    def log(self, level, msg, *args):
+        """
+        记录一条日志（只追加到环形缓冲区）
+        Args:
+            level: 级别
+            msg: 消息，可以包含 % 占位符，由写线程格式化
+            args: 占位符参数
+        """
+        if level < self.level:
+            return
+        now = time.time()
+        with _ring_lock:
+            _ring.append((next(_seq), now, level, self.name, msg, args))
+        if level >= WARNING:
+            _writer.wake()
+
+    def debug(self, msg, *args):
+        self.log(DEBUG, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(INFO, msg, *args)
+
+    def warning(self, msg, *args):
+        self.log(WARNING, msg, *args)
+
+    def error(self, msg, *args):
+        self.log(ERROR, msg, *args)
+
+
+def get_logger(name):
+    """
+    获取子系统日志器
+    Args:
+        name: 子系统名，如 "hotkey"、"window"
+    Returns:
+        Logger
+    """
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers.setdefault(name, Logger(name))
+    return logger
+
+
+def set_level(level, name=None):
+    """
+    设置日志级别
+    Args:
+        level: 级别
+        name: 子系统名，None 表示默认级别（不影响单独设置过的子系统）
+    """
+    global _default_level
+    if name is None:
+        _default_level = level
+        for logger in _loggers.values():
+            if logger.name not in _levels:
+                logger.level = level
+    else:
+        _levels[name] = level
+        get_logger(name).level = level
+
+
+def format_record(record):
+    """把一条记录格式化为一行文本"""
+    _, ts, level, name, msg, args = record
+    if args:
+        try:
+            msg = msg % args
+        except (TypeError, ValueError):
+            msg = f"{msg} {args!r}"
+    stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
+    return f"{stamp}.{int(ts * 1000) % 1000:03d} {LEVEL_NAMES.get(level, level):<7} [{name}] {msg}"
+
+
+def dump_recent(count=200):
+    """
+    获取最近的日志（无论是否已写入文件）
+    Args:
+        count: 条数
+    Returns:
+        list: 格式化后的日志行
+    """
+    with _ring_lock:
+        records = list(_ring)[-count:]
+    return [format_record(r) for r in records]
+
+
+def dump_recent_to(path, count=200):
+    """
+    把最近的日志写入文件，用于排查问题
+    Returns:
+        str: 文件路径
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in dump_recent(count):
+            f.write(line + '\n')
+    return path
+
+
+class _Writer:
+    """后台写线程：定期把新记录写入滚动日志文件和控制台"""
+
+    def __init__(self):
+        self.path = None
+        self.max_bytes = 1024 * 1024
+        self.backups = 3
+        self.console = True
+        self.interval = 0.2
+        self.dropped = 0
+        self._next_seq = 0
+        self._file = None
+        # 写线程和 flush() 的调用方可能同时写出，同一条记录只写一次
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(2.0)
+        self._thread = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """写出尚未写出的记录"""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        with _ring_lock:
+            records = list(_ring)
+        records = [r for r in records if r[0] >= self._next_seq]
+        if not records:
+            return
+        if records[0][0] > self._next_seq:
+            # 写线程落后太多，环形缓冲区已覆盖了部分记录
+            self.dropped += records[0][0] - self._next_seq
+        self._next_seq = records[-1][0] + 1
+
+        lines = [format_record(r) + '\n' for r in records]
+        if self.console:
+            try:
+                sys.stdout.writelines(lines)
+                sys.stdout.flush()
+            except (OSError, ValueError, AttributeError):
+                pass
+        if self.path:
+            try:
+                self._write_file(lines)
+            except OSError:
+                pass
+
+    def _write_file(self, lines):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.writelines(lines)
+        self._file.flush()
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+_writer = _Writer()
+
+
+def configure(path=None, max_bytes=1024 * 1024, backups=3, console=True, interval=0.2):
+    """
+    配置后台写线程
+    Args:
+        path: 日志文件路径，None 表示不写文件
+        max_bytes: 单个日志文件的最大字节数，超过后滚动
+        backups: 保留的历史文件数
+        console: 是否同时输出到控制台
+        interval: 写出间隔（秒）
+    """
+    _writer.path = path
+    _writer.max_bytes = max_bytes
+    _writer.backups = backups
+    _writer.console = console
+    _writer.interval = interval
+
+
+def start():
+    """启动后台写线程"""
+    _writer.start()
+
+
+def stop():
+    """写出剩余记录并停止后台写线程"""
+    _writer.stop()
+
+
+def flush():
+    """立即写出剩余记录（在调用线程中执行）"""
+    _writer.flush()
+
+
+def dropped_count():
+    """因缓冲区溢出而未写出的记录数"""
+    return _writer.dropped
@@ -0,0 +1,52 @@
+"""
+启动计时模块
+记录启动过程中各阶段（导入、配置、热键、托盘、界面）的耗时
+"""
+import time
+
+
+class StartupTimer:
+    """按顺序记录启动阶段耗时"""
+
+    def __init__(self, start=None):
+        """
+        Args:
+            start: 计时起点（time.perf_counter() 的值），默认为当前时间
+        """
+        self.start = time.perf_counter() if start is None else start
+        self._last = self.start
+        self.phases = []
+
+    def mark(self, name):
+        """
+        结束一个阶段（从上一个阶段结束时开始计时）
+        Args:
+            name: 阶段名
+        Returns:
+            float: 本阶段耗时（毫秒）
+        """
+        now = time.perf_counter()
+        elapsed = (now - self._last) * 1000
+        self.phases.append((name, elapsed))
+        self._last = now
+        return elapsed
+
+    @property
+    def total_ms(self):
+        """从起点到最后一个阶段结束的耗时（毫秒）"""
+        return (self._last - self.start) * 1000
+
+    def report(self):
+        """
+        Returns:
+            dict: {'phases': {阶段名: 毫秒}, 'total_ms': 毫秒}
+        """
+        return {
+            'phases': {name: round(ms, 3) for name, ms in self.phases},
+            'total_ms': round(self.total_ms, 3)
+        }
+
+    def summary(self):
+        """单行文本摘要，如 "import 120.5ms, config 1.2ms | total 130.0ms" """
+        parts = ", ".join(f"{name} {ms:.1f}ms" for name, ms in self.phases)
+        return f"{parts} | total {self.total_ms:.1f}ms"
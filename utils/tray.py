@@ -7,19 +7,24 @@ import threading
 from PIL import Image, ImageDraw
 
 import pystray
-import customtkinter as ctk
+
+from core import config, hotkey, stats
+from core.controller import get_controller
+from utils import logger
+
+log = logger.get_logger("tray")
 
 
 class TrayIcon:
-    def __init__(self, app, show_callback, quit_callback):
+    def __init__(self, post, show_callback, quit_callback):
         """
         初始化托盘图标
         Args:
-            app: CTk 实例
+            post: 把回调交给主线程执行的函数 post(callback)
             show_callback: 显示窗口的回调函数
             quit_callback: 退出程序的回调函数
         """
-        self.app = app
+        self.post = post
         self.show_callback = show_callback
         self.quit_callback = quit_callback
         self.running = True
@@ -59,10 +64,36 @@ class TrayIcon:
         """创建托盘菜单"""
         menu = pystray.Menu(
             pystray.MenuItem("显示", self.on_show),
+            pystray.MenuItem("配置方案", pystray.Menu(self.profile_items)),
+            pystray.MenuItem("延迟统计", self.on_stats),
+            pystray.MenuItem("最近日志", self.on_recent_log),
             pystray.MenuItem("退出", self.on_quit)
         )
         return menu
 
+    def profile_items(self):
+        """配置方案子菜单（每次打开菜单时生成）"""
+        items = [pystray.MenuItem(
+            "公共",
+            self.on_profile(None),
+            checked=lambda item: hotkey.get_active_profile() is None,
+            radio=True
+        )]
+        for name in config.get_profiles():
+            items.append(pystray.MenuItem(
+                name,
+                self.on_profile(name),
+                checked=lambda item, name=name: hotkey.get_active_profile() == name,
+                radio=True
+            ))
+        return items
+
+    def on_profile(self, profile):
+        """生成切换到指定配置方案的菜单回调"""
+        def action(icon, item):
+            get_controller().switch_profile(profile)
+        return action
+
     def run(self):
         """运行托盘图标"""
         self.icon.run()
@@ -70,22 +101,43 @@ class TrayIcon:
     def on_show(self, icon, item):
         """显示窗口"""
         if self.show_callback:
-            self.app.after(0, self.show_callback)
+            self.post(self.show_callback)
+
+    def on_stats(self, icon, item):
+        """导出延迟统计快照并用默认程序打开"""
+        try:
+            path = stats.export()
+        except OSError as e:
+            log.error("导出统计失败: %s", e)
+            return
+        log.info("统计已导出: %s", path)
+        if hasattr(os, 'startfile'):
+            os.startfile(path)
+
+    def on_recent_log(self, icon, item):
+        """导出最近的日志并用默认程序打开"""
+        try:
+            path = logger.dump_recent_to(os.path.join(config.CONFIG_DIR, 'logs', 'recent.log'), 500)
+        except OSError as e:
+            log.error("导出日志失败: %s", e)
+            return
+        if hasattr(os, 'startfile'):
+            os.startfile(path)
 
     def on_quit(self, icon, item):
         """退出程序"""
         self.running = False
         self.icon.stop()
         if self.quit_callback:
-            self.app.after(0, self.quit_callback)
+            self.post(self.quit_callback)
 
 
-def create_tray_icon(app, show_callback, quit_callback):
+def create_tray_icon(post, show_callback, quit_callback):
     """
     创建托盘图标
     Args:
-        app: CTk 实例
+        post: 把回调交给主线程执行的函数 post(callback)
         show_callback: 显示窗口的回调函数
         quit_callback: 退出程序的回调函数
     """
-    return TrayIcon(app, show_callback, quit_callback)
+    return TrayIcon(post, show_callback, quit_callback)